@@ -1,9 +1,5 @@
 import queue
 from datetime import datetime
-import matplotlib
-import matplotlib.pyplot as plt
-
-
 
 from .event import EventType
 from .data_handler.historic_csv_data_handler import HistoricCSVDataHandler
@@ -12,6 +8,11 @@ from .risk_manager.example import ExampleRiskManager
 from .portfolio_handler.portfolio_handler import PortfolioHandler
 from .execution_handler.ashare_simulated import AShareSimulatedExecutionHandler
 from .statistics.tearsheet import TearsheetStatistics
+from .statistics.risk_metrics import OnlineRiskMetrics
+from .statistics.benchmark import BenchmarkSeries
+from .indicator.registry import IndicatorRegistry
+from .scheduler import Scheduler
+from .statistics.report import save_results
 
 
 class Backtest(object):
@@ -22,8 +23,19 @@ class Backtest(object):
         data_handler=None, portfolio_handler=None,
         position_sizer=None, execution_handler=None,
         risk_manager=None, statistics=None,
-        title=None, benchmark=None
+        title=None, benchmark=None, batch_orders=True,
+        risk_metrics=None, deferred_report=False,
+        results_store=None, run_params=None
     ):
+        """
+        With deferred_report the run only saves its results, see
+        statistics.report, and the tearsheet is rendered later from
+        the saved file, e.g. by a ReportRenderer. The file name is
+        kept in results_file.
+
+        With a ResultsStore the results are also archived in columns,
+        with the run_params dict, under the run id kept in run_id.
+        """
         self.strategy = strategy
         self.symbol_list = symbol_list
         self.init_equity = init_equity
@@ -40,6 +52,15 @@ class Backtest(object):
         self.statistics = statistics
         self.title = title
         self.benchmark = benchmark
+        self.batch_orders = batch_orders
+        self.risk_metrics = risk_metrics
+        self.deferred_report = deferred_report
+        self.results_file = None
+        self.results_store = results_store
+        self.run_params = run_params
+        self.run_id = None
+        self.benchmark_series = None
+        self._pending_orders = []
         self._config_session()
         self.cur_time = None
     
@@ -77,14 +98,39 @@ class Backtest(object):
                 self.output_dir
             )
 
+        # The benchmark is a side series, it is not streamed
+        if self.benchmark is not None:
+            self.benchmark_series = BenchmarkSeries(
+                self.data_handler.get_close_series(self.benchmark)
+            )
+
         if self.statistics is None:
             self.statistics = TearsheetStatistics(
                 self.output_dir,
                 self.portfolio_handler,
-                self.title, self.benchmark
+                self.title, self.benchmark,
+                benchmark_series=self.benchmark_series
             )
 
+        if self.risk_metrics is None:
+            self.risk_metrics = OnlineRiskMetrics()
+        self.portfolio_handler.set_risk_metrics(self.risk_metrics)
+
         self.strategy.set_portfolio(self.portfolio_handler)
+        self.indicators = IndicatorRegistry()
+        self.strategy.set_indicators(self.indicators)
+        columns = self.strategy.get_indicator_columns()
+        if columns:
+            self.data_handler.add_columns(columns)
+        # Only stream the symbols the strategies listen to
+        symbols = self.strategy.get_symbols()
+        if symbols is not None:
+            symbols = frozenset(symbols)
+            self.data_handler.set_stream_symbols(symbols)
+        self._strategy_symbols = symbols
+        self.scheduler = Scheduler(self.data_handler)
+        self._scheduled_time = None
+        self.strategy.set_scheduler(self.scheduler)
 
     def _continue_loop_condition(self):
         return self.data_handler.continue_backtest
@@ -99,6 +145,16 @@ class Backtest(object):
         strategy component of the execution handler. The
         loop continue until the event queue has been
         emptied.
+
+        With batch_orders the OrderEvents are collected and executed
+        together by the execution handler once the queue is empty
+        and every bar of their timestamp has been streamed, so the
+        orders of all the symbols of a timestamp form one batch.
+
+        The scheduled callbacks of a timestamp are run once the
+        queue is empty and its last bar has been streamed, before
+        the pending orders are executed, so the orders of the
+        callbacks join the batch of the timestamp.
         """
         print("Running Backtest...")
         print("------------------------------------------------")
@@ -107,29 +163,79 @@ class Backtest(object):
             try:
                 event = self.events_queue.get(False)
             except queue.Empty:
-                self.data_handler.stream_next()
+                if self._run_scheduled():
+                    continue
+                if self._pending_orders and (
+                    self.data_handler.peek_timestamp() != self.cur_time
+                ):
+                    orders = self._pending_orders
+                    self._pending_orders = []
+                    self.execution_handler.execute_orders(orders)
+                else:
+                    self.data_handler.stream_next()
             else:
                 if event is not None:
                     if event.type == EventType.BAR:
                         if event.new_day == True:
+                            self.portfolio_handler.record_holdings(self.data_handler.pre_day)
                             self.portfolio_handler.update_portfolio_position()
                         self.cur_time = event.timestamp
-                        self.strategy.calculate_signals(event)
+                        self.execution_handler.on_bar(event)
+                        self.indicators.on_bar(event)
+                        if self._strategy_symbols is None or event.symbol in self._strategy_symbols:
+                            self.strategy.calculate_signals(event)
                         self.portfolio_handler.update_portfolio_value()
                         self.statistics.update(event.timestamp, self.portfolio_handler)
+                        self._update_risk_metrics(event.timestamp)
                     elif event.type == EventType.SIGNAL:
+                        # A symbol traded without being listened to
+                        # is streamed from now on
+                        self.data_handler.add_stream_symbol(event.symbol)
                         self.portfolio_handler.on_signal(event)
                     elif event.type == EventType.ORDER:
-                        self.execution_handler.execute_order(event)
+                        self.data_handler.add_stream_symbol(event.symbol)
+                        if self.batch_orders:
+                            self._pending_orders.append(event)
+                        else:
+                            self.execution_handler.execute_order(event)
                     elif event.type == EventType.FILL:
                         self.portfolio_handler.on_fill(event)
                     else:
                         raise NotImplementedError("Unsupported event.type '%s'" % event.type)
 
+    def _run_scheduled(self):
+        """
+        Run the scheduled callbacks of the current timestamp, once,
+        if every bar of it has been streamed. Returns True if some
+        callbacks were run.
+        """
+        timestamp = self.cur_time
+        if timestamp is None or timestamp == self._scheduled_time:
+            return False
+        callbacks = self.scheduler.get(timestamp)
+        if callbacks is None:
+            return False
+        if self.data_handler.peek_timestamp() == timestamp:
+            return False
+        self._scheduled_time = timestamp
+        for callback in callbacks:
+            callback(timestamp)
+        return True
+
+    def _update_risk_metrics(self, timestamp):
+        benchmark = None
+        if self.benchmark_series is not None:
+            benchmark = self.benchmark_series.asof(timestamp)
+        self.risk_metrics.update(
+            timestamp, self.portfolio_handler.equity, benchmark
+        )
+
     def start_trading(self, testing=False):
 
         if self._need_backtest_condition():
             self._run_session()
+            self.risk_metrics.flush()
+            self.portfolio_handler.record_holdings(self.data_handler.cur_day)
             results = self.statistics.get_results()
             print("------------------------------------------------")
             print("Backtest complete.")
@@ -139,14 +245,27 @@ class Backtest(object):
                     results["max_drawdown_pct"] * 100.0
                 )
             )
-            print("Final equity: %0.2f" % results["equity"][-1])
+            print("Final equity: %0.2f" % results["equity"].iloc[-1])
+            for account, account_results in results.get("accounts", {}).items():
+                print(
+                    "  %s: final equity %0.2f, return %0.2f%%" % (
+                        account, account_results["equity"].iloc[-1],
+                        account_results["total_return"] * 100.0
+                    )
+                )
             print(
                 "Cum Returns: %0.2f%%" % (
                     results["total_return"] * 100.0
                 )
             )
+            if self.results_store is not None:
+                self.run_id = self.results_store.save(results, params=self.run_params)
             if not testing:
-                self.statistics.save()
+                if self.deferred_report:
+                    self.results_file = save_results(self.statistics, self.output_dir)
+                    print("Results saved to %s" % self.results_file)
+                else:
+                    self.statistics.save()
                 #self.statistics.plot_results()
             return results
         else:
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+class GrowableArray(object):
+    """
+    A one dimensional NumPy buffer which is preallocated and
+    doubles its capacity when full, so that appending a value
+    from inside the event loop is amortised O(1) and does not
+    create a Python object per element.
+    """
+    def __init__(self, dtype=np.float64, capacity=1024):
+        """
+        Parameters:
+        dtype - The NumPy dtype of the stored values.
+        capacity - The number of elements initially allocated.
+        """
+        self._data = np.empty(max(int(capacity), 1), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, min_capacity):
+        capacity = len(self._data)
+        while capacity < min_capacity:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, value):
+        """
+        Append a single value to the end of the buffer.
+        """
+        if self._size == len(self._data):
+            self._grow(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        """
+        Append an array of values to the end of the buffer.
+        """
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            self._grow(end)
+        self._data[self._size:end] = values
+        self._size = end
+
+    @property
+    def values(self):
+        """
+        A view (not a copy) of the filled part of the buffer.
+        """
+        return self._data[:self._size]
+
+    @property
+    def last(self):
+        return self._data[self._size - 1]
+
+    @last.setter
+    def last(self, value):
+        self._data[self._size - 1] = value
+
+
+class RingBuffer(object):
+    """
+    A fixed capacity NumPy buffer keeping the last capacity values.
+    Appending overwrites the oldest value once it is full and
+    returns it, so that running window sums can be updated in O(1).
+    """
+    def __init__(self, capacity, dtype=np.float64):
+        """
+        Parameters:
+        capacity - The number of values kept.
+        dtype - The NumPy dtype of the stored values.
+        """
+        self._data = np.zeros(max(int(capacity), 1), dtype=dtype)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def full(self):
+        return self._size == len(self._data)
+
+    def append(self, value):
+        """
+        Append a value. Returns the value evicted to make room for
+        it, or None while the buffer is not full.
+        """
+        capacity = len(self._data)
+        if self._size < capacity:
+            self._data[self._size] = value
+            self._size += 1
+            return None
+        evicted = self._data[self._start]
+        self._data[self._start] = value
+        self._start = (self._start + 1) % capacity
+        return evicted
+
+    @property
+    def values(self):
+        """
+        A copy of the values, oldest first.
+        """
+        if self._start == 0:
+            return self._data[:self._size].copy()
+        return np.concatenate((self._data[self._start:], self._data[:self._start]))
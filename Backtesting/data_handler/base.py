@@ -10,6 +10,8 @@ class DataHandler(ABC):
         try:
             self.symbol_data.pop(symbol, None)
             self.latest_symbol_data.pop(symbol, None)
+            self.limit_flags.pop(symbol, None)
+            self.trading_days.pop(symbol, None)
         except KeyError:
             print(
                 "Could not unsubscribe symbol %s "
@@ -38,6 +40,7 @@ class DataHandler(ABC):
         self.latest_symbol_data[symbol]["close"] = event.close_price
         self.latest_symbol_data[symbol]["adj_close"] = event.adj_close_price
         self.latest_symbol_data[symbol]["timestamp"] = event.timestamp
+        self.latest_symbol_data[symbol]["volume"] = event.volume
 
     def get_last_close(self, symbol):
         """
@@ -52,4 +55,95 @@ class DataHandler(ABC):
                 "available from the %s."  % (symbol, self.__class__.__name__)
             )
             return None
+
+    def get_last_volume(self, symbol):
+        """
+        Returns the volume of the most recent bar.
+        """
+        if symbol in self.latest_symbol_data:
+            return self.latest_symbol_data[symbol]["volume"]
+        else:
+            print(
+                "Volume for symbol %s is not "
+                "available from the %s."  % (symbol, self.__class__.__name__)
+            )
+            return None
+
+    def get_bar_counts(self, symbols):
+        """
+        Returns a dict of timestamp to the number of bars of the
+        symbols at it.
+        """
+        raise NotImplementedError("Should implement get_bar_counts()")
+
+    def get_timestamps(self, bounded=True):
+        """
+        Returns the sorted timestamps of the bars streamed, within
+        the backtest period unless bounded is False.
+        """
+        raise NotImplementedError("Should implement get_timestamps()")
+
+    def peek_timestamp(self):
+        """
+        Returns the timestamp of the next bar streamed, or None.
+        """
+        raise NotImplementedError("Should implement peek_timestamp()")
+
+    def get_close_series(self, symbol):
+        """
+        Returns the close prices of a symbol as a pandas Series.
+        """
+        raise NotImplementedError("Should implement get_close_series()")
+
+    def set_stream_symbols(self, symbols):
+        """
+        Restricts the bars streamed to symbols, None for all.
+        """
+        raise NotImplementedError("Should implement set_stream_symbols()")
+
+    def add_stream_symbol(self, symbol):
+        """
+        Starts streaming the bars of one more symbol.
+        """
+        raise NotImplementedError("Should implement add_stream_symbol()")
+
+    def add_columns(self, columns):
+        """
+        Adds precomputed indicator columns to the bars.
+        """
+        raise NotImplementedError("Should implement add_columns()")
+
+    def get_limit_state(self, symbol):
+        """
+        Returns 1 if the most recent bar closed at limit-up, -1 if
+        it closed at limit-down and 0 otherwise.
+        """
+        flags = self.limit_flags.get(symbol)
+        if not flags:
+            return 0
+        return flags.get(self.latest_symbol_data[symbol]["timestamp"], 0)
+
+    def is_suspended(self, symbol):
+        """
+        Returns True if the symbol does not trade on the current day.
+        """
+        days = self.trading_days.get(symbol)
+        if days is None or self.cur_day is None:
+            return False
+        return self.cur_day not in days
+
+    def can_trade(self, symbol, action):
+        """
+        Returns False if the symbol is suspended, or sits at the
+        price limit in the direction of the action: A shares can't
+        be bought at limit-up nor sold at limit-down.
+        """
+        if self.is_suspended(symbol):
+            return False
+        state = self.get_limit_state(symbol)
+        if state == 1:
+            return action != "BUY"
+        if state == -1:
+            return action != "SELL"
+        return True
             
\ No newline at end of file
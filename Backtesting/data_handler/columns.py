@@ -0,0 +1,79 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+
+def compute_column(spec, frame):
+    """
+    Return an indicator column of a symbol DataFrame as a Series on
+    its index.
+
+    Parameters:
+    spec - An indicator with a compute method, e.g. SMA(20), or a
+        function of the DataFrame returning a Series or an array.
+    frame - The DataFrame of the symbol (Open, High, Low, Close,
+        Volume, Adj Close).
+    """
+    if hasattr(spec, "compute"):
+        values = spec.compute(frame)
+    else:
+        values = spec(frame)
+    if isinstance(values, pd.Series):
+        return values.reindex(frame.index)
+    return pd.Series(np.asarray(values), index=frame.index)
+
+
+def same_column(spec, other):
+    """
+    Return whether two column specs compute the same column: they
+    are the same object, or indicators of the same class whose
+    parameters, kept as attributes named like the arguments of the
+    class, are equal, e.g. SMA(20) and SMA(window=20).
+    """
+    if spec is other:
+        return True
+    if type(spec) is not type(other) or not hasattr(spec, "compute"):
+        return False
+    return all(
+        getattr(spec, name, None) == getattr(other, name, None)
+        for name in inspect.signature(type(spec)).parameters
+    )
+
+
+def check_columns(columns, name, spec):
+    """
+    Raise a ValueError if a dict of column specs already maps name
+    to a different spec.
+    """
+    if name in columns and not same_column(columns[name], spec):
+        raise ValueError(
+            "The indicator column '%s' is declared with different specs" % name
+        )
+
+
+def check_no_lookahead(name, spec, frame, values):
+    """
+    Raise a ValueError if an indicator column uses future values:
+    its values over the first half of the data must not change when
+    it is computed from the first half only.
+
+    Parameters:
+    name - The name of the column.
+    spec - The indicator or function of the column.
+    frame - The DataFrame the column was computed from.
+    values - The column computed from the whole frame.
+    """
+    n = len(frame) // 2
+    if n == 0:
+        return
+    prefix = compute_column(spec, frame.iloc[:n])
+    if not np.allclose(
+        np.asarray(values.iloc[:n], dtype=np.float64),
+        np.asarray(prefix, dtype=np.float64),
+        rtol=1e-9, atol=1e-12, equal_nan=True
+    ):
+        raise ValueError(
+            "The indicator column '%s' uses future values: its first %d "
+            "values change when the later bars are removed" % (name, n)
+        )
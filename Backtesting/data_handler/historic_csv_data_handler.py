@@ -1,17 +1,20 @@
 # coding=gbk
 import os, os.path
+import numpy as np
 import pandas as pd
 
 
 from ..event import BarEvent
 
 from .base import DataHandler
+from .price_limits import limit_flags, trading_days
+from .columns import compute_column, check_columns, check_no_lookahead
     
     
 class HistoricCSVDataHandler(DataHandler):
     def __init__(
         self, events_queue, data_dir, symbol_list,
-        start_date=None, end_date=None):
+        start_date=None, end_date=None, columns=None):
         """
         ͨCSVļƱ嵥ʼʷ
 
@@ -19,6 +22,7 @@ class HistoricCSVDataHandler(DataHandler):
         events_queue - The Event Queue.
         data_dir - Absolute directory path to the CSV files.
         symbol_list - A list of symbol strings.
+        columns - Dict of indicator columns, see add_columns.
         """
         self.events_queue = events_queue
         self.data_dir = data_dir
@@ -26,6 +30,12 @@ class HistoricCSVDataHandler(DataHandler):
         
         self.symbol_data = {} # ֵ:{symbol:DataFrame}
         self.latest_symbol_data = {} # barֵ䣺{symbol:bar{close, adj_close, timestamp}}
+        self.limit_flags = {} # ֵ:{symbol:{timestamp:1ͣ/-1ͣ}}
+        self.trading_days = {} # ֵ:{symbol:set(гɽ)}
+        self.columns = dict(columns or {}) # ֵ:{:ָ}
+        self.stream_symbols = None # barĴ뼯ϣNoneΪȫ
+        self._last_streamed = None # ͵(timestamp, symbol)
+        self._peeked = None # Ԥһ(timestamp, row)
         self.continue_backtest = True
         self.need_backtest = True
 
@@ -54,7 +64,8 @@ class HistoricCSVDataHandler(DataHandler):
                 symbol_prices = {
                     "close": row0["Close"],
                     "adj_close": row0["Adj Close"],
-                    "timestamp": dft.index[0]
+                    "timestamp": dft.index[0],
+                    "volume": row0["Volume"]
                 }
                 self.latest_symbol_data[symbol] = symbol_prices
             except OSError:
@@ -73,13 +84,18 @@ class HistoricCSVDataHandler(DataHandler):
         """
         Place the next BarEvent onto the event queue.
         """
-        try:
-            index, row = next(self.bar_stream)
-        except StopIteration:
-            self.continue_backtest = False
-            return
+        if self._peeked is not None:
+            index, row = self._peeked
+            self._peeked = None
+        else:
+            try:
+                index, row = next(self.bar_stream)
+            except StopIteration:
+                self.continue_backtest = False
+                return
         # Obtain all elements of the bar from the dataframe
         symbol = row["Symbol"]
+        self._last_streamed = (index, symbol)
 
         cur_day = index.date()
         if self.pre_day == None:
@@ -97,23 +113,187 @@ class HistoricCSVDataHandler(DataHandler):
         # Send event to queue
         self.events_queue.put(bev)
 
-        
-    def _open_convert_csv_files(self, symbol):
+    def peek_timestamp(self):
+        """
+        Returns the timestamp of the next bar of the stream without
+        streaming it, or None at the end of the stream, e.g. to know
+        that every bar of the current timestamp has been streamed.
+        """
+        if self._peeked is None:
+            try:
+                self._peeked = next(self.bar_stream)
+            except StopIteration:
+                return None
+        return self._peeked[0]
 
+    def _reset_stream(self):
         """
-        Opens the CSV files containing the equities ticks from
-        the specified CSV data directory, converting them into
-        them into a pandas DataFrame, stored in a dictionary.
+        Rebuilds the stream, after the last bar streamed, dropping
+        the bar peeked.
+        """
+        self._peeked = None
+        self.bar_stream = self._merge_sort_symbol_data()
+
+    def set_stream_symbols(self, symbols):
+        """
+        Restrict the bars streamed to symbols, e.g. those the
+        strategies listen to, None streaming every subscribed
+        symbol. The bars of the other symbols are dropped from the
+        stream before they are turned into events.
+        """
+        self.stream_symbols = None if symbols is None else set(symbols)
+        if self.need_backtest:
+            self._reset_stream()
+
+    def add_stream_symbol(self, symbol):
+        """
+        Start streaming the bars of a subscribed symbol which is not
+        streamed, e.g. once it is traded, from the next bar on. Its
+        latest bar is brought up to the current time, so that its
+        last close is the one of the latest bar streamed.
+        """
+        if self.stream_symbols is None or symbol in self.stream_symbols:
+            return
+        if symbol not in self.symbol_data:
+            return
+        self.stream_symbols.add(symbol)
+        if self._last_streamed is not None:
+            dft = self.symbol_data[symbol]
+            past = dft.loc[:self._last_streamed[0]]
+            if not past.empty:
+                row = past.iloc[-1]
+                latest = self.latest_symbol_data[symbol]
+                latest["close"] = row["Close"]
+                latest["adj_close"] = row["Adj Close"]
+                latest["timestamp"] = past.index[-1]
+                latest["volume"] = row["Volume"]
+        if self.need_backtest:
+            self._reset_stream()
+
+    def add_columns(self, columns):
+        """
+        Add indicator columns to the data of every symbol, e.g. those
+        declared by the strategy. Each column is computed once over
+        the whole data of a symbol with vectorized operations, kept
+        in its DataFrame and passed with every bar in
+        BarEvent.columns. A column is checked not to use future
+        values. A column already added under the same name is kept,
+        and a ValueError is raised if its spec is different.
+
+        Parameters:
+        columns - Dict of column name to an indicator with a compute
+            method, e.g. SMA(20), or a function of the DataFrame of
+            a symbol returning a Series.
+        """
+        if self.cur_day is not None:
+            raise RuntimeError("Columns must be added before the backtest starts")
+        added = {}
+        for name, spec in columns.items():
+            check_columns(self.columns, name, spec)
+            if name in self.columns:
+                continue
+            self.columns[name] = spec
+            added[name] = spec
+        if not added:
+            return
+        for symbol in self.symbol_data:
+            self._compute_columns(symbol, added)
+        if self.need_backtest:
+            self._reset_stream()
+
+    def _compute_columns(self, symbol, columns):
+        """
+        Compute indicator columns into the DataFrame of a symbol.
+        """
+        dft = self.symbol_data[symbol]
+        for name, spec in columns.items():
+            if name in dft.columns:
+                raise ValueError("The column '%s' is already in the data" % name)
+            values = compute_column(spec, dft)
+            check_no_lookahead(name, spec, dft, values)
+            dft[name] = values
+
+    def get_bar_counts(self, symbols):
+        """
+        Returns a dict of timestamp to the number of bars the given
+        symbols have at it, e.g. to know when every bar of a
+        timestamp has been streamed.
+        """
+        index = [
+            self.symbol_data[symbol].index.values
+            for symbol in symbols if symbol in self.symbol_data
+        ]
+        if not index:
+            return {}
+        return pd.Series(np.concatenate(index)).value_counts().to_dict()
+
+    def get_timestamps(self, bounded=True):
+        """
+        Returns the sorted timestamps of the bars streamed within the
+        backtest period as a DatetimeIndex, i.e. the trading calendar
+        of the backtest.
+
+        Parameters:
+        bounded - With False the timestamps of all of the loaded data
+            are returned, including those before and after the
+            backtest period.
+        """
+        index = [
+            dft.index.values for symbol, dft in self.symbol_data.items()
+            if self.stream_symbols is None or symbol in self.stream_symbols
+        ]
+        if not index:
+            return pd.DatetimeIndex([])
+        index = pd.DatetimeIndex(np.unique(np.concatenate(index)))
+        if not bounded:
+            return index
+        return index[index.slice_indexer(self.start_date, self.end_date)]
+
+    def get_close_series(self, symbol):
+        """
+        Returns the close prices of a symbol as a pandas Series,
+        loaded from its CSV file without subscribing it, e.g. for a
+        benchmark which is only compared against.
+        """
+        if symbol in self.symbol_data:
+            return self.symbol_data[symbol]["Close"]
+        return self._read_csv_file(symbol)[0]["Close"]
+
+    def _read_csv_file(self, symbol):
+        """
+        Returns the DataFrame of the CSV file of a symbol, sorted by
+        time, and the column names of its header.
         """
         symbol_path = os.path.join(self.data_dir, "%s.csv" % symbol)
-        self.symbol_data[symbol] = pd.io.parsers.read_csv(
+        with open(symbol_path) as f:
+            header = f.readline().strip().split(",")
+        dft = pd.io.parsers.read_csv(
             symbol_path, header=0, parse_dates=True,
             index_col=0, names=(
                 "Date", "Open", "High", "Low",
                 "Close", "Volume", "Adj Close"
             )
+        ).sort_index()
+        return dft, header
+
+    def _open_convert_csv_files(self, symbol):
+
+        """
+        Opens the CSV files containing the equities ticks from
+        the specified CSV data directory, converting them into
+        them into a pandas DataFrame, stored in a dictionary.
+        """
+        dft, header = self._read_csv_file(symbol)
+        dft["Symbol"] = symbol
+        self.symbol_data[symbol] = dft
+        self._compute_columns(symbol, self.columns)
+
+        # Tushare files hold pre_close in the last column
+        pre_close = dft["Adj Close"] if header[-1] == "pre_close" else None
+        self.limit_flags[symbol] = limit_flags(
+            symbol, dft.index, dft["Close"], pre_close
         )
-        self.symbol_data[symbol]["Symbol"] = symbol
+        self.trading_days[symbol] = trading_days(dft.index, dft["Volume"])
 
     def _merge_sort_symbol_data(self):
         """
@@ -143,6 +323,16 @@ class HistoricCSVDataHandler(DataHandler):
             print("The backtest period is not in the data!")
             self.need_backtest = False
 
+        if self.stream_symbols is not None:
+            df = df[df["Symbol"].isin(self.stream_symbols)]
+        # Resume after the last bar streamed when the stream is rebuilt
+        if self._last_streamed is not None:
+            timestamp, symbol = self._last_streamed
+            df = df[
+                (df.index > timestamp) |
+                ((df.index == timestamp) & (df["Symbol"] > symbol))
+            ]
+
         return df.iterrows()
 
 
@@ -164,10 +354,14 @@ class HistoricCSVDataHandler(DataHandler):
         close_price = row["Close"]
         adj_close_price = row["Adj Close"]
         volume = int(row["Volume"])
+        columns = None
+        if self.columns:
+            columns = {name: row[name] for name in self.columns}
         bev = BarEvent(
             symbol, timestamp, new_day,
             open_price, high_price, low_price,
-            close_price, volume, adj_close_price
+            close_price, volume, adj_close_price,
+            columns
         )
         return bev
 
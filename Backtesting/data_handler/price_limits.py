@@ -0,0 +1,91 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# ChiNext (300/301) moved from a 10% to a 20% daily limit
+CHINEXT_REFORM_DATE = pd.Timestamp(2020, 8, 24)
+
+
+def board_limit(symbol, days):
+    """
+    Return the daily price limit ratio of an A-share symbol for
+    each of the given days, or None when the symbol does not start
+    with a six digit A-share code (e.g. 'AAPL').
+
+    main boards - 10%
+    ChiNext (300, 301) - 20% from 2020-08-24, 10% before
+    STAR Market (688, 689) - 20%
+    Beijing Stock Exchange (43, 83, 87, 88, 92) - 30%
+
+    Parameters:
+    symbol - The ticker symbol, e.g. '000001SZ_D'.
+    days - A DatetimeIndex of the (normalized) bar dates.
+    """
+    match = re.match(r"\d{6}", symbol)
+    if match is None:
+        return None
+    code = match.group(0)
+    if code.startswith(("300", "301")):
+        return np.where(days >= CHINEXT_REFORM_DATE, 0.2, 0.1)
+    if code.startswith(("688", "689")):
+        limit = 0.2
+    elif code.startswith(("43", "83", "87", "88", "92")):
+        limit = 0.3
+    else:
+        limit = 0.1
+    return np.full(len(days), limit)
+
+
+def limit_flags(symbol, index, close, pre_close=None):
+    """
+    Return a dict {timestamp: flag} of the bars of one symbol which
+    close at a price limit, with a flag of 1 at limit-up and -1 at
+    limit-down. Bars within the limits are left out, so the dict
+    only holds the few limit bars.
+
+    The limit prices of a day are set from the pre_close of its
+    first bar, falling back to the last close of the previous day
+    when there is none. This works for daily bars as well as for
+    intraday bars, whose pre_close is the close of the previous bar.
+
+    Parameters:
+    symbol - The ticker symbol.
+    index - The sorted DatetimeIndex of the bars.
+    close - The array of close prices.
+    pre_close - The array of pre_close prices, or None.
+    """
+    days = index.normalize()
+    ratio = board_limit(symbol, days)
+    if ratio is None or len(index) == 0:
+        return {}
+    close = np.asarray(close, dtype=np.float64)
+    first = np.r_[True, days[1:] != days[:-1]]
+    last = np.r_[first[1:], True]
+    day = np.cumsum(first) - 1
+
+    day_pre_close = np.r_[np.nan, close[last][:-1]]
+    if pre_close is not None:
+        given = np.asarray(pre_close, dtype=np.float64)[first]
+        day_pre_close = np.where(np.isnan(given), day_pre_close, given)
+    day_pre_close = day_pre_close[day]
+
+    # Limit prices are rounded half up to the cent
+    up = np.floor(day_pre_close * (1 + ratio) * 100 + 0.5) / 100
+    down = np.floor(day_pre_close * (1 - ratio) * 100 + 0.5) / 100
+    flag = np.zeros(len(close), dtype=np.int8)
+    flag[close >= up - 1e-6] = 1
+    flag[close <= down + 1e-6] = -1
+    hit = np.flatnonzero(flag)
+    return dict(zip(index[hit], flag[hit].tolist()))
+
+
+def trading_days(index, volume):
+    """
+    Return the set of dates on which a symbol traded, i.e. has a
+    bar with a positive volume. A symbol is suspended on any other
+    day of the backtest.
+    """
+    traded = np.asarray(volume, dtype=np.float64) > 0
+    return set(index[traded].date)
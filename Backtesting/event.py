@@ -1,4 +1,5 @@
 # coding=gbk
+import itertools
 from enum import Enum
 
 # Enum Ǹö
@@ -19,7 +20,8 @@ class BarEvent(Event):
     def __init__(
         self, symbol, timestamp, new_day,
         open_price, high_price, low_price,
-        close_price, volume, adj_close_price=None
+        close_price, volume, adj_close_price=None,
+        columns=None
     ):
         """
         Initialises the BarEvent.
@@ -34,6 +36,8 @@ class BarEvent(Event):
         volume - The volume of trading within the bar
         adj_close_price - The vendor adjusted closing price
             (e.g. back-adjustment) of the bar
+        columns - Dict of the precomputed indicator columns of the
+            bar, see HistoricCSVDataHandler.add_columns, or None.
 
         Note: It is not advised to use 'open', 'close' instead
         of 'open_price', 'close_price' as 'open' is a reserved
@@ -49,22 +53,36 @@ class BarEvent(Event):
         self.close_price = close_price
         self.volume = volume
         self.adj_close_price = adj_close_price
+        self.columns = columns
 
         
 class SignalEvent(Event):
-    def __init__(self, symbol, timestamp, action, suggested_quantity=None, order_type='MKT'):
+    def __init__(
+        self, symbol, timestamp, action, suggested_quantity=None,
+        order_type='MKT', account=None, strategy_id=None,
+        price=None, time_in_force='GTC', expiry=None
+    ):
         """
         Initialises the SignalEvent.
 
         Parameters:
         symbol - The ticker symbol, e.g. 'GOOG'.
         timestamp - The timestamp at which the signal was generated.
-        order_type - 'MKT' or 'LMT' for Market or Limit.
+        order_type - 'MKT', 'LMT' or 'STP' for Market, Limit or Stop.
         action - 'BUY' or 'SELL'.
         suggested_quantity - Optional positively valued integer
             representing a suggested absolute quantity of units
             of an asset to transact in, which is used by the
             PositionSizer and RiskManager.
+        account - The name of the sub-account the signal is for,
+            None for the default account of the PortfolioHandler.
+        strategy_id - The id of the strategy emitting the signal,
+            which is carried through to the orders and fills.
+        price - The limit or stop price of a 'LMT' or 'STP' order.
+        time_in_force - 'GTC' (good till cancelled) or 'DAY'
+            (cancelled at the end of the day it is placed).
+        expiry - Optional timestamp after which a pending order
+            is cancelled.
         """
         
         self.type = EventType.SIGNAL
@@ -73,10 +91,22 @@ class SignalEvent(Event):
         self.action = action
         self.suggested_quantity = suggested_quantity
         self.order_type = order_type
+        self.account = account
+        self.strategy_id = strategy_id
+        self.price = price
+        self.time_in_force = time_in_force
+        self.expiry = expiry
 
        
 class OrderEvent(Event):
-    def __init__(self, symbol, order_type, quantity, action):
+    # Source of the unique order ids
+    _order_ids = itertools.count(1)
+
+    def __init__(
+        self, symbol, order_type, quantity, action,
+        account=None, strategy_id=None,
+        price=None, time_in_force='GTC', expiry=None
+    ):
         """
         Initialises the order type, setting whether it is
         a Market order ('MKT') or Limit order ('LMT'), has
@@ -85,25 +115,38 @@ class OrderEvent(Event):
 
         Parameters:
         symbol - The instrument to trade.
-        order_type - 'MKT' or 'LMT' for Market or Limit.
+        order_type - 'MKT', 'LMT' or 'STP' for Market, Limit or Stop.
         quantity - Non-negative integer for quantity.
         action - 'BUY' or 'SELL' for long or short.
+        account - The sub-account placing the order.
+        strategy_id - The strategy the order originates from.
+        price - The limit or stop price of a 'LMT' or 'STP' order.
+        time_in_force - 'GTC' or 'DAY', see SignalEvent.
+        expiry - Optional timestamp after which a pending order
+            is cancelled.
         """
         self.type = EventType.ORDER
+        self.order_id = next(OrderEvent._order_ids)
         self.symbol = symbol
         self.order_type = order_type
         self.quantity = quantity
         self.action = action
+        self.account = account
+        self.strategy_id = strategy_id
+        self.price = price
+        self.time_in_force = time_in_force
+        self.expiry = expiry
     
     def print_order(self):
-        print("Order: Symbol=%s, Type=%s, Quantity=%s, Action=%s" % 
-         (self.symbol, self.order_type, self.quantity, self.action))
+        print("Order: Symbol=%s, Type=%s, Quantity=%s, Action=%s, Price=%s" % 
+         (self.symbol, self.order_type, self.quantity, self.action, self.price))
 
     
 class FillEvent(Event):
     def __init__(
         self, timestamp, symbol, action,
-        quantity, price, commission, exchange):
+        quantity, price, commission, exchange,
+        account=None, strategy_id=None, order_id=None):
         """
         Parameters:
         timestamp - The bar-resolution when the order was filled.
@@ -113,6 +156,10 @@ class FillEvent(Event):
         action - The action of fill ('BUY' or 'SELL')
         price - The holdings value in dollars.
         commission - An optional commission.
+        account - The sub-account the fill belongs to.
+        strategy_id - The strategy the filled order originates from.
+        order_id - The id of the filled OrderEvent. An order may be
+            filled by several (partial) fills.
         """
         self.type = EventType.FILL
         self.timestamp = timestamp
@@ -122,5 +169,8 @@ class FillEvent(Event):
         self.action = action
         self.price = price
         self.commission = commission
+        self.account = account
+        self.strategy_id = strategy_id
+        self.order_id = order_id
     
     
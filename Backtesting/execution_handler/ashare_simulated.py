@@ -2,7 +2,11 @@ import datetime
 import os
 import csv
 
+import numpy as np
+
 from .base import AbstractExecutionHandler
+from .order_book import PendingOrderBook
+from .cost_model import ScheduledCostModel, AbstractSlippageModel, FixedSlippage
 from ..event import (FillEvent, EventType)
 
 
@@ -10,15 +14,44 @@ class AShareSimulatedExecutionHandler(AbstractExecutionHandler):
 
     def __init__(
         self, events_queue, data_handler, portfolio_handler,
-        output_dir, slippage=0.01, record=True
+        output_dir, slippage=0.01, record=True,
+        fill_model=None, cost_model=None
         ):
-        
+        """
+        Parameters:
+        events_queue - The Event Queue.
+        data_handler - The DataHandler providing the last bars.
+        portfolio_handler - The PortfolioHandler holding the cash
+            and positions checked before a fill.
+        output_dir - The directory of the trade log.
+        slippage - Price slippage applied to market and stop fills,
+            either an amount or an AbstractSlippageModel.
+        record - Whether to write the trade log.
+        fill_model - Optional VolumeParticipationFillModel, which
+            caps fills at a fraction of the bar volume and carries
+            the remainder of market orders to the following bars
+            until it is filled, cancelled or expires.
+        cost_model - The AbstractCostModel of the commission and
+            taxes, by default 0.08% (minimum 5) plus 0.1% stamp
+            tax on sells.
+        """
         self.events_queue = events_queue
         self.data_handler = data_handler
         self.portfolio_handler = portfolio_handler
         self.output_dir = output_dir
-        self.slippage = slippage
+        if not isinstance(slippage, AbstractSlippageModel):
+            slippage = FixedSlippage(slippage)
+        self.slippage_model = slippage
+        self.cost_model = ScheduledCostModel() if cost_model is None else cost_model
         self.record = record
+        self.order_book = PendingOrderBook()
+        self.fill_model = fill_model
+        # The fills placed on the queue which the portfolio has not
+        # applied yet, and their effect on each portfolio:
+        # {portfolio: [cash, {symbol: quantity sold}, number of fills]}
+        self._unapplied_fills = {}
+        self._unapplied = {}
+        portfolio_handler.add_fill_listener(self.on_fill)
         if self.record == True:
             now = datetime.datetime.utcnow().date()
             self.csv_filename = "tradelog_" + now.strftime("%Y-%m-%d") + ".csv"
@@ -33,28 +66,101 @@ class AShareSimulatedExecutionHandler(AbstractExecutionHandler):
                 "Timestamp", "Symbol",
                 "Action", "Quantity",
                 "Exchange", "Price",
-                "Commission"
+                "Commission", "Account"
             ]
             with open(fname, 'a', newline='') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
 
-    def calculate_ib_commission(self, quantity, fill_price, action):
+    def calculate_ib_commission(
+        self, quantity, fill_price, action, symbol=None, timestamp=None
+    ):
         """
-        Calculate the commission for a transaction. 
-        commission = 0.0008
-        tax ratio = 0.001 for SELL
+        Calculate the commission for a transaction with the cost
+        model.
+
+        The arguments may also be arrays, so that the single order
+        and the batch paths share the same computation.
         """
-        commission = max(
-            0.0008 * fill_price * quantity, 5
+        return self.cost_model.calculate(
+            quantity, fill_price, action, symbol, timestamp
         )
-        if action == "SELL":
-            commission += 0.001 * fill_price * quantity
-        return round(commission, 2)
+
+    def _cash(self, portfolio):
+        """
+        The cash of a portfolio once the fills on the queue are
+        applied.
+        """
+        unapplied = self._unapplied.get(portfolio)
+        if unapplied is None:
+            return portfolio.cur_cash
+        return portfolio.cur_cash + unapplied[0]
+
+    def _available(self, portfolio, symbol):
+        """
+        The available quantity of a symbol once the fills on the
+        queue are applied.
+        """
+        position = portfolio.positions.get(symbol)
+        if position is None:
+            return 0
+        unapplied = self._unapplied.get(portfolio)
+        if unapplied is None:
+            return position.available_quantity
+        return position.available_quantity - unapplied[1].get(symbol, 0)
+
+    def _put_fills(self, fills):
+        """
+        Place FillEvents on the events queue, holding their cash and
+        quantity until the portfolio applies them (see on_fill), so
+        that the orders matched meanwhile see them.
+        """
+        for fill_event in fills:
+            portfolio = self.portfolio_handler.get_portfolio(fill_event.account)
+            unapplied = self._unapplied.setdefault(portfolio, [0.0, {}, 0])
+            unapplied[2] += 1
+            value = fill_event.quantity * fill_event.price
+            if fill_event.action == "SELL":
+                unapplied[0] += value - fill_event.commission
+                sold = unapplied[1]
+                sold[fill_event.symbol] = sold.get(fill_event.symbol, 0) + fill_event.quantity
+            else:
+                unapplied[0] -= value + fill_event.commission
+            self._unapplied_fills[id(fill_event)] = (portfolio, fill_event)
+            self.events_queue.put(fill_event)
+
+    def on_fill(self, event):
+        """
+        Called by the PortfolioHandler once it has applied a
+        FillEvent, which releases what was held for it.
+        """
+        entry = self._unapplied_fills.pop(id(event), None)
+        if entry is None:
+            return
+        portfolio, fill_event = entry
+        unapplied = self._unapplied[portfolio]
+        unapplied[2] -= 1
+        if unapplied[2] == 0:
+            del self._unapplied[portfolio]
+            return
+        value = fill_event.quantity * fill_event.price
+        if fill_event.action == "SELL":
+            unapplied[0] -= value - fill_event.commission
+            sold = unapplied[1]
+            sold[fill_event.symbol] -= fill_event.quantity
+        else:
+            unapplied[0] += value + fill_event.commission
 
     def execute_order(self, event):
         """
-        default slippage = 0.01
+        Fill a market order at the last close plus slippage.
+
+        Limit ('LMT') and stop ('STP') orders are not filled but
+        rest in the order book until a bar triggers them.
+
+        The cash and available quantity checked include the fills
+        of the previous orders which are still on the queue, so
+        a buy can spend the proceeds of the sells before it.
 
         Parameters:
         event - An Event object with order information.
@@ -62,20 +168,31 @@ class AShareSimulatedExecutionHandler(AbstractExecutionHandler):
         if event.type == EventType.ORDER:
             # Obtain values from the OrderEvent
             timestamp = self.data_handler.get_last_timestamp(event.symbol)
+            if event.order_type in ("LMT", "STP"):
+                self.order_book.add(event, timestamp)
+                return
+            if self.fill_model is not None:
+                self.execute_orders([event])
+                return
+            messages = []
+            if not self._can_trade(event, messages):
+                print(messages[0])
+                self._cancel([event])
+                return
             symbol = event.symbol
             action = event.action
-            try:
-                cur_quantity = self.portfolio_handler.portfolio.positions[symbol].available_quantity
-            except :
-                cur_quantity = 0
-            cur_cash = self.portfolio_handler.portfolio.cur_cash
+            portfolio = self.portfolio_handler.get_portfolio(event.account)
+            cur_quantity = self._available(portfolio, symbol)
+            cur_cash = self._cash(portfolio)
             
             if action == 'SELL' and cur_quantity == 0:
                 print(str(timestamp) + ": A share can't short!The order will be cancelled!")
+                self._cancel([event])
                 return
             
             if action == 'SELL' and event.quantity > cur_quantity:
                 quantity = cur_quantity
+                self._cancel([event])
                 print(str(timestamp) + ": Trading volume(%i) is greater than holding amount(%i)! \
                     Will be traded by holding amount!" 
                       % (event.quantity,cur_quantity))
@@ -85,20 +202,22 @@ class AShareSimulatedExecutionHandler(AbstractExecutionHandler):
 
             # Obtain the fill price
             close_price = self.data_handler.get_last_close(symbol)
-            if action == 'BUY':
-                fill_price = close_price + self.slippage
-            elif action == 'SELL':
-                fill_price = close_price - self.slippage
-            
+            fill_price = self.slippage_model.apply(
+                close_price, action, quantity,
+                self.data_handler.get_last_volume(symbol)
+            )
 
             # Set a dummy exchange and calculate trade commission
             exchange = "CN"
-            commission = self.calculate_ib_commission(quantity, fill_price, action)
+            commission = self.calculate_ib_commission(
+                quantity, fill_price, action, symbol, timestamp
+            )
 
             if action == 'BUY' and quantity * fill_price + commission > cur_cash:
                 print(str(timestamp) + ": Current cash is %.2f, the transaction cost is %.2f. \
                     Out of cash, the order will be cancelled!"
                      % (cur_cash, (quantity * fill_price + commission)))
+                self._cancel([event])
                 
             else:
                 # Create the FillEvent and place on the events queue
@@ -106,23 +225,311 @@ class AShareSimulatedExecutionHandler(AbstractExecutionHandler):
                     timestamp, symbol,
                     action, quantity,
                     fill_price, commission,
-                    exchange,
+                    exchange, account=event.account,
+                    strategy_id=event.strategy_id,
+                    order_id=event.order_id
                 )
-                self.events_queue.put(fill_event)
+                self._put_fills([fill_event])
                 
                 if self.record == True:
                     self.record_trade(fill_event)
 
                 
+    def execute_orders(self, events):
+        """
+        Execute all of the OrderEvents of one timestamp at once.
+
+        The orders of each account are matched together with array
+        operations: the sells settle first, each one limited to what
+        is left of the available quantity of its symbol, and their
+        proceeds are added to the cash before the buys are checked
+        against it. The FillEvents (sells, then buys) are placed on
+        the events queue and recorded with a single file write.
+
+        Limit and stop orders are placed in the order book. Market
+        orders for suspended symbols, buys at limit-up and sells at
+        limit-down are cancelled. With a fill model only the part of
+        each market order which fits in the volume of the bar is
+        filled, the rest is carried.
+
+        Parameters:
+        events - A list of OrderEvent objects.
+        """
+        orders = []
+        messages = []
+        for event in events:
+            if event.type == EventType.ORDER:
+                if event.order_type in ("LMT", "STP"):
+                    self.order_book.add(
+                        event, self.data_handler.get_last_timestamp(event.symbol)
+                    )
+                elif self._can_trade(event, messages):
+                    orders.append(event)
+                else:
+                    self._cancel([event])
+        if messages:
+            print("\n".join(messages))
+        if not orders:
+            return
+        quantities = None
+        if self.fill_model is not None:
+            quantities = [
+                self.fill_model.allocate(
+                    order, self.data_handler.get_last_timestamp(order.symbol),
+                    self.data_handler.get_last_volume(order.symbol)
+                )
+                for order in orders
+            ]
+        self._execute(orders, quantities=quantities)
+
+    def on_bar(self, event):
+        """
+        Fill the carried remainders of market orders which fit in
+        the volume of the bar, then cancel the pending orders which
+        have expired and fill the ones triggered by the bar, limit
+        orders at their price and stop orders at their price plus
+        slippage. With a fill model the part of a triggered order
+        which does not fit in the bar goes back to the order book.
+        Orders which can't trade at the price limit of the bar stay
+        pending.
+
+        Parameters:
+        event - The BarEvent.
+        """
+        if self.data_handler.is_suspended(event.symbol):
+            return
+        limit_state = self.data_handler.get_limit_state(event.symbol)
+        blocked = {1: "BUY", -1: "SELL"}.get(limit_state)
+        if self.fill_model is not None:
+            self._cancel(self.fill_model.expire(event.symbol, event.timestamp))
+            carried = self.fill_model.on_bar(event, blocked)
+            if carried:
+                self._execute(
+                    [order for order, quantity in carried],
+                    quantities=[quantity for order, quantity in carried]
+                )
+
+        if len(self.order_book) == 0:
+            return
+        self._cancel(self.order_book.expire(event.timestamp))
+        triggered = self.order_book.match(event)
+        if not triggered:
+            return
+        orders = []
+        prices = []
+        quantities = []
+        for order, price in triggered:
+            if order.action == blocked:
+                self.order_book.add(order, event.timestamp)
+                continue
+            if order.order_type == "STP":
+                price = self.slippage_model.apply(
+                    price, order.action, order.quantity, event.volume
+                )
+            quantity = order.quantity
+            if self.fill_model is not None:
+                quantity = self.fill_model.allocate(
+                    order, event.timestamp, event.volume, carry=False
+                )
+                if quantity < order.quantity:
+                    order.quantity -= quantity
+                    self.order_book.add(order, event.timestamp)
+                if quantity == 0:
+                    continue
+            orders.append(order)
+            prices.append(price)
+            quantities.append(quantity)
+        if orders:
+            self._execute(orders, prices, quantities)
+
+    def cancel_order(self, order_id):
+        """
+        Cancel a pending limit or stop order by its order_id.
+        Returns the cancelled OrderEvent, or None.
+        """
+        order = self.order_book.cancel(order_id)
+        if order is not None:
+            self._cancel([order])
+        return order
+
+    def cancel_orders(self, symbol=None, account=None, strategy_id=None):
+        """
+        Cancel the pending orders, and the carried remainders of
+        market orders, matching all of the given filters.
+        """
+        cancelled = self.order_book.cancel_all(symbol, account, strategy_id)
+        if self.fill_model is not None:
+            cancelled += self.fill_model.cancel(symbol, account, strategy_id)
+        self._cancel(cancelled)
+        return cancelled
+
+    def _cancel(self, orders):
+        """
+        Tell the portfolio handler about orders which will not be
+        filled any further, so that the risk manager releases what
+        it reserved for them.
+        """
+        for order in orders:
+            self.portfolio_handler.on_cancel(order)
+
+    def _can_trade(self, order, messages):
+        """
+        Check an order against the suspension and price limit masks
+        of the data handler, adding a message when it is cancelled.
+        """
+        if self.data_handler.can_trade(order.symbol, order.action):
+            return True
+        timestamp = self.data_handler.get_last_timestamp(order.symbol)
+        if self.data_handler.is_suspended(order.symbol):
+            reason = "%s is suspended" % order.symbol
+        elif order.action == "BUY":
+            reason = "%s is at limit-up" % order.symbol
+        else:
+            reason = "%s is at limit-down" % order.symbol
+        messages.append(
+            str(timestamp) + ": " + reason + ", the order will be cancelled!"
+        )
+        return False
+
+    def _execute(self, orders, prices=None, quantities=None):
+        """
+        Match a list of orders, optionally at given fill prices and
+        for given quantities, and place the resulting FillEvents on
+        the events queue.
+        """
+        if prices is None:
+            prices = [None] * len(orders)
+        if quantities is None:
+            quantities = [order.quantity for order in orders]
+        by_account = {}
+        for order, price, quantity in zip(orders, prices, quantities):
+            if quantity <= 0:
+                continue
+            account_orders = by_account.setdefault(order.account, ([], [], []))
+            account_orders[0].append(order)
+            account_orders[1].append(price)
+            account_orders[2].append(quantity)
+
+        fills = []
+        messages = []
+        for account, account_orders in by_account.items():
+            fills += self._match_orders(account, messages, *account_orders)
+
+        if messages:
+            print("\n".join(messages))
+        self._put_fills(fills)
+        if self.record == True and fills:
+            self.record_trades(fills)
+
+    def _match_orders(self, account, messages, orders, prices, quantities):
+        """
+        Match the orders of one account and return their FillEvents.
+        Orders with a price of None fill at the last close with the
+        slippage of the slippage model.
+        """
+        portfolio = self.portfolio_handler.get_portfolio(account)
+        symbols = [order.symbol for order in orders]
+        actions = np.array([order.action for order in orders])
+        is_sell = actions == "SELL"
+        quantity = np.array(quantities, dtype=np.int64)
+        close_price = np.array(
+            [self.data_handler.get_last_close(symbol) for symbol in symbols],
+            dtype=np.float64
+        )
+        volume = np.array(
+            [self.data_handler.get_last_volume(symbol) for symbol in symbols],
+            dtype=np.float64
+        )
+        fill_price = np.asarray(
+            self.slippage_model.apply(close_price, actions, quantity, volume),
+            dtype=np.float64
+        )
+        given = np.array([price is not None for price in prices])
+        if given.any():
+            fill_price[given] = [price for price in prices if price is not None]
+        timestamps = [self.data_handler.get_last_timestamp(symbol) for symbol in symbols]
+
+        # Sells: the orders of a symbol share its available quantity,
+        # consumed in order of arrival
+        sell_idx = np.flatnonzero(is_sell)
+        if len(sell_idx) > 0:
+            codes = {}
+            code = np.array([codes.setdefault(symbols[i], len(codes)) for i in sell_idx])
+            available = np.zeros(len(codes), dtype=np.int64)
+            for symbol, c in codes.items():
+                available[c] = self._available(portfolio, symbol)
+            order = np.argsort(code, kind="stable")
+            requested = quantity[sell_idx][order]
+            code = code[order]
+            before = np.cumsum(requested) - requested
+            first = np.r_[True, code[1:] != code[:-1]]
+            before -= np.maximum.accumulate(np.where(first, before, 0))
+            left = np.maximum(available[code] - before, 0)
+            filled = np.minimum(requested, left)
+            for i in np.flatnonzero(filled < requested):
+                j = sell_idx[order[i]]
+                self._cancel([orders[j]])
+                if filled[i] == 0:
+                    messages.append(
+                        str(timestamps[j]) + ": A share can't short!The order will be cancelled!"
+                    )
+                else:
+                    messages.append(
+                        str(timestamps[j]) + ": Trading volume(%i) is greater than holding amount(%i)! "
+                        "Will be traded by holding amount!" % (requested[i], filled[i])
+                    )
+            quantity[sell_idx[order]] = filled
+
+        commission = self.calculate_ib_commission(
+            quantity, fill_price, actions, symbols, timestamps
+        )
+        value = quantity * fill_price
+        cash = self._cash(portfolio) + np.sum((value - commission)[is_sell & (quantity > 0)])
+
+        # Buys: accepted in order while the cash covers their cost
+        buy_idx = np.flatnonzero(~is_sell)
+        accepted = np.ones(len(buy_idx), dtype=bool)
+        cost = value[buy_idx] + commission[buy_idx]
+        if cost.sum() > cash:
+            for i, j in enumerate(buy_idx):
+                if cost[i] > cash:
+                    accepted[i] = False
+                    self._cancel([orders[j]])
+                    messages.append(
+                        str(timestamps[j]) + ": Current cash is %.2f, the transaction cost is %.2f. "
+                        "Out of cash, the order will be cancelled!" % (cash, cost[i])
+                    )
+                else:
+                    cash -= cost[i]
+
+        exchange = "CN"
+        filled_idx = np.concatenate((
+            sell_idx[quantity[sell_idx] > 0], buy_idx[accepted]
+        ))
+        return [
+            FillEvent(
+                timestamps[j], symbols[j],
+                orders[j].action, int(quantity[j]),
+                fill_price[j], commission[j],
+                exchange, account=account,
+                strategy_id=orders[j].strategy_id,
+                order_id=orders[j].order_id
+            )
+            for j in filled_idx
+        ]
+
     def record_trade(self, fill_event):
+        self.record_trades([fill_event])
+
+    def record_trades(self, fill_events):
 
         fname = os.path.expanduser(os.path.join(self.output_dir, self.csv_filename))
 
         with open(fname, 'a', newline='') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow([
+            writer.writerows([
                 fill_event.timestamp, fill_event.symbol,
                 fill_event.action, fill_event.quantity,
                 fill_event.exchange, fill_event.price,
-                fill_event.commission
-            ])
+                fill_event.commission, fill_event.account
+            ] for fill_event in fill_events)
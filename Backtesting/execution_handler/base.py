@@ -25,3 +25,23 @@ class AbstractExecutionHandler(ABC):
         event - Contains an Event object with order information.
         """
         raise NotImplementedError("Should implement execute_order()")
+
+    def execute_orders(self, events):
+        """
+        Takes all of the OrderEvents of one timestamp. Handlers
+        which can match orders together override this, by default
+        the orders are executed one at a time.
+
+        Parameters:
+        events - A list of OrderEvent objects.
+        """
+        for event in events:
+            self.execute_order(event)
+
+    def on_bar(self, event):
+        """
+        Called with every BarEvent before the strategy sees it, so
+        that handlers holding resting orders can match them against
+        the new bar. Does nothing by default.
+        """
+        pass
@@ -0,0 +1,281 @@
+import re
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+class FeeRule(namedtuple("FeeRule", (
+    "fee", "rate", "minimum", "per_share", "side", "exchange",
+    "start", "end", "min_value", "max_value"
+), defaults=(0.0, 0.0, 0.0, None, None, None, None, 0.0, None))):
+    """
+    One row of a fee schedule. A rule applies to a fill when all of
+    its conditions hold, and then charges
+
+        max(rate * value + per_share * quantity, minimum)
+
+    fee - The name of the fee, e.g. 'commission' or 'stamp_tax'.
+    rate - Fee as a fraction of the traded value.
+    minimum - Minimum fee of a fill.
+    per_share - Fee per share traded.
+    side - 'BUY' or 'SELL', or None for both.
+    exchange - 'SH', 'SZ' or 'BJ', or None for any.
+    start, end - The dates [start, end) the rule is in force, None
+        for an open end.
+    min_value, max_value - The range [min_value, max_value) of the
+        traded value, so that tiered rates and minimums are several
+        rules over adjacent ranges.
+    """
+    __slots__ = ()
+
+
+# The costs previously hard-coded in the execution handler:
+# 0.08% commission with a minimum of 5, and 0.1% stamp tax on sells
+DEFAULT_RULES = (
+    FeeRule("commission", rate=0.0008, minimum=5.0),
+    FeeRule("stamp_tax", rate=0.001, side="SELL"),
+)
+
+
+def china_a_share_rules(commission_rate=0.0003, min_commission=5.0):
+    """
+    Return the fee rules of the A-share market: a broker commission
+    plus the historical stamp tax and transfer fee schedules.
+
+    Parameters:
+    commission_rate - Broker commission as a fraction of the value.
+    min_commission - Minimum broker commission of a fill.
+    """
+    return [
+        FeeRule("commission", rate=commission_rate, minimum=min_commission),
+        # Stamp tax, on both sides until 2008-09-19, sells only since
+        FeeRule("stamp_tax", rate=0.004, end="2001-11-16"),
+        FeeRule("stamp_tax", rate=0.002, start="2001-11-16", end="2005-01-24"),
+        FeeRule("stamp_tax", rate=0.001, start="2005-01-24", end="2007-05-30"),
+        FeeRule("stamp_tax", rate=0.003, start="2007-05-30", end="2008-04-24"),
+        FeeRule("stamp_tax", rate=0.001, start="2008-04-24", end="2008-09-19"),
+        FeeRule("stamp_tax", rate=0.001, side="SELL", start="2008-09-19", end="2023-08-28"),
+        FeeRule("stamp_tax", rate=0.0005, side="SELL", start="2023-08-28"),
+        # Transfer fee, per share on Shanghai only until 2015-08-01
+        FeeRule("transfer_fee", per_share=0.001, minimum=1.0, exchange="SH", end="2015-08-01"),
+        FeeRule("transfer_fee", rate=0.00002, start="2015-08-01", end="2022-04-29"),
+        FeeRule("transfer_fee", rate=0.00001, start="2022-04-29"),
+    ]
+
+
+def symbol_exchange(symbol):
+    """
+    Return the exchange ('SH', 'SZ' or 'BJ') of an A-share symbol,
+    e.g. '000001SZ_D' or '600000.SH', or None for other symbols.
+    """
+    match = re.match(r"(\d{6})\.?(SH|SZ|BJ)?", symbol)
+    if match is None:
+        return None
+    if match.group(2) is not None:
+        return match.group(2)
+    code = match.group(1)
+    if code.startswith(("60", "68", "90")):
+        return "SH"
+    if code.startswith(("00", "30", "20")):
+        return "SZ"
+    if code.startswith(("43", "83", "87", "88", "92")):
+        return "BJ"
+    return None
+
+
+class AbstractCostModel(ABC):
+    """
+    Calculates the transaction costs of fills. The arguments may be
+    scalars or arrays, so that a single fill and a batch of fills
+    share the same computation.
+    """
+    @abstractmethod
+    def calculate(self, quantity, price, action, symbol=None, timestamp=None):
+        raise NotImplementedError("Should implement calculate()")
+
+
+class ScheduledCostModel(AbstractCostModel):
+    """
+    Evaluates a table of FeeRule rows. The rules are held as arrays
+    and matched against all of the fills at once, as a rules x
+    fills mask, so a batch costs a few array operations whatever
+    its size.
+    """
+    def __init__(self, rules=DEFAULT_RULES, decimals=2):
+        """
+        Parameters:
+        rules - The FeeRule rows of the schedule.
+        decimals - The total cost of a fill is rounded to it.
+        """
+        self.rules = list(rules)
+        self.decimals = decimals
+        self.fees = list(dict.fromkeys(rule.fee for rule in self.rules))
+
+        def column(values, dtype=np.float64):
+            return np.array(values, dtype=dtype)[:, np.newaxis]
+
+        rules = self.rules
+        self._fee = column([self.fees.index(r.fee) for r in rules], np.int64)
+        self._rate = column([r.rate for r in rules])
+        self._minimum = column([r.minimum for r in rules])
+        self._per_share = column([r.per_share for r in rules])
+        self._side = column(
+            [{None: 0, "BUY": 1, "SELL": -1}[r.side] for r in rules], np.int64
+        )
+        self._exchanges = sorted({r.exchange for r in rules if r.exchange is not None})
+        self._exchange = column(
+            [-1 if r.exchange is None else self._exchanges.index(r.exchange) for r in rules],
+            np.int64
+        )
+        self._min_value = column([r.min_value for r in rules])
+        self._max_value = column(
+            [np.inf if r.max_value is None else r.max_value for r in rules]
+        )
+        self._dated = any(r.start is not None or r.end is not None for r in rules)
+        self._start = column([
+            np.iinfo(np.int64).min if r.start is None else pd.Timestamp(r.start).value
+            for r in rules
+        ], np.int64)
+        self._end = column([
+            np.iinfo(np.int64).max if r.end is None else pd.Timestamp(r.end).value
+            for r in rules
+        ], np.int64)
+        self._exchange_codes = {}
+
+    def _exchange_code(self, symbol):
+        code = self._exchange_codes.get(symbol)
+        if code is None:
+            exchange = symbol_exchange(symbol)
+            code = self._exchanges.index(exchange) if exchange in self._exchanges else -2
+            self._exchange_codes[symbol] = code
+        return code
+
+    def _fees(self, quantity, price, action, symbol, timestamp):
+        """
+        Return the (rules x fills) array of the fee of each rule.
+        """
+        value = quantity * price
+        is_sell = np.broadcast_to(np.equal(action, "SELL"), quantity.shape)
+
+        mask = (self._min_value <= value) & (value < self._max_value) & (quantity > 0)
+        mask &= (self._side == 0) | np.where(is_sell, self._side == -1, self._side == 1)
+        if self._exchanges:
+            if symbol is None:
+                raise ValueError("The symbol is needed by an exchange specific schedule")
+            if isinstance(symbol, str):
+                codes = np.full(quantity.shape, self._exchange_code(symbol))
+            else:
+                codes = np.array([self._exchange_code(s) for s in symbol])
+            mask &= (self._exchange == -1) | (self._exchange == codes)
+        if self._dated:
+            if timestamp is None:
+                raise ValueError("The timestamp is needed by a dated schedule")
+            times = pd.DatetimeIndex(np.atleast_1d(timestamp)).as_unit("ns").asi8
+            mask &= (self._start <= times) & (times < self._end)
+
+        fees = np.maximum(self._rate * value + self._per_share * quantity, self._minimum)
+        return np.where(mask, fees, 0.0)
+
+    def calculate(self, quantity, price, action, symbol=None, timestamp=None):
+        """
+        Return the total cost of each fill, rounded to decimals.
+
+        Parameters:
+        quantity - The quantities filled.
+        price - The fill prices.
+        action - 'BUY' or 'SELL', or an array of them.
+        symbol - The symbol, or a list of symbols, needed when the
+            schedule has exchange specific rules.
+        timestamp - The fill time, or a list of them, needed when
+            the schedule has dated rules.
+        """
+        scalar = np.ndim(quantity) == 0 and np.ndim(price) == 0
+        quantity = np.atleast_1d(np.asarray(quantity, dtype=np.float64))
+        price = np.atleast_1d(np.asarray(price, dtype=np.float64))
+        quantity, price = np.broadcast_arrays(quantity, price)
+        cost = np.round(
+            self._fees(quantity, price, action, symbol, timestamp).sum(axis=0),
+            self.decimals
+        )
+        return cost[0] if scalar else cost
+
+    def breakdown(self, quantity, price, action, symbol=None, timestamp=None):
+        """
+        Return a dict of fee name to the array of that fee per fill.
+        """
+        quantity = np.atleast_1d(np.asarray(quantity, dtype=np.float64))
+        price = np.atleast_1d(np.asarray(price, dtype=np.float64))
+        quantity, price = np.broadcast_arrays(quantity, price)
+        fees = self._fees(quantity, price, action, symbol, timestamp)
+        totals = np.zeros((len(self.fees), fees.shape[1]))
+        np.add.at(totals, self._fee[:, 0], fees)
+        return dict(zip(self.fees, totals))
+
+
+class AbstractSlippageModel(ABC):
+    """
+    Turns reference prices into fill prices. The arguments may be
+    scalars or arrays.
+    """
+    @abstractmethod
+    def apply(self, price, action, quantity=None, volume=None):
+        raise NotImplementedError("Should implement apply()")
+
+
+class FixedSlippage(AbstractSlippageModel):
+    """
+    Buys fill a fixed amount above the price, sells below it.
+    """
+    def __init__(self, amount=0.01):
+        self.amount = amount
+
+    def apply(self, price, action, quantity=None, volume=None):
+        return np.where(
+            np.equal(action, "SELL"), np.subtract(price, self.amount),
+            np.add(price, self.amount)
+        )[()]
+
+
+class PercentSlippage(AbstractSlippageModel):
+    """
+    Buys fill a fraction above the price, sells below it.
+    """
+    def __init__(self, rate=0.001):
+        self.rate = rate
+
+    def apply(self, price, action, quantity=None, volume=None):
+        direction = np.where(np.equal(action, "SELL"), -1.0, 1.0)
+        return (np.multiply(price, 1.0 + direction * self.rate))[()]
+
+
+class VolumeShareSlippage(AbstractSlippageModel):
+    """
+    The price impact grows with the square of the share of the bar
+    volume taken by the fill:
+
+        fill price = price * (1 +/- price_impact * (quantity / volume) ** 2)
+
+    Fills without a known volume have no impact.
+    """
+    def __init__(self, price_impact=0.1, volume_multiplier=1):
+        """
+        Parameters:
+        price_impact - The impact of a fill taking the whole volume.
+        volume_multiplier - Units of the volume column, e.g. 100
+            for data where volume is counted in lots of 100 shares.
+        """
+        self.price_impact = price_impact
+        self.volume_multiplier = volume_multiplier
+
+    def apply(self, price, action, quantity=None, volume=None):
+        direction = np.where(np.equal(action, "SELL"), -1.0, 1.0)
+        if quantity is None or volume is None:
+            return np.multiply(price, np.ones_like(direction))[()]
+        volume = np.asarray(volume, dtype=np.float64) * self.volume_multiplier
+        share = np.divide(
+            quantity, volume, out=np.zeros(np.broadcast(quantity, volume).shape),
+            where=volume > 0
+        )
+        return (np.multiply(price, 1.0 + direction * self.price_impact * share ** 2))[()]
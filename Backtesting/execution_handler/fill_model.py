@@ -0,0 +1,151 @@
+from collections import deque
+
+from .order_book import order_expiry
+
+
+class VolumeParticipationFillModel(object):
+    """
+    Caps the quantity filled on a bar at a fraction of the bar's
+    volume, and carries the unfilled remainder of market orders
+    over to the following bars of the same symbol.
+
+    The capacity of a bar is shared, in order of arrival, by the
+    remainders carried from earlier bars and then by the orders
+    placed on the bar. Remainders are kept in one FIFO deque per
+    symbol, so a bar only touches the orders of its own symbol.
+
+    A remainder expires like a pending order: at the end of the day
+    the order was placed for 'DAY' orders, after its expiry if it
+    has one, and otherwise ('GTC') it is carried until it is filled
+    or cancelled. Expired remainders are dropped by the next bar of
+    their symbol.
+    """
+    def __init__(self, participation=0.1, lot_size=100, volume_multiplier=1):
+        """
+        Parameters:
+        participation - The fraction of the bar volume which
+            may be filled.
+        lot_size - Fills are whole multiples of the lot size,
+            except for the last odd lot of a sell.
+        volume_multiplier - Units of the volume column, e.g. 100
+            for data where volume is counted in lots of 100 shares.
+        """
+        self.participation = participation
+        self.lot_size = lot_size
+        self.volume_multiplier = volume_multiplier
+        self._capacity = {}
+        self._remainders = {}
+
+    def __len__(self):
+        return sum(len(remainders) for remainders in self._remainders.values())
+
+    def _take(self, symbol, timestamp, volume, quantity):
+        """
+        Take up to quantity out of the capacity of the current bar
+        of a symbol and return the quantity granted.
+        """
+        capacity = self._capacity.get(symbol)
+        if capacity is None or capacity[0] != timestamp:
+            capacity = [timestamp, volume * self.volume_multiplier * self.participation]
+            self._capacity[symbol] = capacity
+        if quantity <= capacity[1]:
+            granted = quantity
+        else:
+            granted = int(capacity[1] // self.lot_size) * self.lot_size
+        capacity[1] -= granted
+        return granted
+
+    def allocate(self, order, timestamp, volume, carry=True):
+        """
+        Return the quantity of an order which can be filled on the
+        current bar. With carry the rest of the order is queued and
+        filled on later bars by on_bar.
+
+        Parameters:
+        order - The OrderEvent.
+        timestamp - The timestamp of the current bar of the symbol.
+        volume - The volume of the current bar of the symbol.
+        carry - Whether to queue the unfilled remainder.
+        """
+        granted = self._take(order.symbol, timestamp, volume, order.quantity)
+        remainder = order.quantity - granted
+        if carry and remainder > 0:
+            self._remainders.setdefault(order.symbol, deque()).append(
+                [order, remainder, order_expiry(order, timestamp)]
+            )
+        return granted
+
+    def expire(self, symbol, timestamp):
+        """
+        Drop the queued remainders of a symbol whose expiry is
+        before timestamp and return their orders.
+        """
+        remainders = self._remainders.get(symbol)
+        if not remainders:
+            return []
+        expired = [
+            entry[0] for entry in remainders
+            if entry[2] is not None and entry[2] < timestamp
+        ]
+        if expired:
+            self._remainders[symbol] = deque(
+                entry for entry in remainders
+                if entry[2] is None or entry[2] >= timestamp
+            )
+        return expired
+
+    def on_bar(self, bar, blocked=None):
+        """
+        Allocate the capacity of a new bar to the queued remainders
+        of its symbol, after dropping the expired ones. Returns a
+        list of (order, quantity) to fill.
+
+        Parameters:
+        bar - The BarEvent.
+        blocked - An action ('BUY' or 'SELL') which can't trade on
+            the bar, e.g. buys at limit-up. Its remainders stay
+            queued without taking any of the capacity.
+        """
+        self.expire(bar.symbol, bar.timestamp)
+        remainders = self._remainders.get(bar.symbol)
+        if not remainders:
+            return []
+        fills = []
+        held = []
+        while remainders:
+            entry = remainders[0]
+            if entry[0].action == blocked:
+                held.append(remainders.popleft())
+                continue
+            granted = self._take(bar.symbol, bar.timestamp, bar.volume, entry[1])
+            if granted > 0:
+                fills.append((entry[0], granted))
+            entry[1] -= granted
+            if entry[1] > 0:
+                break
+            remainders.popleft()
+        # Put the blocked remainders back in front, in their order
+        remainders.extendleft(reversed(held))
+        return fills
+
+    def cancel(self, symbol=None, account=None, strategy_id=None):
+        """
+        Drop the queued remainders matching all of the given filters
+        and return their orders.
+        """
+        cancelled = []
+        symbols = list(self._remainders) if symbol is None else [symbol]
+        for s in symbols:
+            remainders = self._remainders.get(s)
+            if not remainders:
+                continue
+            kept = deque()
+            for entry in remainders:
+                order = entry[0]
+                if (account is None or order.account == account) and \
+                        (strategy_id is None or order.strategy_id == strategy_id):
+                    cancelled.append(order)
+                else:
+                    kept.append(entry)
+            self._remainders[s] = kept
+        return cancelled
@@ -0,0 +1,226 @@
+import datetime
+import heapq
+import itertools
+
+
+def order_expiry(order, timestamp):
+    """
+    Return the time after which an order placed at timestamp is
+    cancelled: its expiry, capped at the end of the day for 'DAY'
+    orders, or None if it never expires.
+    """
+    expiry = order.expiry
+    if order.time_in_force == "DAY":
+        end_of_day = datetime.datetime.combine(timestamp.date(), datetime.time.max)
+        expiry = end_of_day if expiry is None else min(expiry, end_of_day)
+    return expiry
+
+
+class PendingOrderBook(object):
+    """
+    Holds the resting limit ('LMT') and stop ('STP') orders until
+    a bar trades through their price.
+
+    Each symbol has four heaps, one per (order type, action), keyed
+    by the trigger price so that the order closest to triggering is
+    always on top:
+
+    buy limit - triggers when low <= price, highest price first
+    sell limit - triggers when high >= price, lowest price first
+    buy stop - triggers when high >= price, lowest price first
+    sell stop - triggers when low <= price, highest price first
+
+    A bar therefore only looks at the tops of the heaps of its
+    symbol and pops the orders whose trigger lies within
+    [low, high], instead of scanning every pending order.
+    Cancelled and expired orders are removed from the live set and
+    discarded lazily when they reach the top of a heap. Once the
+    dead entries outnumber the live orders (and COMPACT_MIN) the
+    heaps are rebuilt without them. An order added back, e.g. the
+    remainder of a partial fill, keeps its queued expiry.
+    """
+    BUY_LIMIT, SELL_LIMIT, BUY_STOP, SELL_STOP = range(4)
+
+    # The number of dead entries below which the heaps are not compacted
+    COMPACT_MIN = 1024
+
+    def __init__(self):
+        self._books = {}
+        self._orders = {}
+        self._expiries = []
+        # The expiry queued for each order id
+        self._expiry = {}
+        # The number of entries in the price heaps, live or dead
+        self._entries = 0
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def _side(self, order):
+        if order.order_type == "LMT":
+            return self.BUY_LIMIT if order.action == "BUY" else self.SELL_LIMIT
+        elif order.order_type == "STP":
+            return self.BUY_STOP if order.action == "BUY" else self.SELL_STOP
+        raise ValueError("Unsupported order_type '%s'" % order.order_type)
+
+    def add(self, order, timestamp):
+        """
+        Add a limit or stop OrderEvent to the book.
+
+        Parameters:
+        order - The OrderEvent, with its trigger price in price.
+        timestamp - The time the order is placed, which sets the
+            end of its day for 'DAY' orders.
+        """
+        if order.price is None:
+            raise ValueError("A %s order needs a price" % order.order_type)
+        side = self._side(order)
+        book = self._books.get(order.symbol)
+        if book is None:
+            book = ([], [], [], [])
+            self._books[order.symbol] = book
+        # Max-heaps are stored with the price negated
+        if side == self.BUY_LIMIT or side == self.SELL_STOP:
+            key = -order.price
+        else:
+            key = order.price
+        heapq.heappush(book[side], (key, next(self._seq), order))
+        self._entries += 1
+        self._orders[order.order_id] = order
+
+        if order.order_id in self._expiry:
+            return
+        expiry = order_expiry(order, timestamp)
+        if expiry is not None:
+            self._expiry[order.order_id] = expiry
+            heapq.heappush(self._expiries, (expiry, next(self._seq), order.order_id))
+
+    def cancel(self, order_id):
+        """
+        Cancel a pending order. Returns the order, or None if it
+        was not pending.
+        """
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            self._compact_if_needed()
+        return order
+
+    def cancel_all(self, symbol=None, account=None, strategy_id=None):
+        """
+        Cancel every pending order matching all of the given
+        filters and return them.
+        """
+        cancelled = [
+            order for order in self._orders.values()
+            if (symbol is None or order.symbol == symbol)
+            and (account is None or order.account == account)
+            and (strategy_id is None or order.strategy_id == strategy_id)
+        ]
+        for order in cancelled:
+            del self._orders[order.order_id]
+        if cancelled:
+            self._compact_if_needed()
+        return cancelled
+
+    def pending_orders(self, symbol=None):
+        return [
+            order for order in self._orders.values()
+            if symbol is None or order.symbol == symbol
+        ]
+
+    def expire(self, timestamp):
+        """
+        Remove the orders whose expiry is before timestamp and
+        return them.
+        """
+        expired = []
+        expiries = self._expiries
+        while expiries and expiries[0][0] < timestamp:
+            order_id = heapq.heappop(expiries)[2]
+            self._expiry.pop(order_id, None)
+            order = self._orders.pop(order_id, None)
+            if order is not None:
+                expired.append(order)
+        if expired:
+            self._compact_if_needed()
+        return expired
+
+    def _compact_if_needed(self):
+        dead = self._entries - len(self._orders)
+        if dead > self.COMPACT_MIN and dead > len(self._orders):
+            self.compact()
+
+    def compact(self):
+        """
+        Rebuild the heaps without the entries of the orders which
+        are no longer pending.
+        """
+        orders = self._orders
+        entries = 0
+        for symbol, book in list(self._books.items()):
+            for heap in book:
+                heap[:] = [entry for entry in heap if entry[2].order_id in orders]
+                heapq.heapify(heap)
+                entries += len(heap)
+            if not any(book):
+                del self._books[symbol]
+        self._entries = entries
+        self._expiries = [entry for entry in self._expiries if entry[2] in orders]
+        heapq.heapify(self._expiries)
+        self._expiry = {
+            order_id: expiry for order_id, expiry in self._expiry.items()
+            if order_id in orders
+        }
+
+    def match(self, bar):
+        """
+        Pop the orders of the bar's symbol which are triggered by
+        the bar and return a list of (order, fill_price). Limit
+        orders fill at their price, or at the open when the bar
+        opens through it; stop orders fill at their price, or at
+        the open when the bar gaps through it.
+        """
+        book = self._books.get(bar.symbol)
+        if book is None:
+            return []
+        triggered = []
+        low = bar.low_price
+        high = bar.high_price
+        open_price = bar.open_price
+        orders = self._orders
+        entries = self._entries
+
+        heap = book[self.BUY_LIMIT]
+        while heap and (heap[0][2].order_id not in orders or -heap[0][0] >= low):
+            order = heapq.heappop(heap)[2]
+            entries -= 1
+            if orders.pop(order.order_id, None) is not None:
+                triggered.append((order, min(order.price, open_price)))
+
+        heap = book[self.SELL_LIMIT]
+        while heap and (heap[0][2].order_id not in orders or heap[0][0] <= high):
+            order = heapq.heappop(heap)[2]
+            entries -= 1
+            if orders.pop(order.order_id, None) is not None:
+                triggered.append((order, max(order.price, open_price)))
+
+        heap = book[self.BUY_STOP]
+        while heap and (heap[0][2].order_id not in orders or heap[0][0] <= high):
+            order = heapq.heappop(heap)[2]
+            entries -= 1
+            if orders.pop(order.order_id, None) is not None:
+                triggered.append((order, max(order.price, open_price)))
+
+        heap = book[self.SELL_STOP]
+        while heap and (heap[0][2].order_id not in orders or -heap[0][0] >= low):
+            order = heapq.heappop(heap)[2]
+            entries -= 1
+            if orders.pop(order.order_id, None) is not None:
+                triggered.append((order, min(order.price, open_price)))
+
+        self._entries = entries
+        return triggered
@@ -0,0 +1,110 @@
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+
+# BarEvent attribute of each price field
+FIELDS = {
+    "open": "open_price",
+    "high": "high_price",
+    "low": "low_price",
+    "close": "close_price",
+    "adj_close": "adj_close_price",
+    "volume": "volume",
+}
+
+
+# DataFrame column of each price field, as parsed by the data handler
+FRAME_COLUMNS = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "adj_close": "Adj Close",
+    "volume": "Volume",
+}
+
+
+def bar_field(field):
+    """
+    Return the BarEvent attribute name of a price field, e.g.
+    'close' for close_price.
+    """
+    try:
+        return FIELDS[field]
+    except KeyError:
+        raise ValueError(
+            "Unknown field '%s', must be one of %s" % (field, ", ".join(FIELDS))
+        )
+
+
+def frame_column(frame, field):
+    """
+    Return the column of a price field of a symbol DataFrame as
+    floats.
+    """
+    bar_field(field)
+    return frame[FRAME_COLUMNS[field]].astype(np.float64)
+
+
+def wilder_average(x, window):
+    """
+    Wilder's smoothing of a Series: NaN for the first window - 1
+    values, the mean of the first window values, then smoothed by
+    1 / window, as the indicators do bar by bar.
+    """
+    out = pd.Series(np.nan, index=x.index)
+    if len(x) < window:
+        return out
+    seeded = x.iloc[window - 1:].copy()
+    seeded.iloc[0] = x.iloc[:window].mean()
+    out.iloc[window - 1:] = seeded.ewm(alpha=1.0 / window, adjust=False).mean().values
+    return out
+
+
+class AbstractIndicator(ABC):
+    """
+    AbstractIndicator is the base class of the indicators, which are
+    updated from the BarEvents of one symbol in O(1) per bar from
+    running state, instead of being recomputed from the history.
+
+    update is idempotent for a bar: a second call with the same
+    timestamp is ignored, so an indicator shared by several
+    strategies, see IndicatorRegistry, is computed once per bar.
+    value is NaN until the indicator has seen enough bars (ready).
+
+    compute returns the same values for a whole symbol DataFrame at
+    once, for the indicator columns precomputed by the data handler.
+    """
+    def __init__(self):
+        self.timestamp = None
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, bar):
+        """
+        Update the indicator with a BarEvent and return its value.
+        """
+        if bar.timestamp == self.timestamp:
+            return self.value
+        self.timestamp = bar.timestamp
+        self.count += 1
+        self._update(bar)
+        return self.value
+
+    @abstractmethod
+    def _update(self, bar):
+        raise NotImplementedError("Should implement _update()")
+
+    def compute(self, frame):
+        """
+        Return the values of the indicator over a symbol DataFrame
+        (columns Open, High, Low, Close, Volume) as a Series.
+        """
+        raise NotImplementedError("Should implement compute()")
+
+    @property
+    def ready(self):
+        return not math.isnan(self.value)
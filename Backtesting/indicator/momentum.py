@@ -0,0 +1,60 @@
+import numpy as np
+
+from .base import AbstractIndicator, bar_field, frame_column, wilder_average
+
+
+class RSI(AbstractIndicator):
+    """
+    Relative strength index of a price field with Wilder's
+    smoothing: the average gain and loss start as the means of the
+    first window changes and are then smoothed by 1 / window.
+    """
+    def __init__(self, window=14, field="close"):
+        """
+        Parameters:
+        window - The number of changes of the averages.
+        field - The price field.
+        """
+        super().__init__()
+        self.window = window
+        self.field = field
+        self._attr = bar_field(field)
+        self._last = None
+        self._changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _update(self, bar):
+        x = getattr(bar, self._attr)
+        last = self._last
+        self._last = x
+        if last is None:
+            return
+        change = x - last
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self._changes += 1
+        n = self.window
+        if self._changes <= n:
+            # Simple mean of the first window changes
+            self.avg_gain += (gain - self.avg_gain) / self._changes
+            self.avg_loss += (loss - self.avg_loss) / self._changes
+            if self._changes < n:
+                return
+        else:
+            self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+            self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+        if self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else 50.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def compute(self, frame):
+        change = frame_column(frame, self.field).diff().iloc[1:]
+        avg_gain = wilder_average(change.clip(lower=0), self.window)
+        avg_loss = wilder_average(-change.clip(upper=0), self.window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        rsi[(avg_loss == 0) & (avg_gain > 0)] = 100.0
+        rsi[(avg_loss == 0) & (avg_gain == 0)] = 50.0
+        return rsi.reindex(frame.index)
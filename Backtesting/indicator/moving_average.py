@@ -0,0 +1,133 @@
+import math
+
+import numpy as np
+
+from .base import AbstractIndicator, bar_field, frame_column
+from ..buffer import RingBuffer
+
+
+class SMA(AbstractIndicator):
+    """
+    Simple moving average of a price field over window bars, from a
+    running sum over a ring buffer.
+    """
+    def __init__(self, window=20, field="close"):
+        """
+        Parameters:
+        window - The number of bars averaged.
+        field - The price field, e.g. 'close' or 'volume'.
+        """
+        super().__init__()
+        self.window = window
+        self.field = field
+        self._attr = bar_field(field)
+        self._values = RingBuffer(window)
+        self._sum = 0.0
+
+    def _update(self, bar):
+        x = getattr(bar, self._attr)
+        evicted = self._values.append(x)
+        self._sum += x
+        if evicted is not None:
+            self._sum -= evicted
+        if self._values.full:
+            self.value = self._sum / self.window
+
+    def compute(self, frame):
+        return frame_column(frame, self.field).rolling(self.window).mean()
+
+
+class EMA(AbstractIndicator):
+    """
+    Exponential moving average of a price field, with the smoothing
+    factor 2 / (window + 1) and seeded with the first value, as
+    pandas' ewm(span=window, adjust=False). It is ready after
+    window bars.
+    """
+    def __init__(self, window=20, field="close"):
+        """
+        Parameters:
+        window - The span of the average, in bars.
+        field - The price field, e.g. 'close' or 'volume'.
+        """
+        super().__init__()
+        self.window = window
+        self.field = field
+        self._attr = bar_field(field)
+        self.alpha = 2.0 / (window + 1)
+        self._ema = None
+
+    def _update(self, bar):
+        x = getattr(bar, self._attr)
+        if self._ema is None:
+            self._ema = x
+        else:
+            self._ema += self.alpha * (x - self._ema)
+        if self.count >= self.window:
+            self.value = self._ema
+
+    def compute(self, frame):
+        ema = frame_column(frame, self.field).ewm(span=self.window, adjust=False).mean()
+        ema.iloc[:self.window - 1] = np.nan
+        return ema
+
+
+class BollingerBands(AbstractIndicator):
+    """
+    Bollinger bands of a price field: the simple moving average
+    (value, also middle) and the bands num_std population standard
+    deviations above (upper) and below (lower) it, from running
+    sums over a ring buffer.
+    """
+    def __init__(self, window=20, num_std=2.0, field="close"):
+        """
+        Parameters:
+        window - The number of bars of the average.
+        num_std - The width of the bands in standard deviations.
+        field - The price field.
+        """
+        super().__init__()
+        self.window = window
+        self.num_std = num_std
+        self.field = field
+        self._attr = bar_field(field)
+        self._values = RingBuffer(window)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.std = math.nan
+        self.upper = math.nan
+        self.lower = math.nan
+
+    @property
+    def middle(self):
+        return self.value
+
+    def _update(self, bar):
+        x = getattr(bar, self._attr)
+        evicted = self._values.append(x)
+        self._sum += x
+        self._sum_sq += x * x
+        if evicted is not None:
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+        if self._values.full:
+            mean = self._sum / self.window
+            self.std = math.sqrt(max(self._sum_sq / self.window - mean * mean, 0.0))
+            self.value = mean
+            self.upper = mean + self.num_std * self.std
+            self.lower = mean - self.num_std * self.std
+
+    def compute(self, frame):
+        """
+        Return the middle band. compute_bands returns all three.
+        """
+        return frame_column(frame, self.field).rolling(self.window).mean()
+
+    def compute_bands(self, frame):
+        """
+        Return the (middle, upper, lower) bands as Series.
+        """
+        x = frame_column(frame, self.field)
+        middle = x.rolling(self.window).mean()
+        std = x.rolling(self.window).std(ddof=0)
+        return middle, middle + self.num_std * std, middle - self.num_std * std
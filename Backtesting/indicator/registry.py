@@ -0,0 +1,59 @@
+import inspect
+
+
+class IndicatorRegistry(object):
+    """
+    Holds one instance of each indicator per (symbol, indicator
+    class, parameters), so that the strategies asking for the same
+    indicator share it, and updates the indicators of a symbol once
+    per BarEvent of it.
+
+    The parameters are bound to the signature of the class, so
+    SMA(20) and SMA(window=20, field='close') are the same
+    indicator. An indicator created in the middle of a bar is
+    updated with that bar straight away.
+    """
+    def __init__(self):
+        self._indicators = {}
+        self._by_symbol = {}
+        self._last_bar = {}
+
+    def __len__(self):
+        return len(self._indicators)
+
+    def key(self, cls, symbol, *args, **params):
+        """
+        Return the key (symbol, cls, parameters) of an indicator.
+        """
+        bound = inspect.signature(cls).bind(*args, **params)
+        bound.apply_defaults()
+        return (symbol, cls, tuple(bound.arguments.items()))
+
+    def get(self, cls, symbol, *args, **params):
+        """
+        Return the shared indicator of a symbol, creating it on the
+        first request.
+
+        Parameters:
+        cls - The indicator class, e.g. SMA.
+        symbol - The symbol whose bars update the indicator.
+        args, params - The parameters of the indicator.
+        """
+        key = self.key(cls, symbol, *args, **params)
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            indicator = cls(*args, **params)
+            self._indicators[key] = indicator
+            self._by_symbol.setdefault(symbol, []).append(indicator)
+            bar = self._last_bar.get(symbol)
+            if bar is not None:
+                indicator.update(bar)
+        return indicator
+
+    def on_bar(self, bar):
+        """
+        Update the indicators of the symbol of a BarEvent.
+        """
+        self._last_bar[bar.symbol] = bar
+        for indicator in self._by_symbol.get(bar.symbol, ()):
+            indicator.update(bar)
@@ -0,0 +1,59 @@
+from collections import deque
+
+from .base import AbstractIndicator, bar_field, frame_column
+
+
+class _RollingExtreme(AbstractIndicator):
+    """
+    The extreme of a price field over window bars, from a monotonic
+    deque of (bar number, value): each value is pushed and popped at
+    most once, so an update is O(1) amortised.
+    """
+    def __init__(self, window, field):
+        super().__init__()
+        self.window = window
+        self.field = field
+        self._attr = bar_field(field)
+        self._deque = deque()
+
+    def _dominates(self, a, b):
+        raise NotImplementedError("Should implement _dominates()")
+
+    def _update(self, bar):
+        x = getattr(bar, self._attr)
+        queue = self._deque
+        while queue and not self._dominates(queue[-1][1], x):
+            queue.pop()
+        queue.append((self.count, x))
+        if queue[0][0] <= self.count - self.window:
+            queue.popleft()
+        if self.count >= self.window:
+            self.value = queue[0][1]
+
+
+class RollingMax(_RollingExtreme):
+    """
+    Highest value of a price field over window bars.
+    """
+    def __init__(self, window=20, field="high"):
+        super().__init__(window, field)
+
+    def _dominates(self, a, b):
+        return a > b
+
+    def compute(self, frame):
+        return frame_column(frame, self.field).rolling(self.window).max()
+
+
+class RollingMin(_RollingExtreme):
+    """
+    Lowest value of a price field over window bars.
+    """
+    def __init__(self, window=20, field="low"):
+        super().__init__(window, field)
+
+    def _dominates(self, a, b):
+        return a < b
+
+    def compute(self, frame):
+        return frame_column(frame, self.field).rolling(self.window).min()
@@ -0,0 +1,51 @@
+import numpy as np
+
+from .base import AbstractIndicator, frame_column, wilder_average
+
+
+class ATR(AbstractIndicator):
+    """
+    Average true range with Wilder's smoothing. The true range of a
+    bar is the largest of its high - low and the distances of its
+    high and low from the previous close (high - low for the first
+    bar). The average starts as the mean of the first window true
+    ranges and is then smoothed by 1 / window.
+    """
+    def __init__(self, window=14):
+        """
+        Parameters:
+        window - The number of bars of the average.
+        """
+        super().__init__()
+        self.window = window
+        self._last_close = None
+        self._atr = 0.0
+
+    def _update(self, bar):
+        high = bar.high_price
+        low = bar.low_price
+        if self._last_close is None:
+            true_range = high - low
+        else:
+            true_range = max(
+                high - low, abs(high - self._last_close), abs(low - self._last_close)
+            )
+        self._last_close = bar.close_price
+        n = self.window
+        if self.count <= n:
+            self._atr += (true_range - self._atr) / self.count
+            if self.count == n:
+                self.value = self._atr
+        else:
+            self._atr = (self._atr * (n - 1) + true_range) / n
+            self.value = self._atr
+
+    def compute(self, frame):
+        high = frame_column(frame, "high")
+        low = frame_column(frame, "low")
+        last_close = frame_column(frame, "close").shift(1)
+        true_range = np.fmax(
+            high - low,
+            np.fmax((high - last_close).abs(), (low - last_close).abs())
+        )
+        return wilder_average(true_range, self.window)
@@ -7,7 +7,10 @@ class SuggestedOrder(object):
     that a suggested order is never transacted unless it has been
     scrutinised by the position sizing and risk management layers.
     """
-    def __init__(self, symbol, action, order_type, quantity=0):
+    def __init__(self, symbol, action, order_type, quantity=0,
+        account=None, strategy_id=None,
+        price=None, time_in_force='GTC', expiry=None
+    ):
         """
         Initialises the SuggestedOrder. The quantity defaults
         to zero as the PortfolioHandler creates these objects
@@ -22,8 +25,18 @@ class SuggestedOrder(object):
         action - 'BUY' (for long) or 'SELL' (for short)
             or 'EXIT' (for liquidation).
         quantity - The quantity of shares to transact.
+        account - The sub-account the order is for.
+        strategy_id - The strategy the order originates from.
+        price - The limit or stop price of a 'LMT' or 'STP' order.
+        time_in_force - 'GTC' or 'DAY'.
+        expiry - Optional expiry timestamp of a pending order.
         """
         self.symbol = symbol
         self.action = action
         self.order_type = order_type
         self.quantity = quantity
+        self.account = account
+        self.strategy_id = strategy_id
+        self.price = price
+        self.time_in_force = time_in_force
+        self.expiry = expiry
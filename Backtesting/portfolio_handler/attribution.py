@@ -0,0 +1,94 @@
+import pandas as pd
+
+
+UNATTRIBUTED = "unattributed"
+
+
+class StrategyAttribution(object):
+    """
+    Keeps a virtual book per strategy id, built from the strategy
+    tag carried by every FillEvent, so that the PnL of each strategy
+    of a combined Strategies run can be told apart from a single pass.
+
+    Each virtual book holds the net quantity per symbol and the net
+    cash flow (including commission) of the fills of one strategy.
+    Its equity is the PnL: the cash flow plus the value of the
+    virtual positions at their closes as of the last update_prices.
+    The curves are marked once per trading day, when the first bar
+    of the next day has already been stored by the data handler, so
+    the closes are those cached from the day being marked rather
+    than read from the data handler.
+    """
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.cash = {}
+        self.commission = {}
+        self.positions = {}
+        self.dates = []
+        self._pnl = {}
+        self._closes = {}
+
+    def on_fill(self, fill_event):
+        """
+        Apply a FillEvent to the virtual book of its strategy.
+        """
+        strategy_id = fill_event.strategy_id
+        if strategy_id is None:
+            strategy_id = UNATTRIBUTED
+        if strategy_id not in self.positions:
+            self.positions[strategy_id] = {}
+            self.cash[strategy_id] = 0.0
+            self.commission[strategy_id] = 0.0
+            # Strategies first seen later start with a flat curve
+            self._pnl[strategy_id] = [0.0] * len(self.dates)
+
+        direction = 1 if fill_event.action == "BUY" else -1
+        quantity = direction * fill_event.quantity
+        self.cash[strategy_id] -= quantity * fill_event.price + fill_event.commission
+        self.commission[strategy_id] += fill_event.commission
+
+        self._closes[fill_event.symbol] = self.data_handler.get_last_close(fill_event.symbol)
+        positions = self.positions[strategy_id]
+        quantity += positions.get(fill_event.symbol, 0)
+        if quantity == 0:
+            positions.pop(fill_event.symbol, None)
+        else:
+            positions[fill_event.symbol] = quantity
+
+    def update_prices(self):
+        """
+        Cache the last close of every symbol held by a virtual book,
+        called with the valuation of the portfolios after each bar.
+        A symbol is also cached when it is filled.
+        """
+        closes = self._closes
+        for positions in self.positions.values():
+            for symbol in positions:
+                closes[symbol] = self.data_handler.get_last_close(symbol)
+
+    def get_pnl(self, strategy_id):
+        """
+        Return the PnL of the virtual book of a strategy at the
+        cached closes.
+        """
+        pnl = self.cash[strategy_id]
+        for symbol, quantity in self.positions[strategy_id].items():
+            pnl += quantity * self._closes[symbol]
+        return pnl
+
+    def mark(self, date):
+        """
+        Append the current PnL of every strategy to its curve.
+        """
+        if date is None or (self.dates and self.dates[-1] == date):
+            return
+        self.dates.append(date)
+        for strategy_id, curve in self._pnl.items():
+            curve.append(self.get_pnl(strategy_id))
+
+    def get_results(self):
+        """
+        Return the PnL curves as a DataFrame of date x strategy id.
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(self.dates), name="Date")
+        return pd.DataFrame(self._pnl, index=index)
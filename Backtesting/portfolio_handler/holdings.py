@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from ..buffer import GrowableArray
+
+
+class HoldingsRecorder(object):
+    """
+    Keeps an end-of-day history of the holdings of a Portfolio.
+
+    Only the positions actually held on a day are stored, as
+    (day, symbol, quantity, market value) entries in flat NumPy
+    buffers, so that the cost of a snapshot is proportional to
+    the number of open positions and not to the size of the
+    universe. Dense time x symbol matrices and the exposure,
+    turnover and concentration series are built from these
+    entries with vectorised operations when they are asked for.
+    """
+    def __init__(self, capacity=1024):
+        self.symbols = []
+        self.dates = []
+        self._symbol_index = {}
+        self._cash = GrowableArray(np.float64, 256)
+        self._equity = GrowableArray(np.float64, 256)
+        self._day = GrowableArray(np.int64, capacity)
+        self._column = GrowableArray(np.int64, capacity)
+        self._quantity = GrowableArray(np.float64, capacity)
+        self._market_value = GrowableArray(np.float64, capacity)
+
+    def record(self, date, portfolio):
+        """
+        Snapshot the current positions of the portfolio as the
+        holdings at the end of the given day.
+
+        Parameters:
+        date - The trading day the snapshot belongs to.
+        portfolio - The Portfolio whose positions are recorded.
+        """
+        if date is None or (self.dates and self.dates[-1] == date):
+            return
+        day = len(self.dates)
+        self.dates.append(date)
+        self._cash.append(portfolio.cur_cash)
+        self._equity.append(portfolio.equity)
+
+        for symbol, position in portfolio.positions.items():
+            column = self._symbol_index.get(symbol)
+            if column is None:
+                column = len(self.symbols)
+                self._symbol_index[symbol] = column
+                self.symbols.append(symbol)
+            self._day.append(day)
+            self._column.append(column)
+            self._quantity.append(position.quantity)
+            self._market_value.append(position.market_value)
+
+    def _field(self, field):
+        if field == "quantity":
+            return self._quantity.values
+        elif field == "market_value":
+            return self._market_value.values
+        elif field == "weight":
+            return self._market_value.values / self._equity.values[self._day.values]
+        else:
+            raise ValueError("field must be quantity, market_value or weight")
+
+    def _index(self):
+        return pd.DatetimeIndex(pd.to_datetime(self.dates), name="Date")
+
+    def to_matrix(self, field="market_value"):
+        """
+        Return the dense (time x symbol) ndarray of a field, with
+        zeros where no position was held.
+        """
+        matrix = np.zeros((len(self.dates), len(self.symbols)))
+        matrix[self._day.values, self._column.values] = self._field(field)
+        return matrix
+
+    def to_frame(self, field="market_value", sparse=False):
+        """
+        Return the (time x symbol) history of a field as a DataFrame.
+
+        Parameters:
+        field - 'quantity', 'market_value' or 'weight'.
+        sparse - If True the columns use a sparse dtype, which keeps
+            the memory proportional to the number of positions held.
+        """
+        if not sparse:
+            return pd.DataFrame(
+                self.to_matrix(field), index=self._index(), columns=self.symbols
+            )
+        from scipy.sparse import coo_matrix
+        matrix = coo_matrix(
+            (self._field(field), (self._day.values, self._column.values)),
+            shape=(len(self.dates), len(self.symbols))
+        )
+        # Depending on the pandas version the implicit entries come
+        # back as NaN rather than zero
+        df = pd.DataFrame.sparse.from_spmatrix(
+            matrix, columns=self.symbols
+        ).fillna(0.0)
+        df.index = self._index()
+        return df
+
+    def equity(self):
+        return pd.Series(self._equity.values.copy(), index=self._index())
+
+    def cash(self):
+        return pd.Series(self._cash.values.copy(), index=self._index())
+
+    def _sum_by_day(self, values):
+        return np.bincount(
+            self._day.values, weights=values, minlength=len(self.dates)
+        )
+
+    def gross_exposure(self):
+        """
+        Sum of the absolute market values as a fraction of equity.
+        """
+        gross = self._sum_by_day(np.abs(self._market_value.values))
+        return pd.Series(gross / self._equity.values, index=self._index())
+
+    def net_exposure(self):
+        """
+        Sum of the signed market values as a fraction of equity.
+        """
+        net = self._sum_by_day(self._market_value.values)
+        return pd.Series(net / self._equity.values, index=self._index())
+
+    def concentration(self):
+        """
+        Herfindahl index of the position weights, i.e. the sum of
+        the squared weights held on each day.
+        """
+        weights = self._field("weight")
+        return pd.Series(self._sum_by_day(weights ** 2), index=self._index())
+
+    def turnover(self):
+        """
+        Half of the absolute value traded between two consecutive
+        snapshots, as a fraction of the equity of the later day.
+
+        The traded quantity of a symbol is the change in its
+        quantity, valued at the price of the later snapshot, or
+        of the earlier one if the position has been closed. The
+        first day is measured against an empty portfolio.
+        """
+        n_days = len(self.dates)
+        n_symbols = len(self.symbols)
+        day = self._day.values
+        column = self._column.values
+        quantity = self._quantity.values
+        price = self._market_value.values / quantity
+
+        # Each entry appears once as "today" and once, negated and
+        # shifted forward one day, as "yesterday" of the next day.
+        shifted = day + 1 < n_days
+        keys = np.concatenate((
+            day * n_symbols + column,
+            (day[shifted] + 1) * n_symbols + column[shifted]
+        ))
+        delta = np.concatenate((quantity, -quantity[shifted]))
+        prices = np.concatenate((price, price[shifted]))
+        is_today = np.concatenate((
+            np.ones(len(day), dtype=bool), np.zeros(shifted.sum(), dtype=bool)
+        ))
+
+        # Group by key with today's entry first so its price is used
+        order = np.lexsort((~is_today, keys))
+        keys = keys[order]
+        if len(keys) == 0:
+            return pd.Series(np.zeros(n_days), index=self._index())
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        traded = np.abs(np.add.reduceat(delta[order], starts)) * prices[order][starts]
+        value = np.bincount(
+            keys[starts] // n_symbols, weights=traded, minlength=n_days
+        )
+        return pd.Series(0.5 * value / self._equity.values, index=self._index())
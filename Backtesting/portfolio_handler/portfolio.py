@@ -4,22 +4,44 @@ import os
 import csv
 
 from .position import Position
+from .holdings import HoldingsRecorder
+from .position_view import PositionView, positions_to_array
+from .settlement import SettlementLedger
 
 class Portfolio(object):
-    def __init__(self, data_handler, cash, output_dir):
+    def __init__(
+        self, data_handler, cash, output_dir, account=None,
+        settlement=None
+    ):
         """
         On creation, the Portfolio object contains no
         positions and all values are "reset" to the initial cash.
+
+        Parameters:
+        data_handler - The DataHandler providing the last prices.
+        cash - The initial cash.
+        output_dir - The directory of the position log.
+        account - Optional name of the sub-account, which is
+            added to the position log filename.
+        settlement - The SettlementLedger of the purchases, T+1
+            by default.
         """
         self.data_handler = data_handler
+        self.account = account
         self.equity = cash
         self.cur_cash = cash
         self.output_dir = output_dir
         self.positions = {}
         self.closed_positions = []
+        self.holdings = HoldingsRecorder()
+        self._position_views = {}
+        self.settlement = SettlementLedger() if settlement is None else settlement
 
         now = datetime.datetime.utcnow().date()
-        self.csv_filename = "positionlog_" + now.strftime("%Y-%m-%d") + ".csv"
+        if account is None:
+            self.csv_filename = "positionlog_" + now.strftime("%Y-%m-%d") + ".csv"
+        else:
+            self.csv_filename = "positionlog_%s_%s.csv" % (account, now.strftime("%Y-%m-%d"))
             
         try:
             self.fname = os.path.expanduser(os.path.join(self.output_dir, self.csv_filename))
@@ -52,10 +74,38 @@ class Portfolio(object):
             
     def _update_position(self):
         """
-        Update the available position of all symbol.
+        Roll the settlement ledger to a new day and make the
+        purchases settling on it available.
         """
-        for symbol in self.positions:
-            self.positions[symbol].update_position()
+        for symbol, quantity in self.settlement.roll().items():
+            position = self.positions.get(symbol)
+            if position is not None:
+                position.settle(quantity)
+
+    def position_view(self, symbol):
+        """
+        Return the cached read-only PositionView of a symbol.
+        """
+        view = self._position_views.get(symbol)
+        if view is None:
+            view = PositionView(symbol, self.positions)
+            self._position_views[symbol] = view
+        return view
+
+    def positions_array(self, symbols=None):
+        """
+        Return the positions of the given symbols, or of all
+        open positions, as a structured NumPy array.
+        """
+        if symbols is None:
+            symbols = list(self.positions)
+        return positions_to_array(self.positions, symbols)
+
+    def _record_holdings(self, date):
+        """
+        Snapshot the open positions as the end-of-day holdings.
+        """
+        self.holdings.record(date, self)
 
     def _add_position(
         self, action, symbol,
@@ -138,6 +188,8 @@ class Portfolio(object):
                 action, symbol, quantity,
                 transact_price, commission
             )
+        if action == "BUY" and not self.settlement.add(symbol, quantity):
+            self.positions[symbol].settle(quantity)
         self.positions[symbol].record_position(self.fname, timestamp)
         
         if self.positions[symbol].quantity == 0:
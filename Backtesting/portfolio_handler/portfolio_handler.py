@@ -1,15 +1,29 @@
 from ..order.suggested import SuggestedOrder
 from .portfolio import Portfolio
+from .attribution import StrategyAttribution
+from .settlement import SettlementLedger
+from .trades import TradeLedger
+
+
+DEFAULT_ACCOUNT = "default"
 
 
 class PortfolioHandler(object):
     def __init__(
         self, initial_cash, events_queue, data_handler,
-         position_sizer, risk_manager, output_dir
+         position_sizer, risk_manager, output_dir,
+         settlement_days=1, symbol_settlement_days=None
     ):
         """
-        Each PortfolioHandler contains a Portfolio object,
-        which stores the actual Position objects.
+        Each PortfolioHandler contains one or more Portfolio
+        objects, which store the actual Position objects.
+
+        initial_cash is either a number, giving a single default
+        Portfolio, or a dict of account name to initial cash, giving
+        one independent Portfolio (sub-account) per name. All of the
+        sub-accounts share the same DataHandler, so the data is only
+        loaded and streamed once. Signals, orders and fills are routed
+        by their account tag, None meaning the first (default) account.
 
         The PortfolioHandler takes a handle to a PositionSizer
         object which determines a mechanism, based on the current
@@ -18,6 +32,10 @@ class PortfolioHandler(object):
         The PortfolioHandler also takes a handle to the
         RiskManager, which is used to modify any generated
         Orders to remain in line with risk parameters.
+
+        Purchases become available after settlement_days trading
+        days (1 for A shares, 0 for T+0), which symbol_settlement_days
+        may set per symbol.
         """
         self.initial_cash = initial_cash
         self.events_queue = events_queue
@@ -25,7 +43,64 @@ class PortfolioHandler(object):
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
         self.output_dir = output_dir
-        self.portfolio = Portfolio(data_handler, initial_cash, output_dir)
+        self.portfolios = {}
+        if isinstance(initial_cash, dict):
+            for account, cash in initial_cash.items():
+                self.portfolios[account] = Portfolio(
+                    data_handler, cash, output_dir, account=account,
+                    settlement=SettlementLedger(
+                        settlement_days, symbol_settlement_days
+                    )
+                )
+            self.default_account = next(iter(initial_cash))
+        else:
+            self.default_account = DEFAULT_ACCOUNT
+            self.portfolios[DEFAULT_ACCOUNT] = Portfolio(
+                data_handler, initial_cash, output_dir,
+                settlement=SettlementLedger(
+                    settlement_days, symbol_settlement_days
+                )
+            )
+        self.portfolio = self.portfolios[self.default_account]
+        self.attribution = StrategyAttribution(data_handler)
+        self.trades = TradeLedger()
+        self.risk_metrics = None
+        self._fill_listeners = []
+
+    @property
+    def accounts(self):
+        return list(self.portfolios)
+
+    @property
+    def equity(self):
+        """
+        The combined (firm-level) equity of all sub-accounts.
+        """
+        equity = 0.0
+        for portfolio in self.portfolios.values():
+            equity += portfolio.equity
+        return equity
+
+    def set_risk_metrics(self, risk_metrics):
+        """
+        Share the OnlineRiskMetrics of the backtest with the
+        strategies, through the PortfolioHandler, and with the
+        RiskManager.
+        """
+        self.risk_metrics = risk_metrics
+        self.risk_manager.set_risk_metrics(risk_metrics)
+
+    def get_portfolio(self, account=None):
+        """
+        Return the Portfolio of a sub-account, the default one
+        if account is None.
+        """
+        if account is None:
+            return self.portfolio
+        try:
+            return self.portfolios[account]
+        except KeyError:
+            raise ValueError("Unknown account '%s'" % account)
 
     def _create_order_from_signal(self, signal_event):
         """
@@ -43,7 +118,12 @@ class PortfolioHandler(object):
             signal_event.symbol,
             signal_event.action,
             order_type = signal_event.order_type,
-            quantity = quantity
+            quantity = quantity,
+            account = signal_event.account,
+            strategy_id = signal_event.strategy_id,
+            price = signal_event.price,
+            time_in_force = signal_event.time_in_force,
+            expiry = signal_event.expiry
         )
         return order
 
@@ -75,7 +155,7 @@ class PortfolioHandler(object):
         price = fill_event.price
         commission = fill_event.commission
         # Create or modify the position from the fill info
-        self.portfolio.transact_position(
+        self.get_portfolio(fill_event.account).transact_position(
             timestamp, action, symbol,
             quantity, price, commission
         )
@@ -91,19 +171,53 @@ class PortfolioHandler(object):
         Once received from the RiskManager they are converted into
         full OrderEvent objects and sent back to the events queue.
         """
+        portfolio = self.get_portfolio(signal_event.account)
         # Create the initial order list from a signal event
         initial_order = self._create_order_from_signal(signal_event)
         # Size the quantity of the initial order
         sized_order = self.position_sizer.size_order(
-            self.portfolio, initial_order
+            portfolio, initial_order
         )
         # Refine or eliminate the order via the risk manager overlay
         order_events = self.risk_manager.refine_orders(
-            self.portfolio, sized_order
+            portfolio, sized_order
         )
         # Place orders onto events queue
         self._place_orders_onto_queue(order_events)
 
+    def rebalance(
+        self, target_weights, order_type="MKT",
+        account=None, strategy_id=None
+    ):
+        """
+        Rebalance the Portfolio to a full set of target weights.
+
+        The PositionSizer must provide size_orders, which sizes
+        every order of the rebalance at once and returns the sells
+        before the buys. The orders are then refined together by
+        the RiskManager and placed onto the events queue in that
+        order.
+
+        Parameters:
+        target_weights - Dict (or pandas Series) of symbol to the
+            target fraction of equity. Held symbols which are not
+            in the targets are liquidated.
+        order_type - The order type of the generated orders.
+        account - The sub-account to rebalance.
+        strategy_id - The strategy requesting the rebalance.
+        """
+        portfolio = self.get_portfolio(account)
+        sized_orders = self.position_sizer.size_orders(
+            portfolio, target_weights, order_type=order_type
+        )
+        for sized_order in sized_orders:
+            sized_order.account = account
+            sized_order.strategy_id = strategy_id
+        order_events = self.risk_manager.refine_batch(
+            portfolio, sized_orders
+        )
+        self._place_orders_onto_queue(order_events)
+
     def on_fill(self, fill_event):
         """
         This is called by the backtester or live trading architecture
@@ -116,15 +230,54 @@ class PortfolioHandler(object):
         Brokers).
         """
         self._convert_fill_to_portfolio_update(fill_event)
+        self.risk_manager.on_fill(
+            self.get_portfolio(fill_event.account), fill_event
+        )
+        self.attribution.on_fill(fill_event)
+        self.trades.on_fill(fill_event)
+        for listener in self._fill_listeners:
+            listener(fill_event)
+
+    def add_fill_listener(self, listener):
+        """
+        Register a function called with every FillEvent once the
+        portfolio has applied it, e.g. by an execution handler
+        holding the cash and quantity of the fills it has placed on
+        the events queue.
+        """
+        self._fill_listeners.append(listener)
+
+    def on_cancel(self, order_event):
+        """
+        Called by the execution handler with an OrderEvent which
+        will not be filled any further, so that the risk manager
+        can release what it reserved for it.
+        """
+        self.risk_manager.on_cancel(
+            self.get_portfolio(order_event.account), order_event
+        )
 
     def update_portfolio_value(self):
         """
-        Update the portfolio to reflect current market value.
+        Update the portfolios to reflect current market value.
         """
-        self.portfolio._update_portfolio()
+        for portfolio in self.portfolios.values():
+            portfolio._update_portfolio()
+        self.attribution.update_prices()
 
     def update_portfolio_position(self):
         """
-        Update the available position.
+        Update the available position on a new day, releasing the
+        purchases which settle on it.
+        """
+        for portfolio in self.portfolios.values():
+            portfolio._update_position()
+
+    def record_holdings(self, date):
+        """
+        Record the end-of-day holdings of the portfolios and mark
+        the per-strategy PnL curves.
         """
-        self.portfolio._update_position()
+        for portfolio in self.portfolios.values():
+            portfolio._record_holdings(date)
+        self.attribution.mark(date)
@@ -35,13 +35,14 @@ class Position(object):
         self.market_value = round(self.quantity * price, 2)
         
 
-    def update_position(self):
+    def settle(self, quantity):
         """
-        At A share, trading rule is T+1, when it is a new day, the 
-        available position should be update.
+        Make quantity of the unavailable shares available, once
+        their settlement is due.
         """
-        self.available_quantity += self.unavailable_quantity
-        self.unavailable_quantity = 0
+        quantity = min(quantity, self.unavailable_quantity)
+        self.available_quantity += quantity
+        self.unavailable_quantity -= quantity
 
 
     def transact_shares(self, action, quantity, price, commission):
@@ -52,7 +53,12 @@ class Position(object):
         self.price = round(price, 2)
         self.total_commission += commission
         direction = 1 if action == "BUY" else -1
-        self.unavailable_quantity += quantity
+        # Bought shares are unavailable until they settle, sold
+        # shares come out of the available ones
+        if action == "BUY":
+            self.unavailable_quantity += quantity
+        else:
+            self.available_quantity -= quantity
         lastest_quantity = self.quantity + direction * quantity
         if lastest_quantity > 0:
             self.avg_price = round((
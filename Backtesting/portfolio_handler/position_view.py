@@ -0,0 +1,99 @@
+import numpy as np
+
+
+POSITION_FIELDS = (
+    "quantity", "unavailable_quantity", "available_quantity",
+    "price", "total_commission", "avg_price", "market_value"
+)
+
+POSITION_DTYPE = np.dtype(
+    [("symbol", object)] + [(field, np.float64) for field in POSITION_FIELDS]
+)
+
+
+class PositionView(object):
+    """
+    A read-only view of the Position of one symbol in a Portfolio.
+
+    The view reads straight through to the Position currently
+    held, so a strategy can keep one view per symbol and query it
+    on every bar without any allocation. Every field reads as zero
+    while the symbol is not held.
+    """
+    __slots__ = ("symbol", "_positions")
+
+    def __init__(self, symbol, positions):
+        """
+        Parameters:
+        symbol - The ticker symbol, e.g. 'GOOG'.
+        positions - The positions dict of the Portfolio.
+        """
+        object.__setattr__(self, "symbol", symbol)
+        object.__setattr__(self, "_positions", positions)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PositionView is read-only")
+
+    def __repr__(self):
+        return "PositionView(%s, quantity=%s, available_quantity=%s)" % (
+            self.symbol, self.quantity, self.available_quantity
+        )
+
+    @property
+    def held(self):
+        return self.symbol in self._positions
+
+    @property
+    def quantity(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.quantity
+
+    @property
+    def unavailable_quantity(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.unavailable_quantity
+
+    @property
+    def available_quantity(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.available_quantity
+
+    @property
+    def price(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.price
+
+    @property
+    def total_commission(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.total_commission
+
+    @property
+    def avg_price(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.avg_price
+
+    @property
+    def market_value(self):
+        position = self._positions.get(self.symbol)
+        return 0 if position is None else position.market_value
+
+
+def positions_to_array(positions, symbols):
+    """
+    Return a structured array with one row per symbol and the
+    POSITION_FIELDS as columns, zero for symbols not held.
+
+    Parameters:
+    positions - The positions dict of the Portfolio.
+    symbols - The symbols to return, in order.
+    """
+    array = np.zeros(len(symbols), dtype=POSITION_DTYPE)
+    array["symbol"] = symbols
+    for i, symbol in enumerate(symbols):
+        position = positions.get(symbol)
+        if position is not None:
+            array[i] = (symbol,) + tuple(
+                getattr(position, field) for field in POSITION_FIELDS
+            )
+    return array
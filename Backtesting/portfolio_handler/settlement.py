@@ -0,0 +1,52 @@
+class SettlementLedger(object):
+    """
+    Records the quantities bought but not yet settled, keyed by the
+    index of the trading day on which they settle, so that rolling
+    to a new day only releases the entries due on that day instead
+    of visiting every position.
+
+    A-shares settle T+1: shares bought today can be sold from the
+    next trading day. Other instruments may settle T+0 (available
+    at once) or T+N, set per symbol.
+    """
+    def __init__(self, settlement_days=1, symbol_settlement_days=None):
+        """
+        Parameters:
+        settlement_days - The number of trading days after which a
+            purchase becomes available, 0 for T+0.
+        symbol_settlement_days - Optional dict of symbol to its own
+            number of settlement days.
+        """
+        self.settlement_days = settlement_days
+        self.symbol_settlement_days = symbol_settlement_days or {}
+        self.day = 0
+        self._pending = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._pending.values())
+
+    def add(self, symbol, quantity):
+        """
+        Record a purchase. Returns False if it settles at once
+        (T+0) and nothing was recorded.
+        """
+        days = self.symbol_settlement_days.get(symbol, self.settlement_days)
+        if days <= 0:
+            return False
+        entries = self._pending.setdefault(self.day + days, {})
+        entries[symbol] = entries.get(symbol, 0) + quantity
+        return True
+
+    def roll(self):
+        """
+        Move to the next trading day and return the dict of symbol
+        to quantity which settles on it.
+        """
+        self.day += 1
+        return self._pending.pop(self.day, {})
+
+    def unsettled(self, symbol):
+        """
+        Return the quantity of a symbol not yet settled.
+        """
+        return sum(entries.get(symbol, 0) for entries in self._pending.values())
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from ..buffer import GrowableArray
+
+
+TRADE_FIELDS = (
+    "timestamp", "symbol", "action", "quantity", "price",
+    "commission", "account", "strategy_id"
+)
+
+
+class TradeLedger(object):
+    """
+    Keeps every fill of the backtest in columns: growable NumPy
+    buffers for the numbers, and integer codes for the symbol,
+    action, account and strategy id, so that recording a fill
+    appends a few scalars and the ledger converts to arrays or a
+    DataFrame without a pass over Python objects.
+    """
+    _LABELS = ("symbol", "action", "account", "strategy_id")
+
+    def __init__(self, capacity=1024):
+        """
+        Parameters:
+        capacity - The number of fills initially allocated.
+        """
+        self._timestamp = GrowableArray("datetime64[ns]", capacity)
+        self._quantity = GrowableArray(np.int64, capacity)
+        self._price = GrowableArray(np.float64, capacity)
+        self._commission = GrowableArray(np.float64, capacity)
+        self._codes = {name: GrowableArray(np.int32, capacity) for name in self._LABELS}
+        self._labels = {name: {} for name in self._LABELS}
+
+    def __len__(self):
+        return len(self._price)
+
+    def _append_label(self, name, value):
+        labels = self._labels[name]
+        code = labels.get(value)
+        if code is None:
+            code = len(labels)
+            labels[value] = code
+        self._codes[name].append(code)
+
+    def on_fill(self, fill_event):
+        """
+        Append a FillEvent to the ledger.
+        """
+        timestamp = fill_event.timestamp
+        self._timestamp.append(
+            np.datetime64("NaT") if timestamp is None else np.datetime64(timestamp, "ns")
+        )
+        self._quantity.append(fill_event.quantity)
+        self._price.append(fill_event.price)
+        self._commission.append(fill_event.commission)
+        self._append_label("symbol", fill_event.symbol)
+        self._append_label("action", fill_event.action)
+        self._append_label("account", fill_event.account)
+        self._append_label("strategy_id", fill_event.strategy_id)
+
+    def to_arrays(self):
+        """
+        Return a dict of field name to a NumPy array of the fills,
+        the labels as fixed width strings ('' for None).
+        """
+        arrays = {
+            "timestamp": self._timestamp.values.copy(),
+            "quantity": self._quantity.values.copy(),
+            "price": self._price.values.copy(),
+            "commission": self._commission.values.copy(),
+        }
+        for name in self._LABELS:
+            labels = np.array(
+                ["" if value is None else str(value) for value in self._labels[name]]
+                or [""]
+            )
+            arrays[name] = labels[self._codes[name].values]
+        return {field: arrays[field] for field in TRADE_FIELDS}
+
+    def to_frame(self):
+        """
+        Return the fills as a DataFrame, one row per fill.
+        """
+        return pd.DataFrame(self.to_arrays())
@@ -1,6 +1,10 @@
-from math import floor
+import numpy as np
 
 from .base import AbstractPositionSizer
+from ..order.suggested import SuggestedOrder
+from ..execution_handler.cost_model import (
+    FeeRule, ScheduledCostModel, AbstractSlippageModel, FixedSlippage
+)
 
 
 class LiquidateRebalancePositionSizer(AbstractPositionSizer):
@@ -8,43 +12,159 @@ class LiquidateRebalancePositionSizer(AbstractPositionSizer):
     Carries out a periodic full liquidation and rebalance of
     the Portfolio.
 
-    This is achieved by determining whether an order type type
-    is "EXIT" or "BOT/SLD".
+    A single order is sized by size_order. If its action is
+    "EXIT" the available quantity of the symbol is sold,
+    otherwise the quantity is set so that the position matches
+    the prespecified weight of the current account equity.
 
-    If the former, the current quantity of shares in the ticker
-    is determined and then BOT or SLD to net the position to zero.
-
-    If the latter, the current quantity of shares to obtain is
-    determined by prespecified weights and adjusted to reflect
-    current account equity.
+    A whole rebalance is sized at once by size_orders, which
+    takes the target weight of every symbol and computes all of
+    the orders with array operations. Quantities are rounded to
+    whole lots, sells are limited to the available (T+1) quantity
+    and the buys are scaled down so that their cost, including
+    commission, can be paid from the cash plus the sell proceeds.
     """
-    def __init__(self, ticker_weights):
-        self.ticker_weights = ticker_weights
+    def __init__(
+        self, symbol_weights=None, lot_size=100,
+        commission_rate=0.0008, min_commission=5,
+        tax_rate=0.001, slippage=0.01, cash_reserve=0.0,
+        cost_model=None
+    ):
+        """
+        Parameters:
+        symbol_weights - Dict of symbol to weight used by size_order.
+        lot_size - Buy quantities are rounded down to this multiple.
+        commission_rate - Commission as a fraction of the traded value.
+        min_commission - Minimum commission of a transaction.
+        tax_rate - Stamp tax as a fraction of the value sold.
+        slippage - Price slippage assumed when estimating costs,
+            either an amount or an AbstractSlippageModel.
+        cash_reserve - Cash which is never spent by a rebalance.
+        cost_model - The AbstractCostModel used to estimate costs,
+            which should be the one of the execution handler. By
+            default it is built from commission_rate, min_commission
+            and tax_rate.
+        """
+        self.symbol_weights = symbol_weights or {}
+        self.lot_size = lot_size
+        if cost_model is None:
+            cost_model = ScheduledCostModel([
+                FeeRule("commission", rate=commission_rate, minimum=min_commission),
+                FeeRule("stamp_tax", rate=tax_rate, side="SELL"),
+            ])
+        self.cost_model = cost_model
+        if not isinstance(slippage, AbstractSlippageModel):
+            slippage = FixedSlippage(slippage)
+        self.slippage_model = slippage
+        self.cash_reserve = cash_reserve
+
+    def _lots(self, quantity):
+        return np.floor(quantity / self.lot_size) * self.lot_size
 
     def size_order(self, portfolio, initial_order):
         """
         Size the order to reflect the dollar-weighting of the
         current equity account size based on pre-specified
-        ticker weights.
+        symbol weights. Sells are limited to the available (T+1)
+        quantity, as in size_orders.
         """
-        ticker = initial_order.ticker
+        symbol = initial_order.symbol
+        position = portfolio.positions.get(symbol)
         if initial_order.action == "EXIT":
-            # Obtain current quantity and liquidate
-            cur_quantity = portfolio.positions[ticker].quantity
-            if cur_quantity > 0:
-                initial_order.action = "SLD"
-                initial_order.quantity = cur_quantity
-            else:
-                initial_order.action = "BOT"
-                initial_order.quantity = cur_quantity
+            # Obtain current available quantity and liquidate
+            initial_order.action = "SELL"
+            initial_order.quantity = 0 if position is None else position.available_quantity
+            return initial_order
+
+        # Determine total portfolio value, work out dollar weight
+        # and finally determine the lots of shares to hold
+        weight = self.symbol_weights.get(symbol, 0.0)
+        price = portfolio.data_handler.get_last_close(symbol)
+        target_quantity = int(self._lots(weight * portfolio.equity / price))
+        cur_quantity = 0 if position is None else position.quantity
+        if target_quantity >= cur_quantity:
+            initial_order.action = "BUY"
+            initial_order.quantity = int(self._lots(target_quantity - cur_quantity))
         else:
-            weight = self.ticker_weights[ticker]
-            # Determine total portfolio value, work out dollar weight
-            # and finally determine integer quantity of shares to purchase
-            price = portfolio.price_handler.tickers[ticker]["adj_close"]
-            price = PriceParser.display(price)
-            equity = PriceParser.display(portfolio.equity)
-            dollar_weight = weight * equity
-            weighted_quantity = int(floor(dollar_weight / price))
-            initial_order.quantity = weighted_quantity
+            initial_order.action = "SELL"
+            sell = min(cur_quantity - target_quantity, position.available_quantity)
+            # A full liquidation may sell an odd lot, otherwise whole lots
+            if target_quantity > 0 or sell < cur_quantity:
+                sell = int(self._lots(sell))
+            initial_order.quantity = sell
         return initial_order
+
+    def size_orders(self, portfolio, target_weights, order_type="MKT"):
+        """
+        Size all of the orders needed to move the portfolio to the
+        target weights. Held symbols missing from the targets are
+        liquidated.
+
+        Parameters:
+        portfolio - The Portfolio to rebalance.
+        target_weights - Dict (or pandas Series) of symbol to the
+            target fraction of equity.
+        order_type - The order type of the generated orders.
+
+        Returns:
+        A list of SuggestedOrder objects, sells before buys.
+        """
+        symbols = list(target_weights.keys())
+        symbols += [s for s in portfolio.positions if s not in target_weights]
+        if not symbols:
+            return []
+
+        weight = np.array([target_weights.get(s, 0.0) for s in symbols], dtype=np.float64)
+        price = np.array(
+            [portfolio.data_handler.get_last_close(s) for s in symbols], dtype=np.float64
+        )
+        timestamps = [portfolio.data_handler.get_last_timestamp(s) for s in symbols]
+        quantity = np.zeros(len(symbols))
+        available = np.zeros(len(symbols))
+        for i, symbol in enumerate(symbols):
+            position = portfolio.positions.get(symbol)
+            if position is not None:
+                quantity[i] = position.quantity
+                available[i] = position.available_quantity
+
+        target = self._lots(weight * portfolio.equity / price)
+        delta = target - quantity
+
+        # Sells: never more than the available quantity. A full
+        # liquidation may sell an odd lot, otherwise whole lots.
+        sell = np.minimum(np.maximum(-delta, 0), available)
+        partial = (target > 0) | (sell < quantity)
+        sell = np.where(partial, self._lots(sell), sell)
+        sell_price = self.slippage_model.apply(price, "SELL", sell)
+        sell_value = sell * sell_price - self.cost_model.calculate(
+            sell, sell_price, "SELL", symbols, timestamps
+        )
+        cash = portfolio.cur_cash + sell_value.sum() - self.cash_reserve
+
+        # Buys: whole lots, scaled down until the cash covers them
+        buy = self._lots(np.maximum(delta, 0))
+        buy_price = self.slippage_model.apply(price, "BUY", buy)
+
+        def buy_cost(buy):
+            return buy * buy_price + self.cost_model.calculate(
+                buy, buy_price, "BUY", symbols, timestamps
+            )
+
+        cost = buy_cost(buy)
+        total = cost.sum()
+        if total > cash:
+            buy = self._lots(buy * max(cash, 0.0) / total)
+            cost = buy_cost(buy)
+            # Minimum commissions can still leave a small shortfall,
+            # which is removed by dropping the last buys.
+            buy = np.where(np.cumsum(cost) <= cash, buy, 0)
+
+        sells = [
+            SuggestedOrder(symbols[i], "SELL", order_type, int(sell[i]))
+            for i in np.flatnonzero(sell > 0)
+        ]
+        buys = [
+            SuggestedOrder(symbols[i], "BUY", order_type, int(buy[i]))
+            for i in np.flatnonzero(buy > 0)
+        ]
+        return sells + buys
@@ -8,9 +8,42 @@ class AbstractRiskManager(ABC):
     OrderEvent object and adds it to a list.
     """
 
+    # The OnlineRiskMetrics of the backtest, once it is set
+    risk_metrics = None
+
     def __init__(self):
         pass
 
+    def set_risk_metrics(self, risk_metrics):
+        self.risk_metrics = risk_metrics
+
     @abstractmethod
     def refine_orders(self, portfolio, sized_order):
         raise NotImplementedError("Should implement refine_orders()")
+
+    def refine_batch(self, portfolio, sized_orders):
+        """
+        Refine all of the sized orders of a rebalance. Risk managers
+        which can check a batch at once override this, by default
+        the orders are refined one at a time.
+        """
+        order_events = []
+        for sized_order in sized_orders:
+            order_events += self.refine_orders(portfolio, sized_order)
+        return order_events
+
+    def on_fill(self, portfolio, fill_event):
+        """
+        Called with every FillEvent once the Portfolio is updated,
+        so that risk managers can keep their aggregates in step.
+        Does nothing by default.
+        """
+        pass
+
+    def on_cancel(self, portfolio, order_event):
+        """
+        Called with every approved OrderEvent which is cancelled,
+        expires or is rejected by the execution handler before it
+        is completely filled. Does nothing by default.
+        """
+        pass
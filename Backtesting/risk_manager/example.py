@@ -13,6 +13,11 @@ class ExampleRiskManager(AbstractRiskManager):
             sized_order.symbol,
             sized_order.order_type,
             sized_order.quantity,
-            sized_order.action
+            sized_order.action,
+            account=sized_order.account,
+            strategy_id=sized_order.strategy_id,
+            price=sized_order.price,
+            time_in_force=sized_order.time_in_force,
+            expiry=sized_order.expiry
         )
         return [order_event]
@@ -0,0 +1,266 @@
+import numpy as np
+
+from .base import AbstractRiskManager
+from ..event import OrderEvent
+
+
+class _LimitState(object):
+    """
+    The running aggregates of one Portfolio, rebuilt from its
+    positions once per trading day and kept up to date in between
+    by the approved orders and the fills.
+    """
+    def __init__(self, day, equity):
+        self.day = day
+        self.equity = equity
+        self.gross = 0.0
+        self.sector_value = {}
+        self.reserved_quantity = {}
+        self.reserved_cash = 0.0
+        self.reservations = {}
+        self.traded = 0.0
+
+
+def _allocate(value, headroom, groups=None):
+    """
+    Share the headroom of each group among its values in order and
+    return the part of each value which fits. headroom is indexed
+    by the group codes, or a scalar when groups is None.
+    """
+    if groups is None:
+        groups = np.zeros(len(value), dtype=np.int64)
+        headroom = np.array([headroom], dtype=np.float64)
+    order = np.argsort(groups, kind="stable")
+    requested = value[order]
+    code = groups[order]
+    before = np.cumsum(requested) - requested
+    first = np.r_[True, code[1:] != code[:-1]]
+    before -= np.maximum.accumulate(np.where(first, before, 0))
+    allowed = np.empty(len(value))
+    allowed[order] = np.clip(headroom[code] - before, 0, requested)
+    return allowed
+
+
+class PortfolioLimitRiskManager(AbstractRiskManager):
+    """
+    Clips or rejects buy orders which would break portfolio limits:
+
+    max_weight - The largest fraction of equity held in a symbol.
+    max_sector_weight - The largest fraction of equity held in the
+        symbols of a sector, given by sector_map.
+    max_gross_exposure - The largest value of all positions as a
+        fraction of equity.
+    min_cash_reserve - The fraction of equity kept in cash.
+    max_daily_turnover - The largest value traded in a day, buys
+        and sells, as a fraction of the equity at the start of it.
+
+    Sells reduce the exposure and are let through, but count
+    towards the turnover. A clipped buy is rounded down to whole
+    lots and dropped when nothing is left of it.
+
+    The sector values, gross exposure, cash reserved by approved
+    orders and turnover are kept as running aggregates, updated by
+    each approved order and by on_fill, so a check never sums the
+    whole portfolio. They are rebuilt from the positions at the
+    last closes on the first check of every trading day, which also
+    drops the reservations of earlier days. An order which is
+    cancelled, expires or is rejected during the day releases what
+    is left of its reservation through on_cancel. A batch of
+    orders, e.g. a rebalance, is checked in one pass of array
+    operations by refine_batch, the orders sharing the headroom of
+    each limit in turn.
+    """
+    def __init__(
+        self, max_weight=None, sector_map=None, max_sector_weight=None,
+        max_gross_exposure=None, min_cash_reserve=0.0,
+        max_daily_turnover=None, lot_size=100
+    ):
+        """
+        Parameters:
+        max_weight - Fraction of equity, or None for no limit.
+        sector_map - Dict of symbol to sector name.
+        max_sector_weight - Fraction of equity, or None.
+        max_gross_exposure - Fraction of equity, or None.
+        min_cash_reserve - Fraction of equity.
+        max_daily_turnover - Fraction of equity, or None.
+        lot_size - Clipped buys are rounded down to this multiple.
+        """
+        self.max_weight = max_weight
+        self.sector_map = sector_map or {}
+        self.max_sector_weight = max_sector_weight
+        self.max_gross_exposure = max_gross_exposure
+        self.min_cash_reserve = min_cash_reserve
+        self.max_daily_turnover = max_daily_turnover
+        self.lot_size = lot_size
+        self._states = {}
+
+    def _state(self, portfolio):
+        """
+        Return the aggregates of a Portfolio, rebuilding them on the
+        first call of a new trading day.
+        """
+        day = portfolio.data_handler.cur_day
+        state = self._states.get(portfolio)
+        if state is not None and state.day == day:
+            return state
+        state = _LimitState(day, portfolio.equity)
+        for symbol, position in portfolio.positions.items():
+            value = position.quantity * portfolio.data_handler.get_last_close(symbol)
+            state.gross += value
+            sector = self.sector_map.get(symbol)
+            if sector is not None:
+                state.sector_value[sector] = state.sector_value.get(sector, 0.0) + value
+        self._states[portfolio] = state
+        return state
+
+    def _add_exposure(self, state, symbol, value):
+        state.gross += value
+        sector = self.sector_map.get(symbol)
+        if sector is not None:
+            state.sector_value[sector] = state.sector_value.get(sector, 0.0) + value
+
+    def refine_orders(self, portfolio, sized_order):
+        """
+        Check a single sized order against the limits.
+        """
+        return self.refine_batch(portfolio, [sized_order])
+
+    def refine_batch(self, portfolio, sized_orders):
+        """
+        Check a batch of sized orders against the limits, in order,
+        and return the OrderEvents of the ones let through.
+        """
+        orders = [o for o in sized_orders if o.quantity > 0]
+        if not orders:
+            return []
+        state = self._state(portfolio)
+        data_handler = portfolio.data_handler
+        equity = portfolio.equity
+        symbols = [o.symbol for o in orders]
+        is_buy = np.array([o.action == "BUY" for o in orders])
+        quantity = np.array([o.quantity for o in orders], dtype=np.float64)
+        price = np.array([data_handler.get_last_close(s) for s in symbols], dtype=np.float64)
+        requested = quantity * price
+        value = np.where(is_buy, requested, 0.0)
+
+        if self.max_weight is not None:
+            codes = {}
+            group = np.array([codes.setdefault(s, len(codes)) for s in symbols])
+            held = np.zeros(len(codes))
+            for symbol, c in codes.items():
+                position = portfolio.positions.get(symbol)
+                held_quantity = state.reserved_quantity.get(symbol, 0)
+                if position is not None:
+                    held_quantity += position.quantity
+                held[c] = held_quantity * data_handler.get_last_close(symbol)
+            value = _allocate(value, self.max_weight * equity - held, group)
+
+        if self.max_sector_weight is not None and self.sector_map:
+            codes = {}
+            group = np.array([
+                codes.setdefault(self.sector_map.get(s), len(codes)) for s in symbols
+            ])
+            headroom = np.full(len(codes), np.inf)
+            for sector, c in codes.items():
+                if sector is not None:
+                    headroom[c] = (
+                        self.max_sector_weight * equity - state.sector_value.get(sector, 0.0)
+                    )
+            value = _allocate(value, headroom, group)
+
+        # Sell proceeds of the batch are available to its buys
+        sold = requested[~is_buy].sum()
+        budget = (
+            portfolio.cur_cash - state.reserved_cash
+            - self.min_cash_reserve * equity + sold
+        )
+        if self.max_gross_exposure is not None:
+            budget = min(budget, self.max_gross_exposure * equity - state.gross + sold)
+        value = _allocate(value, budget)
+
+        if self.max_daily_turnover is not None:
+            headroom = self.max_daily_turnover * state.equity - state.traded
+            turnover = np.where(is_buy, value, requested)
+            before = np.cumsum(turnover) - turnover
+            value = np.where(is_buy, np.clip(headroom - before, 0, value), value)
+
+        clipped = is_buy & (value < requested - 1e-9)
+        lots = np.floor(value / price / self.lot_size) * self.lot_size
+        quantity = np.where(clipped, lots, quantity).astype(np.int64)
+
+        order_events = []
+        for i, sized_order in enumerate(orders):
+            if quantity[i] <= 0:
+                print(
+                    str(data_handler.get_last_timestamp(symbols[i])) +
+                    ": The %s order of %s breaks the portfolio limits "
+                    "and will be cancelled!" % (sized_order.action, symbols[i])
+                )
+                continue
+            order_event = OrderEvent(
+                sized_order.symbol,
+                sized_order.order_type,
+                int(quantity[i]),
+                sized_order.action,
+                account=sized_order.account,
+                strategy_id=sized_order.strategy_id,
+                price=sized_order.price,
+                time_in_force=sized_order.time_in_force,
+                expiry=sized_order.expiry
+            )
+            self._reserve(state, order_event, price[i])
+            order_events.append(order_event)
+        return order_events
+
+    def _reserve(self, state, order_event, price):
+        """
+        Count an approved order in the aggregates until it fills.
+        """
+        direction = 1 if order_event.action == "BUY" else -1
+        quantity = order_event.quantity
+        symbol = order_event.symbol
+        state.reservations[order_event.order_id] = [direction, quantity, price]
+        state.reserved_quantity[symbol] = (
+            state.reserved_quantity.get(symbol, 0) + direction * quantity
+        )
+        state.reserved_cash += direction * quantity * price
+        state.traded += quantity * price
+        self._add_exposure(state, symbol, direction * quantity * price)
+
+    def on_fill(self, portfolio, fill_event):
+        """
+        Move a fill out of the reservation of its order, or add it
+        to the aggregates when it was not approved here.
+        """
+        state = self._state(portfolio)
+        direction = 1 if fill_event.action == "BUY" else -1
+        quantity = fill_event.quantity
+        reservation = state.reservations.get(fill_event.order_id)
+        if reservation is not None:
+            reserved = min(quantity, reservation[1])
+            reservation[1] -= reserved
+            if reservation[1] == 0:
+                del state.reservations[fill_event.order_id]
+            state.reserved_quantity[fill_event.symbol] -= direction * reserved
+            state.reserved_cash -= direction * reserved * reservation[2]
+            quantity -= reserved
+        if quantity > 0:
+            value = quantity * fill_event.price
+            state.traded += value
+            self._add_exposure(state, fill_event.symbol, direction * value)
+
+    def on_cancel(self, portfolio, order_event):
+        """
+        Take the unfilled part of a cancelled order out of the
+        aggregates. Later fills of the order, e.g. of a remainder
+        carried by a fill model, are then counted as unreserved.
+        """
+        state = self._state(portfolio)
+        reservation = state.reservations.pop(order_event.order_id, None)
+        if reservation is None:
+            return
+        direction, quantity, price = reservation
+        state.reserved_quantity[order_event.symbol] -= direction * quantity
+        state.reserved_cash -= direction * quantity * price
+        state.traded -= quantity * price
+        self._add_exposure(state, order_event.symbol, -direction * quantity * price)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+# The periodic rules, each the group of the timestamps it splits
+# the calendar into and whether it fires on the first or the last
+# timestamp of each group
+RULES = {
+    "day_open": ("day", "first"),
+    "day_close": ("day", "last"),
+    "week_start": ("week", "first"),
+    "week_end": ("week", "last"),
+    "month_start": ("month", "first"),
+    "month_end": ("month", "last"),
+}
+
+
+def _boundaries(keys, which):
+    """
+    Return the mask of the first (or last) element of each run of
+    equal keys.
+    """
+    mask = np.ones(len(keys), dtype=bool)
+    if which == "first":
+        mask[1:] = keys[1:] != keys[:-1]
+    else:
+        mask[:-1] = keys[1:] != keys[:-1]
+    return mask
+
+
+def _group_keys(calendar, group):
+    if group == "day":
+        return calendar.normalize().asi8
+    if group == "week":
+        iso = calendar.isocalendar()
+        return iso["year"].to_numpy(np.int64) * 100 + iso["week"].to_numpy(np.int64)
+    return calendar.year.to_numpy(np.int64) * 100 + calendar.month.to_numpy(np.int64)
+
+
+def trigger_times(calendar, rule, minutes=None):
+    """
+    Return the timestamps of a calendar at which a rule fires.
+
+    Parameters:
+    calendar - A sorted DatetimeIndex of unique timestamps.
+    rule - One of RULES, or 'every_minutes' for the first
+        timestamp of each interval of minutes from the first
+        timestamp of the day.
+    minutes - The length of the intervals of 'every_minutes'.
+    """
+    calendar = pd.DatetimeIndex(calendar)
+    if len(calendar) == 0:
+        return calendar
+    if rule == "every_minutes":
+        if minutes is None or minutes <= 0:
+            raise ValueError("every_minutes needs a positive number of minutes")
+        times = calendar.as_unit("ns").asi8
+        opens = _boundaries(_group_keys(calendar, "day"), "first")
+        day_open = times[np.flatnonzero(opens)][np.cumsum(opens) - 1]
+        bucket = (times - day_open) // int(minutes * 60 * 10**9)
+        mask = _boundaries(bucket, "first") | opens
+        return calendar[mask]
+    if rule not in RULES:
+        raise ValueError("Unknown schedule rule '%s'" % rule)
+    group, which = RULES[rule]
+    return calendar[_boundaries(_group_keys(calendar, group), which)]
+
+
+class Scheduler(object):
+    """
+    Runs callbacks of the strategies at periodic points of the
+    backtest, e.g. a monthly rebalance, instead of the strategies
+    checking the date on every bar.
+
+    The trigger timestamps of a rule are computed once, vectorized,
+    from the trading calendar of all of the loaded data, then cut to
+    the backtest period, so a period starting or ending mid-month
+    does not make its first or last day a boundary. They are merged
+    into a table of timestamp to callbacks, so the backtest pays a
+    dict lookup per timestamp and the strategies nothing between two
+    triggers. A callback is called with the timestamp once every
+    bar of it has been streamed, so the latest bars of all the
+    symbols are those of the timestamp, and before the orders of the
+    timestamp are executed, so its orders are in the same batch as
+    those placed on the bars.
+    """
+    def __init__(self, data_handler):
+        """
+        Parameters:
+        data_handler - The data handler whose streamed timestamps
+            are the calendar, read on the first schedule.
+        """
+        self.data_handler = data_handler
+        self._calendar = None
+        self._loaded_calendar = None
+        self._callbacks = {}
+
+    def __len__(self):
+        return len(self._callbacks)
+
+    @property
+    def calendar(self):
+        """
+        The timestamps of the backtest period.
+        """
+        if self._calendar is None:
+            self._calendar = self.data_handler.get_timestamps()
+        return self._calendar
+
+    @property
+    def loaded_calendar(self):
+        """
+        The timestamps of all of the loaded data, which the rules
+        are applied to.
+        """
+        if self._loaded_calendar is None:
+            self._loaded_calendar = self.data_handler.get_timestamps(bounded=False)
+        return self._loaded_calendar
+
+    def schedule(self, rule, callback, minutes=None):
+        """
+        Register a callback to be called at each timestamp where the
+        rule fires, e.g. scheduler.schedule("month_end", self.rebalance),
+        and return these timestamps. Callbacks firing together are
+        called in the order they were registered.
+
+        Parameters:
+        rule - 'day_open', 'day_close', 'week_start', 'week_end',
+            'month_start', 'month_end' or 'every_minutes'.
+        callback - A function of the timestamp.
+        minutes - The interval of 'every_minutes'.
+        """
+        times = trigger_times(self.loaded_calendar, rule, minutes)
+        calendar = self.calendar
+        if len(calendar) == 0:
+            return calendar
+        times = times[(times >= calendar[0]) & (times <= calendar[-1])]
+        for timestamp in times:
+            self._callbacks.setdefault(timestamp, []).append(callback)
+        return times
+
+    def get(self, timestamp):
+        """
+        Return the list of callbacks of a timestamp, or None.
+        """
+        return self._callbacks.get(timestamp)
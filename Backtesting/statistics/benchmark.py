@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+
+class BenchmarkSeries(object):
+    """
+    The close prices of a benchmark, loaded as a side series rather
+    than streamed as a traded symbol, and aligned to the timestamps
+    of the strategy by an as-of join: the value at a timestamp is
+    the last close at or before it, or the first close when the
+    timestamp is before the benchmark starts.
+
+    A whole index is aligned in one searchsorted by align. asof
+    looks up a single timestamp for the event loop, with a cursor
+    which makes increasing timestamps O(1) amortised.
+    """
+    def __init__(self, closes):
+        """
+        Parameters:
+        closes - A pandas Series of close prices indexed by time.
+        """
+        closes = closes.dropna().sort_index()
+        if closes.empty:
+            raise ValueError("The benchmark has no prices")
+        self.name = closes.name
+        self._times = pd.DatetimeIndex(closes.index).as_unit("ns").asi8
+        self._values = closes.to_numpy(np.float64)
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def align(self, index):
+        """
+        Return the benchmark as a pandas Series on index.
+        """
+        times = pd.DatetimeIndex(index).as_unit("ns").asi8
+        pos = np.searchsorted(self._times, times, side="right") - 1
+        return pd.Series(self._values[np.maximum(pos, 0)], index=index)
+
+    def asof(self, timestamp):
+        """
+        Return the benchmark value at a timestamp.
+        """
+        t = pd.Timestamp(timestamp).value
+        times = self._times
+        cursor = self._cursor
+        if cursor > 0 and times[cursor - 1] > t:
+            cursor = int(np.searchsorted(times, t, side="right"))
+        while cursor < len(times) and times[cursor] <= t:
+            cursor += 1
+        self._cursor = cursor
+        return self._values[max(cursor - 1, 0)]
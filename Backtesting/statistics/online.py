@@ -0,0 +1,171 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ..buffer import GrowableArray
+
+
+class OnlineEquityStatistics(object):
+    """
+    Stores an equity curve in growable NumPy buffers and keeps
+    running accumulators of its returns and drawdowns, so that the
+    Sharpe ratio and the drawdowns are available at any point of
+    the backtest in O(1), without a Python object per bar.
+
+    The curve has one point per timestamp: further updates with
+    the same timestamp replace its value, and the point is only
+    added to the accumulators once the next timestamp arrives (or
+    on flush). The definitions follow the end-of-run statistics:
+    the first return is zero, the Sharpe ratio uses the population
+    standard deviation, and the high-water mark starts from the
+    second point (see performance.create_drawdowns).
+
+    The drawdown of every committed point is kept too, with the
+    start (the last peak) and end (the trough) of the maximum
+    drawdown, so the end-of-run statistics don't need another
+    pass over the curve.
+    """
+    def __init__(self, periods=252, capacity=4096):
+        """
+        Parameters:
+        periods - The number of periods in a year.
+        capacity - The number of points initially allocated.
+        """
+        self.periods = periods
+        self._timestamps = GrowableArray("datetime64[ns]", capacity)
+        self._values = GrowableArray(np.float64, capacity)
+        self._drawdowns = GrowableArray(np.float64, capacity)
+        self._timestamp = None
+        self._committed = 0
+        self._last = None
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.hwm = 0.0
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self._duration = 0
+        self.max_drawdown_duration = 0
+        # The indices of the last peak and of the maximum drawdown
+        self._peak = 0
+        self._max_start = None
+        self._max_end = None
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, timestamp, value):
+        """
+        Record the value of the curve at a timestamp.
+        """
+        if timestamp == self._timestamp:
+            self._values.last = value
+            return
+        self.flush()
+        self._timestamp = timestamp
+        self._timestamps.append(np.datetime64(pd.Timestamp(timestamp).as_unit("ns")))
+        self._values.append(value)
+
+    def flush(self):
+        """
+        Add the pending points to the accumulators.
+        """
+        values = self._values.values
+        while self._committed < len(values):
+            self._commit(values[self._committed])
+            self._committed += 1
+
+    def _commit(self, value):
+        if self._last is None:
+            r = 0.0
+        else:
+            r = value / self._last - 1.0 if self._last else 0.0
+            # The high-water mark starts from the second point
+            self.hwm = max(self.hwm, value)
+            self.drawdown = (self.hwm - value) / self.hwm if self.hwm else 0.0
+        self._last = value
+
+        self.count += 1
+        delta = r - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (r - self._mean)
+
+        index = len(self._drawdowns)
+        self._drawdowns.append(self.drawdown)
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+            self._max_start = self._peak
+            self._max_end = index
+        if self.drawdown == 0:
+            self._peak = index
+            self._duration = 0
+        else:
+            self._duration += 1
+            if self._duration > self.max_drawdown_duration:
+                self.max_drawdown_duration = self._duration
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def std(self):
+        if self.count == 0:
+            return 0.0
+        return math.sqrt(self._m2 / self.count)
+
+    @property
+    def sharpe(self):
+        std = self.std
+        if std == 0:
+            return float("nan")
+        return math.sqrt(self.periods) * self._mean / std
+
+    @property
+    def max_drawdown_start(self):
+        """
+        The timestamp of the peak before the maximum drawdown, or
+        None if the curve never fell.
+        """
+        if self._max_start is None:
+            return None
+        return pd.Timestamp(self._timestamps.values[self._max_start])
+
+    @property
+    def max_drawdown_end(self):
+        """
+        The timestamp of the trough of the maximum drawdown, or
+        None if the curve never fell.
+        """
+        if self._max_end is None:
+            return None
+        return pd.Timestamp(self._timestamps.values[self._max_end])
+
+    @property
+    def total_return(self):
+        values = self._values.values
+        if len(values) == 0:
+            return 0.0
+        return values[-1] / values[0] - 1.0
+
+    def to_series(self):
+        """
+        Return the curve as a pandas Series indexed by timestamp.
+        """
+        return pd.Series(
+            self._values.values.copy(),
+            index=pd.DatetimeIndex(self._timestamps.values.copy())
+        )
+
+    def drawdowns_series(self):
+        """
+        Return the drawdowns of the committed points as a pandas
+        Series indexed by timestamp.
+        """
+        drawdowns = self._drawdowns.values
+        return pd.Series(
+            drawdowns.copy(),
+            index=pd.DatetimeIndex(self._timestamps.values[:len(drawdowns)].copy()),
+            name="Drawdown"
+        )
@@ -1,30 +1,61 @@
-from itertools import groupby
-
 import numpy as np
 import pandas as pd
-from scipy.stats import linregress
 
 
 def aggregate_returns(returns, convert_to):
     """
     Aggregates returns by day, week, month, or year.
+
+    The periods are integer keys computed once from the index, the
+    week being keyed by (year, month, ISO week) as before, and the
+    compounded return of a period is the exponential of the sum of
+    its log returns, taken in one pass over the sorted keys instead
+    of a Python function call per group.
+
+    Missing returns are skipped like the cumulative sum of the
+    groupby version skipped them, except that a period whose last
+    return is missing is NaN.
+
+    Parameters:
+    returns - A pandas Series of period returns with a DatetimeIndex.
+    convert_to - 'weekly', 'monthly' or 'yearly'.
     """
-    def cumulate_returns(x):
-        return np.exp(np.log(1 + x).cumsum())[-1] - 1
+    if convert_to not in ('weekly', 'monthly', 'yearly'):
+        raise ValueError('convert_to must be weekly, monthly or yearly')
 
+    index = pd.DatetimeIndex(returns.index)
+    levels = [index.year.to_numpy(np.int64)]
+    if convert_to != 'yearly':
+        levels.append(index.month.to_numpy(np.int64))
     if convert_to == 'weekly':
-        return returns.groupby(
-            [lambda x: x.year,
-             lambda x: x.month,
-             lambda x: x.isocalendar()[1]]).apply(cumulate_returns)
-    elif convert_to == 'monthly':
-        return returns.groupby(
-            [lambda x: x.year, lambda x: x.month]).apply(cumulate_returns)
-    elif convert_to == 'yearly':
-        return returns.groupby(
-            [lambda x: x.year]).apply(cumulate_returns)
+        levels.append(index.isocalendar().week.to_numpy(np.int64))
+
+    # Months and ISO weeks are below 100, so the packed key sorts
+    # like the (year, month, week) tuple
+    key = levels[0]
+    for level in levels[1:]:
+        key = key * 100 + level
+    keys, inverse = np.unique(key, return_inverse=True)
+    log_returns = np.log(1 + returns.to_numpy(np.float64))
+    missing = np.isnan(log_returns)
+    aggregated = np.exp(np.bincount(
+        inverse, weights=np.where(missing, 0.0, log_returns), minlength=len(keys)
+    )) - 1
+    if missing.any():
+        # The last point of each period, in the order of the index
+        order = np.argsort(inverse, kind="stable")
+        last = order[np.r_[inverse[order][1:] != inverse[order][:-1], True]]
+        aggregated[missing[last]] = np.nan
+
+    if convert_to == 'yearly':
+        result_index = pd.Index(keys)
     else:
-        ValueError('convert_to must be weekly, monthly or yearly')
+        unpacked = []
+        for _ in levels[1:]:
+            keys, level = np.divmod(keys, 100)
+            unpacked.insert(0, level)
+        result_index = pd.MultiIndex.from_arrays([keys] + unpacked)
+    return pd.Series(aggregated, index=result_index, name=returns.name)
 
 
 def create_cagr(equity, periods=252):
@@ -39,7 +70,7 @@ def create_cagr(equity, periods=252):
     periods - Daily (252), Hourly (252*6.5), Minutely(252*6.5*60) etc.
     """
     years = len(equity) / float(periods)
-    return (equity[-1] ** (1.0 / years)) - 1.0
+    return (equity.iloc[-1] ** (1.0 / years)) - 1.0
 
 
 def create_sharpe_ratio(returns, periods=252):
@@ -72,46 +103,62 @@ def create_drawdowns(returns):
     as well as the duration of the drawdown. Requires that the
     pnl_returns is a pandas Series.
 
+    The high-water mark is a cumulative maximum and the durations
+    are the lengths of the runs of underwater points, found from
+    the edges of the underwater mask, so there is no Python loop
+    over the points.
+
     Parameters:
     equity - A pandas Series representing period percentage returns.
 
     Returns:
-    drawdown, drawdown_max, duration
+    drawdown, drawdown_max, drawdown_start, drawdown_end, duration
     """
-    # Calculate the cumulative returns curve
-    # and set up the High Water Mark
     idx = returns.index
-    hwm = np.zeros(len(idx))
+    values = np.asarray(returns, dtype=np.float64)
+    n = len(values)
 
-    # Create the high water mark
-    for t in range(1, len(idx)):
-        hwm[t] = max(hwm[t - 1], returns.ix[t])
+    # High water mark, from the second point on as before
+    hwm = np.zeros(n)
+    if n > 1:
+        hwm[1:] = np.maximum.accumulate(np.maximum(values[1:], 0.0))
 
     # Calculate the drawdown statistics
-    perf = pd.DataFrame(index=idx)
-    perf["Drawdown"] = (hwm - returns) / hwm
-    perf["Drawdown"].ix[0] = 0.0
-    # Calculate Max drawdown duration
-    perf["DurationCheck"] = np.where(perf["Drawdown"] == 0, 0, 1)
-    duration = max(
-        sum(1 for i in g if i == 1)
-        for k, g in groupby(perf["DurationCheck"])
-    )
-    # Calculate the Max Drawdown time
-    MDD = np.max(perf["Drawdown"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = (hwm - values) / hwm
+    if n > 0:
+        drawdown[0] = 0.0
+
+    # Calculate Max drawdown duration: the longest run of
+    # consecutive underwater points
+    underwater = np.r_[False, drawdown != 0, False].astype(np.int8)
+    edges = np.diff(underwater)
+    run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    duration = int(run_lengths.max()) if len(run_lengths) > 0 else 0
+
+    # Calculate the Max Drawdown time: the end is the first point
+    # of the maximum, the start the last point at the lowest
+    # drawdown before it
+    MDD = np.nanmax(drawdown) if n > 0 else np.nan
     if MDD > 0:
-        MDD_end = perf["Drawdown"].idxmax()
-        MDD_start = perf["Drawdown"][:MDD_end].sort_index(ascending=False).idxmin()
+        end = int(np.nanargmax(drawdown))
+        before = drawdown[:end + 1]
+        start = np.flatnonzero(before == np.nanmin(before))[-1]
+        MDD_start = idx[start]
+        MDD_end = idx[end]
     else:
         MDD_start = None
         MDD_end = None
-    
-    return perf["Drawdown"], MDD, MDD_start, MDD_end, duration
+
+    return pd.Series(drawdown, index=idx, name="Drawdown"), MDD, MDD_start, MDD_end, duration
 
 
 def rsquared(x, y):
     """
     Return R^2 where x and y are array-like.
     """
+    # scipy is only loaded when needed, it is slow to import
+    from scipy.stats import linregress
+
     slope, intercept, r_value, p_value, std_err = linregress(x, y)
     return r_value**2
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .tearsheet import TearsheetStatistics
+
+
+def save_results(statistics, output_dir):
+    """
+    Save the results of a finished backtest, with what is needed to
+    render its tearsheet later, and return the file name. The file
+    is named by the hash of its content, so the same results are
+    saved (and rendered) only once.
+
+    Parameters:
+    statistics - The TearsheetStatistics of the backtest, after
+        get_results.
+    output_dir - The directory of the results file.
+    """
+    meta = {
+        "title": getattr(statistics, "title", None),
+        "benchmark": getattr(statistics, "benchmark", None),
+        "periods": getattr(statistics, "periods", 252),
+        "log_scale": getattr(statistics, "log_scale", False),
+    }
+    data = pickle.dumps((meta, statistics.statistics), protocol=pickle.HIGHEST_PROTOCOL)
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    filename = os.path.expanduser(os.path.join(output_dir, "results_%s.pkl" % digest))
+    if not os.path.exists(filename):
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+    return filename
+
+
+def load_results(results_file):
+    """
+    Return the (meta, results) saved by save_results.
+    """
+    with open(results_file, "rb") as f:
+        return pickle.load(f)
+
+
+def report_filename(results_file):
+    """
+    Return the file name of the tearsheet of a results file.
+    """
+    directory, name = os.path.split(results_file)
+    digest = os.path.splitext(name)[0].replace("results_", "", 1)
+    return os.path.join(directory, "report_%s.png" % digest)
+
+
+class SavedTearsheet(TearsheetStatistics):
+    """
+    A TearsheetStatistics over saved results, which only plots
+    them: there is no portfolio to update it from.
+    """
+    def __init__(self, meta, results):
+        self.output_dir = None
+        self.title = meta["title"] or ""
+        self.benchmark = meta["benchmark"]
+        self.periods = meta["periods"]
+        self.log_scale = meta["log_scale"]
+        self.statistics = results
+
+    def update(self, timestamp, portfolio_handler):
+        raise NotImplementedError("Saved results can't be updated")
+
+    def get_results(self):
+        return self.statistics
+
+
+def render_report(results_file, filename=None):
+    """
+    Render the tearsheet of a results file to a PNG, off screen,
+    and return its file name. A report which already exists is
+    not rendered again.
+
+    Parameters:
+    results_file - A file written by save_results.
+    filename - The PNG file, by default report_<hash>.png next to
+        the results file.
+    """
+    if filename is None:
+        filename = report_filename(results_file)
+    if os.path.exists(filename):
+        return filename
+
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+
+    meta, results = load_results(results_file)
+    root, ext = os.path.splitext(filename)
+    tmp = root + ".tmp" + ext
+    SavedTearsheet(meta, results).plot_results(tmp, show=False)
+    os.replace(tmp, filename)
+    return filename
+
+
+class ReportRenderer(object):
+    """
+    Renders tearsheets of saved results in worker processes, so a
+    parameter sweep only saves the numeric results of each run and
+    pays for the plotting of the reports which are opened.
+
+    Reports are cached on disk by the hash of the results, and a
+    report being rendered is shared by the requests for it.
+    """
+    def __init__(self, max_workers=1):
+        """
+        Parameters:
+        max_workers - The number of worker processes.
+        """
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = {}
+
+    def submit(self, results_file):
+        """
+        Start rendering the report of a results file, unless it is
+        cached, and return a Future of its file name.
+        """
+        filename = report_filename(results_file)
+        future = self._futures.get(filename)
+        if future is not None and not (future.done() and future.exception()):
+            return future
+        if os.path.exists(filename):
+            future = Future()
+            future.set_result(filename)
+            return future
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        future = self._executor.submit(render_report, results_file, filename)
+        self._futures[filename] = future
+        return future
+
+    def render(self, results_file, timeout=None):
+        """
+        Return the file name of the report of a results file,
+        rendering it first if needed.
+        """
+        return self.submit(results_file).result(timeout)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
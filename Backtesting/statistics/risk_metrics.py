@@ -0,0 +1,247 @@
+import math
+
+from ..buffer import RingBuffer
+
+
+class P2Quantile(object):
+    """
+    Streaming estimate of a quantile with the P-square algorithm
+    (Jain and Chlamtac, 1985), which keeps five markers instead of
+    the observations, so both memory and the cost of an update are
+    constant.
+    """
+    def __init__(self, p):
+        """
+        Parameters:
+        p - The quantile to estimate, e.g. 0.05.
+        """
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self._positions
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self._desired
+        for i in range(5):
+            desired[i] += self._increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    @property
+    def value(self):
+        """
+        The current estimate, exact while there are five or fewer
+        observations, None before the first.
+        """
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Linear interpolation between the closest ranks
+            rank = self.p * (self.count - 1)
+            low = int(math.floor(rank))
+            high = min(low + 1, self.count - 1)
+            return self._heights[low] + (rank - low) * (
+                self._heights[high] - self._heights[low]
+            )
+        return self._heights[2]
+
+
+class OnlineRiskMetrics(object):
+    """
+    Risk metrics of the equity curve which are kept up to date
+    while the backtest runs, at a constant cost per update:
+
+    mean, std - Moments of all the returns so far, with Welford's
+        algorithm.
+    volatility - Standard deviation of the returns in a rolling
+        window, from running sums over a ring buffer.
+    var - Historical value at risk of one period at var_level, as
+        a positive fraction of equity, from a P-square quantile
+        sketch of all the returns.
+    beta - Beta of the returns to the benchmark over the rolling
+        window.
+
+    Several bars can share a timestamp, so the equity of a
+    timestamp is only committed, and a return computed, once the
+    next timestamp arrives (or on flush). The properties can be
+    read at any time, e.g. by strategies and risk managers.
+    """
+    def __init__(self, window=240, var_level=0.95, periods=252):
+        """
+        Parameters:
+        window - The number of returns of the rolling window.
+        var_level - The confidence level of the value at risk.
+        periods - The number of periods in a year, used to
+            annualise the volatility.
+        """
+        self.window = window
+        self.var_level = var_level
+        self.periods = periods
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._quantile = P2Quantile(1.0 - var_level)
+        self._returns = RingBuffer(window)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._pairs = (RingBuffer(window), RingBuffer(window))
+        self._pair_sums = [0.0, 0.0, 0.0, 0.0, 0.0]
+        self._evictions = 0
+        self._timestamp = None
+        self._equity = None
+        self._benchmark = None
+        self._last_equity = None
+        self._last_benchmark = None
+
+    def update(self, timestamp, equity, benchmark=None):
+        """
+        Record the equity, and optionally the benchmark price, at a
+        timestamp. Later updates with the same timestamp replace
+        the earlier ones.
+        """
+        if timestamp != self._timestamp and self._timestamp is not None:
+            self._commit()
+        self._timestamp = timestamp
+        self._equity = equity
+        self._benchmark = benchmark
+
+    def flush(self):
+        """
+        Commit the values of the last timestamp.
+        """
+        if self._timestamp is not None:
+            self._commit()
+            self._timestamp = None
+
+    def _commit(self):
+        equity = self._equity
+        benchmark = self._benchmark
+        if self._last_equity:
+            r = equity / self._last_equity - 1.0
+            self._add_return(r)
+            if benchmark is not None and self._last_benchmark:
+                self._add_pair(r, benchmark / self._last_benchmark - 1.0)
+        self._last_equity = equity
+        if benchmark is not None:
+            self._last_benchmark = benchmark
+
+    def _add_return(self, r):
+        self.count += 1
+        delta = r - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (r - self._mean)
+        self._quantile.add(r)
+
+        evicted = self._returns.append(r)
+        self._sum += r
+        self._sum_sq += r * r
+        if evicted is not None:
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+            self._resync()
+
+    def _add_pair(self, r, b):
+        returns, benchmark = self._pairs
+        evicted_r = returns.append(r)
+        evicted_b = benchmark.append(b)
+        sums = self._pair_sums
+        sums[0] += r
+        sums[1] += b
+        sums[2] += r * b
+        sums[3] += b * b
+        sums[4] += 1
+        if evicted_r is not None:
+            sums[0] -= evicted_r
+            sums[1] -= evicted_b
+            sums[2] -= evicted_r * evicted_b
+            sums[3] -= evicted_b * evicted_b
+            sums[4] -= 1
+
+    def _resync(self):
+        """
+        Recompute the window sums from the buffers once per window,
+        so rounding errors do not build up. Amortised O(1).
+        """
+        self._evictions += 1
+        if self._evictions < self.window:
+            return
+        self._evictions = 0
+        values = self._returns.values
+        self._sum = float(values.sum())
+        self._sum_sq = float((values * values).sum())
+        r, b = (buffer.values for buffer in self._pairs)
+        self._pair_sums = [
+            float(r.sum()), float(b.sum()), float((r * b).sum()),
+            float((b * b).sum()), len(r)
+        ]
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    @property
+    def volatility(self):
+        n = len(self._returns)
+        if n < 2:
+            return 0.0
+        variance = (self._sum_sq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def annualised_volatility(self):
+        return self.volatility * math.sqrt(self.periods)
+
+    @property
+    def var(self):
+        quantile = self._quantile.value
+        return 0.0 if quantile is None else max(-quantile, 0.0)
+
+    @property
+    def beta(self):
+        sum_r, sum_b, sum_rb, sum_bb, n = self._pair_sums
+        if n < 2:
+            return None
+        variance = sum_bb - sum_b * sum_b / n
+        if variance <= 0:
+            return None
+        return (sum_rb - sum_r * sum_b / n) / variance
@@ -6,8 +6,6 @@ import datetime
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 
 class SimpleStatistics(AbstractStatistics):
@@ -124,6 +122,9 @@ class SimpleStatistics(AbstractStatistics):
         A simple script to plot the balance of the portfolio, or
         "equity curve", as a function of time.
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         sns.set_palette("deep", desat=.6)
         sns.set_context(rc={"figure.figsize": (8, 4)})
 
@@ -0,0 +1,206 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+# The time series of the results which are stored, all on the
+# timestamps of the equity curve
+SERIES_COLUMNS = (
+    "equity", "returns", "cum_returns", "drawdowns", "rolling_sharpe",
+    "equity_b", "returns_b", "cum_returns_b", "drawdowns_b"
+)
+
+
+def _scalar(value):
+    """
+    Return value as a JSON value, or None when it is not a scalar.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if np.isfinite(value) else None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    return None
+
+
+class ResultsStore(object):
+    """
+    An archive of backtest results on disk, one directory per run:
+
+        <root>/<run_id>/meta.json - scalar statistics and parameters
+        <root>/<run_id>/timestamp.npy, equity.npy, ... - time series
+        <root>/<run_id>/trades/<field>.npy - the trade ledger
+
+    Every column is a plain .npy array, so it is read back with a
+    memory map instead of being unpickled, and doesn't depend on
+    the classes of the code which wrote it. The runs are compared
+    from their meta.json alone by summary, and the same column of
+    many runs is loaded into one DataFrame by load_frame.
+    """
+    def __init__(self, root):
+        """
+        Parameters:
+        root - The directory of the archive, created if needed.
+        """
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, run_id, *names):
+        return os.path.join(self.root, run_id, *names)
+
+    def save(self, results, run_id=None, params=None):
+        """
+        Store the results of a run and return its run id.
+
+        Parameters:
+        results - The dict of TearsheetStatistics.get_results.
+        run_id - The name of the run, by default the hash of its
+            equity curve and parameters, so that saving the same
+            run again replaces it.
+        params - Dict of the parameters of the run, e.g. of a sweep,
+            stored in meta.json with the statistics.
+        """
+        equity = results["equity"]
+        index = pd.DatetimeIndex(equity.index).as_unit("ns")
+        params = dict(params or {})
+        if run_id is None:
+            digest = hashlib.sha1(index.asi8.tobytes())
+            digest.update(np.ascontiguousarray(equity.values, dtype=np.float64).tobytes())
+            digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+            run_id = digest.hexdigest()[:16]
+
+        tmp = self._path(run_id + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(os.path.join(tmp, "trades"))
+
+        np.save(os.path.join(tmp, "timestamp.npy"), index.values)
+        columns = []
+        for column in SERIES_COLUMNS:
+            series = results.get(column)
+            if series is None:
+                continue
+            if not series.index.equals(equity.index):
+                series = series.reindex(equity.index)
+            np.save(
+                os.path.join(tmp, column + ".npy"),
+                np.ascontiguousarray(series.values, dtype=np.float64)
+            )
+            columns.append(column)
+
+        trade_columns = []
+        trades = results.get("trades")
+        if trades is not None:
+            for field in trades.columns:
+                values = trades[field].to_numpy()
+                if values.dtype == object:
+                    values = values.astype(str)
+                np.save(os.path.join(tmp, "trades", field + ".npy"), values)
+                trade_columns.append(field)
+
+        stats = {}
+        for key, value in results.items():
+            value = _scalar(value)
+            if value is not None:
+                stats[key] = value
+        meta = {
+            "run_id": run_id,
+            "created": datetime.datetime.utcnow().isoformat(),
+            "points": len(index),
+            "trades": 0 if trades is None else len(trades),
+            "columns": columns,
+            "trade_columns": trade_columns,
+            "statistics": stats,
+            "params": {key: _scalar(value) for key, value in params.items()},
+        }
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=1)
+
+        shutil.rmtree(self._path(run_id), ignore_errors=True)
+        os.replace(tmp, self._path(run_id))
+        return run_id
+
+    def runs(self):
+        """
+        Return the sorted ids of the stored runs.
+        """
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(self._path(name, "meta.json"))
+        )
+
+    def meta(self, run_id):
+        with open(self._path(run_id, "meta.json")) as f:
+            return json.load(f)
+
+    def delete(self, run_id):
+        shutil.rmtree(self._path(run_id))
+
+    def load_column(self, run_id, column, mmap=True):
+        """
+        Return a column of a run as a NumPy array, memory mapped
+        unless mmap is False. column is 'timestamp', one of
+        SERIES_COLUMNS, or 'trades/<field>'.
+        """
+        return np.load(
+            self._path(run_id, column + ".npy"), mmap_mode="r" if mmap else None
+        )
+
+    def load_series(self, run_id, column="equity", mmap=True):
+        """
+        Return a time series of a run as a pandas Series.
+        """
+        return pd.Series(
+            self.load_column(run_id, column, mmap),
+            index=pd.DatetimeIndex(self.load_column(run_id, "timestamp", mmap)),
+            name=run_id
+        )
+
+    def load_trades(self, run_id, mmap=True):
+        """
+        Return the trade ledger of a run as a DataFrame.
+        """
+        fields = self.meta(run_id)["trade_columns"]
+        return pd.DataFrame({
+            field: self.load_column(run_id, "trades/" + field, mmap)
+            for field in fields
+        })
+
+    def summary(self, run_ids=None):
+        """
+        Return a DataFrame of the scalar statistics and parameters
+        of the runs, one row per run, read from meta.json only, e.g.
+        to rank runs with store.summary().sort_values('sharpe').
+        """
+        if run_ids is None:
+            run_ids = self.runs()
+        rows = []
+        for run_id in run_ids:
+            meta = self.meta(run_id)
+            row = dict(meta["params"])
+            row.update(meta["statistics"])
+            row["points"] = meta["points"]
+            row["trades"] = meta["trades"]
+            rows.append(row)
+        return pd.DataFrame(rows, index=pd.Index(list(run_ids), name="run_id"))
+
+    def load_frame(self, column="equity", run_ids=None, mmap=True):
+        """
+        Return a DataFrame of one time series column of many runs,
+        one column per run, aligned on their timestamps.
+        """
+        if run_ids is None:
+            run_ids = self.runs()
+        return pd.DataFrame({
+            run_id: self.load_series(run_id, column, mmap) for run_id in run_ids
+        })
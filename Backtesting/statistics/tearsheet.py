@@ -1,17 +1,11 @@
 from .base import AbstractStatistics
 import Backtesting.statistics.performance as perf
-
-
-from matplotlib.ticker import FuncFormatter
-from matplotlib import cm
+from .online import OnlineEquityStatistics
+from .benchmark import BenchmarkSeries
 
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import matplotlib.dates as mdates
-import seaborn as sns
 import os
 import datetime
 
@@ -27,42 +21,71 @@ class TearsheetStatistics(AbstractStatistics):
 
     Also includes an optional annualised rolling Sharpe
     ratio chart.
+
+    The equity curves are kept by OnlineEquityStatistics, in NumPy
+    buffers with running accumulators, so the Sharpe ratio and the
+    drawdowns of the curve so far can be read at any time, e.g.
+    self.equity.sharpe or self.equity.max_drawdown. The drawdown
+    statistics of the results are all taken from it.
+
+    The benchmark is not streamed nor polled on every bar: its close
+    prices are a side series, the BenchmarkSeries loaded once by the
+    Backtest, aligned to the timestamps of the equity curve by an
+    as-of join in get_results.
+
+    Matplotlib and seaborn are only imported by the plotting
+    methods, so a run which doesn't plot doesn't load them.
     """
     def __init__(
         self, output_dir, portfolio_handler,
         title=None, benchmark=None, periods=252,
-        rolling_sharpe=False
+        rolling_sharpe=False, benchmark_series=None
     ):
         """
         Takes in a portfolio handler.
+
+        Parameters:
+        benchmark - The symbol of the benchmark, or None.
+        benchmark_series - The BenchmarkSeries of the benchmark. It
+            is loaded from the data handler when not given.
         """
         self.portfolio_handler = portfolio_handler
         self.output_dir = output_dir
         self.data_handler = portfolio_handler.data_handler
         self.title = '\n'.join(title)
         self.benchmark = benchmark
+        if benchmark is not None and benchmark_series is None:
+            benchmark_series = BenchmarkSeries(
+                self.data_handler.get_close_series(benchmark)
+            )
+        self.benchmark_series = benchmark_series
         self.periods = periods
-        self.equity = {}
-        self.equity_benchmark = {}
+        self.equity = OnlineEquityStatistics(periods)
+        self.account_equity = {
+            account: OnlineEquityStatistics(periods)
+            for account in portfolio_handler.accounts
+        }
         self.log_scale = False
         self.statistics = {}
 
     def update(self, timestamp, portfolio_handler):
         """
-        Update equity curve and benchmark equity curve that must be tracked
-        over time.
+        Update the equity curve that must be tracked over time. With
+        several sub-accounts the equity curve is the combined one and
+        each account's curve is also kept.
         """
-        self.equity[timestamp] = self.portfolio_handler.portfolio.equity
-
-        if self.benchmark is not None:
-            self.equity_benchmark[timestamp] = self.data_handler.get_last_close(self.benchmark)
+        self.equity.update(timestamp, self.portfolio_handler.equity)
+        if len(self.account_equity) > 1:
+            for account, portfolio in self.portfolio_handler.portfolios.items():
+                self.account_equity[account].update(timestamp, portfolio.equity)
 
     def get_results(self):
         """
         Return a dict with all important results & stats.
         """
         # Equity
-        equity_s = pd.Series(self.equity).sort_index()
+        self.equity.flush()
+        equity_s = self.equity.to_series()
 
         # Returns
         returns_s = equity_s.pct_change().fillna(0.0)
@@ -77,12 +100,14 @@ class TearsheetStatistics(AbstractStatistics):
         cum_returns_s = np.exp(np.log(1 + returns_s).cumsum())
 
         # Drawdown, max drawdown, max drawdown duration
-        dd_s, max_dd, max_dd_start, max_dd_end, max_dd_dur = perf.create_drawdowns(cum_returns_s)       
+        dd_s = self.equity.drawdowns_series()
+        max_dd = self.equity.max_drawdown
+        max_dd_start = self.equity.max_drawdown_start
+        max_dd_end = self.equity.max_drawdown_end
+        max_dd_dur = self.equity.max_drawdown_duration
 
         # Equity statistics
-        self.statistics["sharpe"] = perf.create_sharpe_ratio(
-            returns_s, self.periods
-        )
+        self.statistics["sharpe"] = self.equity.sharpe
         self.statistics["drawdowns"] = dd_s
         self.statistics["max_drawdown"] = max_dd
         self.statistics["max_drawdown_pct"] = max_dd
@@ -93,15 +118,29 @@ class TearsheetStatistics(AbstractStatistics):
         self.statistics["returns"] = returns_s
         self.statistics["rolling_sharpe"] = rolling_sharpe_s
         self.statistics["cum_returns"] = cum_returns_s
-        self.statistics["total_return"] = cum_returns_s[-1] - 1
+        self.statistics["total_return"] = cum_returns_s.iloc[-1] - 1
 
         positions = self._get_positions()
         if positions is not None:
             self.statistics["positions"] = positions
 
+        # Trade ledger, one row per fill
+        self.statistics["trades"] = self.portfolio_handler.trades.to_frame()
+
+        # Per strategy PnL attribution
+        if self.portfolio_handler.attribution.positions:
+            self.statistics["strategy_pnl"] = self.portfolio_handler.attribution.get_results()
+
+        # Per sub-account statistics
+        if len(self.account_equity) > 1:
+            self.statistics["accounts"] = {
+                account: self._get_account_results(equity)
+                for account, equity in self.account_equity.items()
+            }
+
         # Benchmark self.statistics if benchmark ticker specified
-        if self.benchmark is not None:
-            equity_b = pd.Series(self.equity_benchmark).sort_index()
+        if self.benchmark_series is not None:
+            equity_b = self.benchmark_series.align(equity_s.index)
             returns_b = equity_b.pct_change().fillna(0.0)
             rolling_b = returns_b.rolling(window=self.periods)
             rolling_sharpe_b = np.sqrt(self.periods) * (
@@ -109,7 +148,7 @@ class TearsheetStatistics(AbstractStatistics):
             )
             cum_returns_b = np.exp(np.log(1 + returns_b).cumsum())
             dd_b, max_dd_b, max_dd_start_b, max_dd_end_b, max_dd_dur_b = perf.create_drawdowns(cum_returns_b)
-            self.statistics["sharpe_b"] = perf.create_sharpe_ratio(returns_b)
+            self.statistics["sharpe_b"] = perf.create_sharpe_ratio(returns_b, self.periods)
             self.statistics["drawdowns_b"] = dd_b
             self.statistics["max_drawdown_b"] = max_dd_b
             self.statistics["max_drawdown_start_b"] = max_dd_start_b
@@ -122,15 +161,39 @@ class TearsheetStatistics(AbstractStatistics):
 
         return self.statistics
         
+    def _get_account_results(self, equity):
+        """
+        Return the main statistics of the equity curve of one
+        sub-account.
+        """
+        equity.flush()
+        equity_s = equity.to_series()
+        returns_s = equity_s.pct_change().fillna(0.0)
+        cum_returns_s = np.exp(np.log(1 + returns_s).cumsum())
+        return {
+            "sharpe": equity.sharpe,
+            "drawdowns": equity.drawdowns_series(),
+            "max_drawdown": equity.max_drawdown,
+            "max_drawdown_duration": equity.max_drawdown_duration,
+            "equity": equity_s,
+            "returns": returns_s,
+            "cum_returns": cum_returns_s,
+            "total_return": cum_returns_s.iloc[-1] - 1
+        }
+
     def _get_positions(self):
         """
-        Retrieve the list of closed Positions objects from the portfolio
+        Retrieve the list of closed Positions objects from the portfolios
         and reformat into a pandas dataframe to be returned
         """
-        pos = self.portfolio_handler.portfolio.closed_positions
+        multiple = len(self.portfolio_handler.portfolios) > 1
         a = []
-        for p in pos:
-            a.append(p.__dict__)
+        for account, portfolio in self.portfolio_handler.portfolios.items():
+            for p in portfolio.closed_positions:
+                row = dict(p.__dict__)
+                if multiple:
+                    row["account"] = account
+                a.append(row)
         if len(a) == 0:
             # There are no closed positions
             return None
@@ -144,6 +207,10 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Plots cumulative rolling returns versus some benchmark.
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from matplotlib.ticker import FuncFormatter
+
         equity = stats['cum_returns']
         if ax is None:
             ax = plt.gca()
@@ -188,6 +255,10 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Plots the underwater curve
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from matplotlib.ticker import FuncFormatter
+
         def format_perc(x, pos):
             return '%.0f%%' % x
 
@@ -216,6 +287,10 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Plots a heatmap of the monthly returns.
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from matplotlib import cm
+
         returns = stats['returns']
         if ax is None:
             ax = plt.gca()
@@ -251,6 +326,9 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Plots a barplot of returns by year.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import FuncFormatter
+
         def format_perc(x, pos):
             return '%.0f%%' % x
 
@@ -277,6 +355,9 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Outputs the statistics for the equity curve.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import FuncFormatter
+
         def format_perc(x, pos):
             return '%.0f%%' % x
 
@@ -335,7 +416,7 @@ class TearsheetStatistics(AbstractStatistics):
         if self.benchmark is not None:
             returns_b = stats['returns_b']
             equity_b = stats['cum_returns_b']
-            tot_ret_b = equity_b[-1] - 1.0
+            tot_ret_b = equity_b.iloc[-1] - 1.0
             cagr_b = perf.create_cagr(equity_b)
             sharpe_b = self.statistics["sharpe_b"]
             sortino_b = perf.create_sortino_ratio(returns_b)            
@@ -370,6 +451,9 @@ class TearsheetStatistics(AbstractStatistics):
         """
         Outputs the statistics for various time frames.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import FuncFormatter
+
         def format_perc(x, pos):
             return '%.0f%%' % x
 
@@ -432,7 +516,7 @@ class TearsheetStatistics(AbstractStatistics):
                 horizontalalignment='right')
 
         ax.text(0.5, 0.7, 'Final Equity', fontsize=9)
-        ax.text(9.5, 0.7, '{:.2f}'.format(stats["equity"][-1]), fontsize=9, fontweight='bold', horizontalalignment='right')
+        ax.text(9.5, 0.7, '{:.2f}'.format(stats["equity"].iloc[-1]), fontsize=9, fontweight='bold', horizontalalignment='right')
 
         ax.set_title('Time', fontweight='bold')
         ax.grid(False)
@@ -448,10 +532,19 @@ class TearsheetStatistics(AbstractStatistics):
         ax.axis([0, 10, 0, 10])
         return ax
 
-    def plot_results(self, filename=None):
+    def plot_results(self, filename=None, show=True):
         """
         Plot the Tearsheet
+
+        Parameters:
+        filename - The image file the figure is saved to, or None.
+        show - Whether to show the figure, else it is closed once
+            saved.
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.gridspec as gridspec
+        import seaborn as sns
+
         rc = {
             'lines.linewidth': 1.0,
             'axes.facecolor': '0.995',
@@ -495,10 +588,13 @@ class TearsheetStatistics(AbstractStatistics):
         
         plt.subplots_adjust(left=0.1, right=0.9, top=0.95, bottom=0.05)
         # Plot the figure
-        plt.show()
+        if show:
+            plt.show()
 
         if filename is not None:
             fig.savefig(filename, dpi=150, bbox_inches='tight')
+        if not show:
+            plt.close(fig)
 
     def get_filename(self, filename=""):
         if filename == "":
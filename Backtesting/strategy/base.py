@@ -1,5 +1,10 @@
 from abc import ABCMeta, abstractmethod
 
+from ..event import EventType
+from ..portfolio_handler.position_view import POSITION_FIELDS
+from ..indicator.registry import IndicatorRegistry
+from ..data_handler.columns import check_columns
+
 
 class AbstractStrategy(object):
     """
@@ -16,6 +21,10 @@ class AbstractStrategy(object):
 
     __metaclass__ = ABCMeta
 
+    # Tag put on the signals of the strategy, used to attribute
+    # fills and PnL when several strategies run together.
+    strategy_id = None
+
     @abstractmethod
     def calculate_signals(self, event):
         """
@@ -23,41 +32,170 @@ class AbstractStrategy(object):
         """
         raise NotImplementedError("Should implement calculate_signals()")
 
+    # The IndicatorRegistry shared by the strategies of a backtest
+    indicators = None
+
     def set_portfolio(self, portfolio_handler):
         self.portfolio_handler = portfolio_handler
-    
-    def get_symbol_position(self, symbol):
-
-        key = ["symbol", "quantity", "unavailable_quantity",
-        "available_quantity", "price", "total_commission",
-        "avg_price", "market_value"]
-
-        position_dict = {k:0 for k in key}
-        position_dict["symbol"] = symbol
-        try:
-            position = self.portfolio_handler.portfolio.positions[symbol]
-        except:
-            pass
-        else:
-            position_dict["quantity"] = position.quantity
-            position_dict["unavailable_quantity"] = position.unavailable_quantity
-            position_dict["available_quantity"] = position.available_quantity
-            position_dict["price"] = position.price
-            position_dict["total_commission"] = position.total_commission
-            position_dict["avg_price"] = position.avg_price
-            position_dict["market_value"] = position.market_value
-        
+
+    def set_indicators(self, indicators):
+        self.indicators = indicators
+
+    # The Scheduler of the backtest
+    scheduler = None
+
+    def set_scheduler(self, scheduler):
+        self.scheduler = scheduler
+        self.register_callbacks(scheduler)
+
+    def register_callbacks(self, scheduler):
+        """
+        Register the periodic callbacks of the strategy, e.g.
+        scheduler.schedule("month_end", self.rebalance). Called by
+        the backtest once the data is loaded. A strategy which only
+        trades from its callbacks can leave calculate_signals empty.
+        """
+        pass
+
+    def indicator(self, cls, symbol, *args, **params):
+        """
+        Return the indicator cls of a symbol with the given
+        parameters, e.g. self.indicator(SMA, symbol, 20). It is
+        shared with the other strategies asking for it and updated
+        by the backtest on every bar of the symbol, before
+        calculate_signals is called.
+        """
+        if self.indicators is None:
+            self.indicators = IndicatorRegistry()
+        return self.indicators.get(cls, symbol, *args, **params)
+
+    def get_symbols(self):
+        """
+        Return the symbols whose bars the strategy listens to, or
+        None for every symbol. A strategy declaring its symbols only
+        receives their bars, and the backtest only streams the
+        symbols some strategy listens to, so it must also list the
+        symbols it trades.
+        """
+        return None
+
+    def get_indicator_columns(self):
+        """
+        Return a dict of the indicator columns the strategy needs,
+        name to an indicator or a function of the DataFrame of a
+        symbol, e.g. {"sma_20": SMA(20)}. The data handler computes
+        them once over the whole data, vectorized, and passes their
+        values with every bar in event.columns. Only indicators
+        which don't depend on the portfolio can be precomputed.
+        """
+        return {}
+
+    def get_position(self, symbol, account=None):
+        """
+        Return a read-only view of the position of a symbol. The
+        view is cached by the Portfolio, so calling this on every
+        bar does not allocate.
+        """
+        return self.portfolio_handler.get_portfolio(account).position_view(symbol)
+
+    def get_positions(self, symbols=None, account=None):
+        """
+        Return the positions of the given symbols (default all
+        open positions) as a structured NumPy array.
+        """
+        return self.portfolio_handler.get_portfolio(account).positions_array(symbols)
+
+    def get_risk_metrics(self):
+        """
+        Return the OnlineRiskMetrics of the running backtest, with
+        the rolling volatility, VaR and beta of the equity curve.
+        """
+        return self.portfolio_handler.risk_metrics
+
+    def get_symbol_position(self, symbol, account=None):
+        """
+        Return the position of a symbol as a dict. Prefer
+        get_position, which does not build a new dict per call.
+        """
+        view = self.get_position(symbol, account)
+        position_dict = {"symbol": symbol}
+        for k in POSITION_FIELDS:
+            position_dict[k] = getattr(view, k)
         return position_dict
 
 
 
 class Strategies(AbstractStrategy):
     """
-    Strategies is a collection of strategy
+    Strategies is a collection of strategy.
+
+    Every child strategy without a strategy_id is given one made
+    of its class name and position, so that its signals can be
+    attributed.
+
+    A BarEvent is only passed to the children listening to its
+    symbol (see get_symbols), in their order, from a table of
+    symbol to children built once per symbol. Other events are
+    passed to every child.
     """
     def __init__(self, *strategies):
         self._lst_strategies = strategies
+        for i, strategy in enumerate(strategies):
+            if strategy.strategy_id is None:
+                strategy.strategy_id = "%s_%d" % (type(strategy).__name__, i)
+        self._symbols = []
+        for strategy in strategies:
+            symbols = strategy.get_symbols()
+            self._symbols.append(None if symbols is None else frozenset(symbols))
+        self._routes = {}
 
-    def calculate_signals(self, event):
+    def _route(self, symbol):
+        route = tuple(
+            strategy for strategy, symbols in zip(self._lst_strategies, self._symbols)
+            if symbols is None or symbol in symbols
+        )
+        self._routes[symbol] = route
+        return route
+
+    def get_symbols(self):
+        if any(symbols is None for symbols in self._symbols):
+            return None
+        return set().union(*self._symbols)
+
+    def set_portfolio(self, portfolio_handler):
+        self.portfolio_handler = portfolio_handler
+        for strategy in self._lst_strategies:
+            strategy.set_portfolio(portfolio_handler)
+
+    def set_indicators(self, indicators):
+        self.indicators = indicators
+        for strategy in self._lst_strategies:
+            strategy.set_indicators(indicators)
+
+    def set_scheduler(self, scheduler):
+        self.scheduler = scheduler
+        for strategy in self._lst_strategies:
+            strategy.set_scheduler(scheduler)
+
+    def get_indicator_columns(self):
+        """
+        Merge the indicator columns of the strategies. A name
+        declared by several strategies must have the same spec,
+        otherwise a ValueError is raised.
+        """
+        columns = {}
         for strategy in self._lst_strategies:
+            for name, spec in strategy.get_indicator_columns().items():
+                check_columns(columns, name, spec)
+                columns.setdefault(name, spec)
+        return columns
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR:
+            strategies = self._routes.get(event.symbol)
+            if strategies is None:
+                strategies = self._route(event.symbol)
+        else:
+            strategies = self._lst_strategies
+        for strategy in strategies:
             strategy.calculate_signals(event)
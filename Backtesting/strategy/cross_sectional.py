@@ -0,0 +1,185 @@
+import numpy as np
+
+from .base import AbstractStrategy
+from ..event import EventType
+from ..indicator.base import FIELDS
+
+
+def rank(x):
+    """
+    Return the cross-sectional ranks of x, 0 for the lowest value,
+    with NaN for the missing values.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    ranks = np.full(len(x), np.nan)
+    ranks[valid] = np.argsort(np.argsort(x[valid], kind="stable"), kind="stable")
+    return ranks
+
+
+def zscore(x):
+    """
+    Return the cross-sectional z-scores of x, ignoring NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    std = np.nanstd(x)
+    if not std > 0:
+        return np.where(np.isnan(x), np.nan, 0.0)
+    return (x - np.nanmean(x)) / std
+
+
+def top_n_weights(scores, n, long_weight=1.0):
+    """
+    Return equal weights summing to long_weight on the n highest
+    scores, NaN scores excluded, found by a partial sort.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    weights = np.zeros(len(scores))
+    valid = np.flatnonzero(~np.isnan(scores))
+    n = min(n, len(valid))
+    if n == 0:
+        return weights
+    top = valid[np.argpartition(scores[valid], len(valid) - n)[len(valid) - n:]]
+    weights[top] = long_weight / n
+    return weights
+
+
+class CrossSectionalStrategy(AbstractStrategy):
+    """
+    Base class of the strategies which rank a whole universe of
+    symbols at each decision point, e.g. factor strategies.
+
+    The bars of the universe are written, as they arrive, into one
+    time x symbol matrix per field, the last lookback timestamps
+    in a ring buffer. Once every bar of a timestamp has arrived
+    (the number of bars of each timestamp is known from the data
+    handler) and every rebalance_every timestamps, compute_weights
+    is called with the matrices and returns the target weight of
+    each symbol as a NumPy array. The weights are turned into
+    orders in bulk by PortfolioHandler.rebalance, which needs a
+    position sizer with size_orders, such as
+    LiquidateRebalancePositionSizer.
+
+    A symbol without a bar at a timestamp, e.g. suspended, has NaN
+    in that row. The fields are the price fields of the bars
+    ('open', 'high', 'low', 'close', 'volume', 'adj_close') and
+    the indicator columns declared by get_indicator_columns.
+    """
+    def __init__(
+        self, universe, fields=("close",), lookback=1,
+        rebalance_every=1, order_type="MKT", account=None
+    ):
+        """
+        Parameters:
+        universe - The list of symbols ranked.
+        fields - The fields of the matrices.
+        lookback - The number of timestamps kept in the matrices.
+        rebalance_every - The number of timestamps between two
+            decision points.
+        order_type - The order type of the rebalance orders.
+        account - The sub-account traded.
+        """
+        self.universe = list(universe)
+        self.symbols = np.array(self.universe)
+        self.fields = tuple(fields)
+        self.lookback = lookback
+        self.rebalance_every = rebalance_every
+        self.order_type = order_type
+        self.account = account
+        self._codes = {symbol: i for i, symbol in enumerate(self.universe)}
+        n = len(self.universe)
+        # Each row is written twice, at i and i + lookback, so that
+        # the last lookback rows are always a contiguous view
+        self._data = {
+            field: np.full((2 * lookback, n), np.nan) for field in self.fields
+        }
+        self._times = np.empty(2 * lookback, dtype=object)
+        self._row = -1
+        self.rows = 0
+        self.timestamp = None
+        self._received = 0
+        self._expected = None
+        self._timestamps = 0
+
+    def get_symbols(self):
+        return self.universe
+
+    def compute_weights(self, fields, timestamps):
+        """
+        Return the target weight of each symbol of the universe, as
+        an array in the order of the universe, or None to keep the
+        portfolio unchanged.
+
+        Parameters:
+        fields - Dict of field name to its (lookback x symbols)
+            matrix, the oldest timestamp first.
+        timestamps - The timestamps of the rows of the matrices.
+        """
+        raise NotImplementedError("Should implement compute_weights()")
+
+    def get_fields(self):
+        """
+        Return the dict of field name to its (rows x symbols)
+        matrix, views of the ring buffer, the oldest row first.
+        """
+        rows = min(self.rows, self.lookback)
+        start = self._row + self.lookback + 1 - rows
+        return {
+            field: data[start:start + rows] for field, data in self._data.items()
+        }
+
+    def _new_row(self, timestamp):
+        self._row = (self._row + 1) % self.lookback
+        for data in self._data.values():
+            data[self._row] = np.nan
+            data[self._row + self.lookback] = np.nan
+        self._times[self._row] = timestamp
+        self._times[self._row + self.lookback] = timestamp
+        self.rows += 1
+        self.timestamp = timestamp
+        self._received = 0
+
+    def calculate_signals(self, event):
+        if event.type != EventType.BAR:
+            return
+        column = self._codes.get(event.symbol)
+        if column is None:
+            return
+        if self._expected is None:
+            self._expected = self.portfolio_handler.data_handler.get_bar_counts(self.universe)
+        if event.timestamp != self.timestamp:
+            self._new_row(event.timestamp)
+
+        row = self._row
+        for field, data in self._data.items():
+            attr = FIELDS.get(field)
+            value = getattr(event, attr) if attr is not None else event.columns[field]
+            data[row, column] = value
+            data[row + self.lookback, column] = value
+        self._received += 1
+
+        if self._received == self._expected.get(event.timestamp):
+            self._on_timestamp()
+
+    def _on_timestamp(self):
+        """
+        Called once every bar of the universe at the current
+        timestamp has arrived.
+        """
+        self._timestamps += 1
+        if self.rows < self.lookback:
+            return
+        if (self._timestamps - self.lookback) % self.rebalance_every != 0:
+            return
+        fields = self.get_fields()
+        start = self._row + 1
+        weights = self.compute_weights(fields, self._times[start:start + self.lookback])
+        if weights is None:
+            return
+        weights = np.nan_to_num(np.asarray(weights, dtype=np.float64))
+        held = np.flatnonzero(weights)
+        self.portfolio_handler.rebalance(
+            dict(zip(self.symbols[held].tolist(), weights[held].tolist())),
+            order_type=self.order_type, account=self.account,
+            strategy_id=self.strategy_id
+        )
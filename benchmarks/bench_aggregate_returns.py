@@ -0,0 +1,67 @@
+"""
+Benchmark of performance.aggregate_returns on a multi-decade daily
+return series and a multi-year minute series, against the original
+groupby with a Python function per group.
+
+Run from the repository root:
+    python benchmarks/bench_aggregate_returns.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Backtesting.statistics.performance as perf
+
+
+def groupby_aggregate_returns(returns, convert_to):
+    def cumulate_returns(x):
+        return np.exp(np.log(1 + x).cumsum()).iloc[-1] - 1
+
+    keys = {
+        'weekly': [lambda x: x.year, lambda x: x.month, lambda x: x.isocalendar()[1]],
+        'monthly': [lambda x: x.year, lambda x: x.month],
+        'yearly': [lambda x: x.year],
+    }[convert_to]
+    return returns.groupby(keys).apply(cumulate_returns)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(name, returns, n_groupby):
+    print("%s: %d points" % (name, len(returns)))
+    sample = returns.iloc[:n_groupby]
+    for convert_to in ('weekly', 'monthly', 'yearly'):
+        result, vector_time = timed(perf.aggregate_returns, returns, convert_to)
+        expected, groupby_time = timed(groupby_aggregate_returns, sample, convert_to)
+        groupby_time *= len(returns) / float(len(sample))
+        check = perf.aggregate_returns(sample, convert_to)
+        same = check.index.equals(expected.index) and np.allclose(check.values, expected.values)
+        print("  %-8s vectorized %8.3fs  groupby %8.3fs  (estimated from %d points, "
+              "same result: %s, %d periods)" % (
+                  convert_to, vector_time, groupby_time, len(sample), same, len(result)))
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    index = pd.bdate_range("1980-01-01", "2019-12-31")
+    daily = pd.Series(rng.normal(0.0003, 0.01, len(index)), index=index)
+    run("daily, 40 years", daily, len(daily))
+
+    days = pd.bdate_range("2010-01-01", "2019-12-31")
+    minutes = pd.timedelta_range("09:30:00", periods=240, freq="min")
+    index = pd.DatetimeIndex((days.values[:, np.newaxis] + minutes.values).ravel())
+    minute = pd.Series(rng.normal(0.0, 0.0005, len(index)), index=index)
+    run("minute, 10 years", minute, len(minute) // 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the decision step of CrossSectionalStrategy on a
+universe of 5000 symbols: writing the bars of a timestamp into the
+field matrix, and ranking a 20-day momentum into top-decile
+weights, against sorting the symbols in Python.
+
+Run from the repository root:
+    python benchmarks/bench_cross_sectional.py
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backtesting.event import BarEvent
+from Backtesting.strategy.cross_sectional import CrossSectionalStrategy, top_n_weights
+
+
+N_SYMBOLS = 5000
+LOOKBACK = 20
+N_DECISIONS = 200
+
+
+class Momentum(CrossSectionalStrategy):
+    def compute_weights(self, fields, timestamps):
+        close = fields["close"]
+        return top_n_weights(close[-1] / close[0] - 1.0, N_SYMBOLS // 10)
+
+
+def python_weights(closes):
+    momentum = {s: c[-1] / c[0] - 1.0 for s, c in closes.items()}
+    top = sorted(momentum, key=momentum.get, reverse=True)[:N_SYMBOLS // 10]
+    return {s: 1.0 / len(top) for s in top}
+
+
+def main():
+    rng = np.random.default_rng(1)
+    universe = ["S%05d" % i for i in range(N_SYMBOLS)]
+    prices = 10.0 * np.exp(np.cumsum(rng.normal(0, 0.02, (LOOKBACK, N_SYMBOLS)), axis=0))
+
+    strategy = Momentum(universe, lookback=LOOKBACK)
+    start = datetime.datetime(2020, 1, 1)
+    bars = [
+        BarEvent(s, start + datetime.timedelta(days=d), True, 1, 1, 1, prices[d, i], 100)
+        for d in range(LOOKBACK) for i, s in enumerate(universe)
+    ]
+    t0 = time.perf_counter()
+    for bar in bars:
+        strategy._expected = {bar.timestamp: -1}
+        strategy.calculate_signals(bar)
+    write_time = (time.perf_counter() - t0) / len(bars)
+
+    fields = strategy.get_fields()
+    t0 = time.perf_counter()
+    for _ in range(N_DECISIONS):
+        weights = strategy.compute_weights(fields, None)
+    numpy_time = (time.perf_counter() - t0) / N_DECISIONS
+
+    closes = {s: list(prices[:, i]) for i, s in enumerate(universe)}
+    t0 = time.perf_counter()
+    for _ in range(N_DECISIONS // 10):
+        expected = python_weights(closes)
+    python_time = (time.perf_counter() - t0) / (N_DECISIONS // 10)
+
+    held = set(np.array(universe)[weights > 0])
+    print("symbols: %d, lookback: %d" % (N_SYMBOLS, LOOKBACK))
+    print("bar written into the matrix: %8.2fus" % (write_time * 1e6))
+    print("numpy ranking per decision:  %8.3fms" % (numpy_time * 1e3))
+    print("python sort per decision:    %8.3fms  (same names: %s)" % (
+        python_time * 1e3, held == set(expected)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of performance.create_drawdowns on a 1M-point minute
+equity curve, against the original loop over the points.
+
+Run from the repository root:
+    python benchmarks/bench_drawdowns.py
+"""
+import os
+import sys
+import time
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Backtesting.statistics.performance as perf
+
+
+N_POINTS = 1000000
+
+
+def loop_drawdowns(returns):
+    idx = returns.index
+    hwm = np.zeros(len(idx))
+    for t in range(1, len(idx)):
+        hwm[t] = max(hwm[t - 1], returns.iloc[t])
+    with np.errstate(divide="ignore"):
+        drawdown = pd.Series((hwm - returns.values) / hwm, index=idx)
+    drawdown.iloc[0] = 0.0
+    check = np.where(drawdown == 0, 0, 1)
+    duration = max(sum(1 for i in g if i == 1) for k, g in groupby(check))
+    mdd = np.max(drawdown)
+    end = drawdown.idxmax()
+    start = drawdown[:end].sort_index(ascending=False).idxmin()
+    return drawdown, mdd, start, end, duration
+
+
+def main():
+    rng = np.random.default_rng(42)
+    index = pd.date_range("2000-01-03 09:30", periods=N_POINTS, freq="min")
+    returns = rng.normal(0.0, 0.0005, N_POINTS)
+    returns[0] = 0.0
+    cum_returns = pd.Series(np.exp(np.cumsum(returns)), index=index)
+
+    start = time.perf_counter()
+    result = perf.create_drawdowns(cum_returns)
+    vector_time = time.perf_counter() - start
+
+    n_loop = N_POINTS // 20
+    start = time.perf_counter()
+    expected = loop_drawdowns(cum_returns.iloc[:n_loop])
+    loop_time = (time.perf_counter() - start) * N_POINTS / n_loop
+
+    check = perf.create_drawdowns(cum_returns.iloc[:n_loop])
+    same = (
+        np.allclose(check[0].values, expected[0].values)
+        and check[2:] == expected[2:]
+    )
+
+    print("points: %d" % N_POINTS)
+    print("vectorized:  %8.3fs  (max drawdown %.4f, duration %d)" % (
+        vector_time, result[1], result[4]))
+    print("loop:        %8.3fs  (estimated from %d points, same result: %s)" % (
+        loop_time, n_loop, same))
+
+
+if __name__ == "__main__":
+    main()
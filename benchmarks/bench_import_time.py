@@ -0,0 +1,57 @@
+"""
+Benchmark of the start up time of a headless backtest process:
+importing Backtesting.backtest in a fresh interpreter, against the
+same import followed by the plotting and regression libraries it
+used to load eagerly (matplotlib, seaborn, scipy.stats).
+
+Run from the repository root:
+    python benchmarks/bench_import_time.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPEAT = 5
+HEAVY = ("matplotlib", "seaborn", "scipy")
+
+LAZY = "import Backtesting.backtest"
+EAGER = (
+    "import Backtesting.backtest; import matplotlib.pyplot; "
+    "import seaborn; import scipy.stats"
+)
+
+
+def time_import(code):
+    """
+    Return the median wall time of running code in a fresh
+    interpreter, in seconds.
+    """
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    loaded = subprocess.run(
+        [sys.executable, "-c", LAZY + "; import sys; print(' '.join("
+         "m for m in %r if m in sys.modules))" % (HEAVY,)],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.split()
+    baseline = time_import("pass")
+    lazy = time_import(LAZY)
+    eager = time_import(EAGER)
+    print("interpreter start: %.3fs" % baseline)
+    print("import Backtesting.backtest: %.3fs" % lazy)
+    print("with plotting and scipy: %.3fs" % eager)
+    print("heavy modules loaded by the import: %s" % (", ".join(loaded) or "none"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the PendingOrderBook with 100k resting limit and stop
+orders, against a linear scan of all of the pending orders.
+
+Run from the repository root:
+    python benchmarks/bench_order_book.py
+"""
+import os
+import sys
+import time
+import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backtesting.event import BarEvent, OrderEvent
+from Backtesting.execution_handler.order_book import PendingOrderBook
+
+
+N_ORDERS = 100000
+N_SYMBOLS = 100
+N_BARS = 20000
+
+
+def make_orders(rng):
+    symbols = rng.integers(0, N_SYMBOLS, N_ORDERS)
+    order_types = rng.choice(["LMT", "STP"], N_ORDERS)
+    actions = rng.choice(["BUY", "SELL"], N_ORDERS)
+    # Far from the market so that most orders keep resting
+    offsets = rng.uniform(5.0, 50.0, N_ORDERS)
+    above = (order_types == "LMT") == (actions == "SELL")
+    prices = np.where(above, 100.0 + offsets, 100.0 - offsets)
+    return [
+        OrderEvent("S%d" % s, t, 100, a, price=float(p))
+        for s, t, a, p in zip(symbols, order_types, actions, prices)
+    ]
+
+
+def make_bars(rng):
+    start = datetime.datetime(2010, 1, 4)
+    bars = []
+    for i in range(N_BARS):
+        mid = 100.0 + rng.normal(0.0, 3.0)
+        bars.append(BarEvent(
+            "S%d" % (i % N_SYMBOLS), start + datetime.timedelta(minutes=i),
+            False, mid, mid + 1.0, mid - 1.0, mid, 1000
+        ))
+    return bars
+
+
+def scan_match(pending, bar):
+    triggered = []
+    for order in pending:
+        if order.symbol != bar.symbol:
+            continue
+        up = (order.order_type == "LMT") == (order.action == "SELL")
+        if (up and order.price <= bar.high_price) or (not up and order.price >= bar.low_price):
+            triggered.append(order)
+    for order in triggered:
+        pending.remove(order)
+    return triggered
+
+
+def main():
+    rng = np.random.default_rng(42)
+    orders = make_orders(rng)
+    bars = make_bars(rng)
+
+    book = PendingOrderBook()
+    start = time.perf_counter()
+    for order in orders:
+        book.add(order, bars[0].timestamp)
+    add_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    heap_fills = sum(len(book.match(bar)) for bar in bars)
+    heap_time = time.perf_counter() - start
+
+    pending = list(orders)
+    n_scan = N_BARS // 100
+    start = time.perf_counter()
+    scan_fills = sum(len(scan_match(pending, bar)) for bar in bars[:n_scan])
+    scan_time = (time.perf_counter() - start) * N_BARS / n_scan
+
+    print("resting orders: %d, bars: %d" % (N_ORDERS, N_BARS))
+    print("add:          %8.3fs" % add_time)
+    print("heap match:   %8.3fs  (%.2f us/bar, %d fills)" % (
+        heap_time, heap_time / N_BARS * 1e6, heap_fills))
+    print("linear scan:  %8.3fs  (estimated from %d bars, %d fills)" % (
+        scan_time, n_scan, scan_fills))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of routing the bars of 200 symbols to 200 single-symbol
+strategies held by Strategies, against calling every strategy for
+every bar and letting it filter on the symbol.
+
+Run from the repository root:
+    python benchmarks/bench_routing.py
+"""
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backtesting.event import BarEvent, EventType
+from Backtesting.strategy.base import AbstractStrategy, Strategies
+
+
+N_SYMBOLS = 200
+N_TIMESTAMPS = 250
+
+
+class SingleSymbol(AbstractStrategy):
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bars = 0
+
+    def get_symbols(self):
+        return [self.symbol]
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR and event.symbol == self.symbol:
+            self.bars += 1
+
+
+class Broadcast(Strategies):
+    def calculate_signals(self, event):
+        for strategy in self._lst_strategies:
+            strategy.calculate_signals(event)
+
+
+def run(strategies, bars):
+    start = time.perf_counter()
+    for bar in bars:
+        strategies.calculate_signals(bar)
+    return time.perf_counter() - start
+
+
+def main():
+    symbols = ["S%03d" % i for i in range(N_SYMBOLS)]
+    start = datetime.datetime(2020, 1, 1)
+    bars = [
+        BarEvent(symbol, start + datetime.timedelta(days=d), True, 1, 1, 1, 1, 100)
+        for d in range(N_TIMESTAMPS) for symbol in symbols
+    ]
+
+    routed = [SingleSymbol(s) for s in symbols]
+    routed_time = run(Strategies(*routed), bars)
+    broadcast = [SingleSymbol(s) for s in symbols]
+    broadcast_time = run(Broadcast(*broadcast), bars)
+
+    same = [s.bars for s in routed] == [s.bars for s in broadcast]
+    print("%d strategies, %d bars" % (N_SYMBOLS, len(bars)))
+    print("routed:     %8.3fs" % routed_time)
+    print("broadcast:  %8.3fs  (same bars received: %s)" % (broadcast_time, same))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,9 @@ class BuyAndHoldStrategy(AbstractStrategy):
         self.base_quantity = base_quantity
         self.invested = False
 
+    def get_symbols(self):
+        return [self.symbol]
+
     def calculate_signals(self, event):
         if (
             event.type == EventType.BAR and
@@ -29,7 +32,8 @@ class BuyAndHoldStrategy(AbstractStrategy):
             if not self.invested:
                 signal = SignalEvent(
                     self.symbol, event.timestamp, "BUY",
-                    suggested_quantity=self.base_quantity
+                    suggested_quantity=self.base_quantity,
+                    strategy_id=self.strategy_id
                 )
                 self.events_queue.put(signal)
                 self.invested = True
@@ -23,33 +23,37 @@ class BuyAndHoldStrategy(AbstractStrategy):
         self.pre_price = 0
         self.bar_count = 0
 
+    def get_symbols(self):
+        return [self.symbol]
+
     def calculate_signals(self, event):
         if (
             event.type == EventType.BAR and
             event.symbol == self.symbol
         ):
             
-            position = self.get_symbol_position(self.symbol)
-            avg_price = position["avg_price"]
+            avg_price = self.get_position(self.symbol).avg_price
             if avg_price == 0:
                 avg_price = self.pre_price
             if self.pre_price == 0 or (event.close_price <= avg_price * 0.9 and event.close_price >= avg_price * 0.85):
                 signal = SignalEvent(
                     self.symbol, event.timestamp, "BUY",
-                    suggested_quantity=self.base_quantity
+                    suggested_quantity=self.base_quantity,
+                    strategy_id=self.strategy_id
                 )
                 self.events_queue.put(signal)
                 self.pre_price = event.close_price
             elif event.close_price >= avg_price * 1.05 or event.close_price < avg_price * 0.8:
                 signal = SignalEvent(
                     self.symbol, event.timestamp, "SELL",
-                    suggested_quantity=self.base_quantity
+                    suggested_quantity=self.base_quantity,
+                    strategy_id=self.strategy_id
                 )
                 self.pre_price = event.close_price
                 self.events_queue.put(signal)
 
 
-def run(testing, symbol_list, filename):
+def run(testing, symbol_list, filename, benchmark=None):
     # Backtest information
     title = ['Buy and Hold Example on %s' % symbol_list[0]]
     initial_equity = 100000.0
@@ -66,7 +70,7 @@ def run(testing, symbol_list, filename):
         strategy, symbol_list,
         initial_equity, start_date, end_date,
         events_queue, data_dir, output_dir, title=title,
-        benchmark = symbol_list[1]
+        benchmark=benchmark
     )
     results = backtest.start_trading(testing=testing)
     return results
@@ -75,6 +79,7 @@ def run(testing, symbol_list, filename):
 if __name__ == "__main__":
     # Configuration data
     testing = False
-    symbol_list = ["000001SZ_D", "000001SZ_D"]
+    symbol_list = ["000001SZ_D"]
+    benchmark = "000001SZ_D"
     filename = None
-    run(testing, symbol_list, filename)
+    run(testing, symbol_list, filename, benchmark)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import io
+import unittest
+import queue
+import tempfile
+import datetime
+from contextlib import redirect_stdout
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.event import EventType, SignalEvent
+from Backtesting.strategy.base import AbstractStrategy
+
+
+class TwoAccounts(AbstractStrategy):
+    """
+    Buys once on the first day in each sub-account, and once
+    without an account, which goes to the default one.
+    """
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.sent = False
+
+    def calculate_signals(self, event):
+        if event.type != EventType.BAR or event.symbol != "SPY" or self.sent:
+            return
+        self.sent = True
+        for symbol, quantity, account in (
+            ("AAPL", 100, "alpha"), ("SPY", 50, "beta"), ("SPY", 10, None)
+        ):
+            self.events_queue.put(SignalEvent(
+                symbol, event.timestamp, "BUY", quantity, account=account
+            ))
+
+
+class TestSubAccounts(unittest.TestCase):
+    def setUp(self):
+        events_queue = queue.Queue()
+        self.backtest = Backtest(
+            TwoAccounts(events_queue), ["AAPL", "SPY"],
+            {"alpha": 50000.0, "beta": 30000.0},
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Accounts"]
+        )
+        self.portfolio_handler = self.backtest.portfolio_handler
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.results = self.backtest.start_trading(testing=True)
+        self.output = output.getvalue()
+
+    def test_routing(self):
+        handler = self.portfolio_handler
+        self.assertEqual(handler.accounts, ["alpha", "beta"])
+        self.assertIs(handler.get_portfolio(), handler.portfolios["alpha"])
+        self.assertIs(handler.get_portfolio("beta"), handler.portfolios["beta"])
+        with self.assertRaises(ValueError):
+            handler.get_portfolio("gamma")
+
+    def test_fills_land_in_their_account(self):
+        alpha = self.portfolio_handler.get_portfolio("alpha")
+        beta = self.portfolio_handler.get_portfolio("beta")
+        self.assertEqual(
+            {s: p.quantity for s, p in alpha.positions.items()},
+            {"AAPL": 100, "SPY": 10}
+        )
+        self.assertEqual({s: p.quantity for s, p in beta.positions.items()}, {"SPY": 50})
+
+        # The fill of the signal without an account is labelled ''
+        labels = {"alpha": ["alpha", ""], "beta": ["beta"]}
+        trades = self.portfolio_handler.trades.to_frame()
+        for account, portfolio in (("alpha", alpha), ("beta", beta)):
+            fills = trades[trades["account"].isin(labels[account])]
+            self.assertEqual(len(fills), len(portfolio.positions))
+            cost = (fills["quantity"] * fills["price"] + fills["commission"]).sum()
+            initial = self.portfolio_handler.initial_cash[account]
+            self.assertAlmostEqual(portfolio.cur_cash, initial - cost, places=6)
+
+    def test_combined_and_account_results(self):
+        alpha = self.portfolio_handler.get_portfolio("alpha")
+        beta = self.portfolio_handler.get_portfolio("beta")
+        self.assertAlmostEqual(self.portfolio_handler.equity, alpha.equity + beta.equity)
+        self.assertAlmostEqual(self.results["equity"].iloc[-1], self.portfolio_handler.equity)
+
+        accounts = self.results["accounts"]
+        self.assertEqual(sorted(accounts), ["alpha", "beta"])
+        for account, portfolio in (("alpha", alpha), ("beta", beta)):
+            equity = accounts[account]["equity"]
+            self.assertAlmostEqual(equity.iloc[-1], portfolio.equity)
+            initial = self.portfolio_handler.initial_cash[account]
+            self.assertAlmostEqual(
+                accounts[account]["total_return"], equity.iloc[-1] / equity.iloc[0] - 1
+            )
+            self.assertLess(abs(equity.iloc[0] - initial), 0.01 * initial)
+            self.assertIn(
+                "  %s: final equity %0.2f, return %0.2f%%" % (
+                    account, equity.iloc[-1], accounts[account]["total_return"] * 100.0
+                ),
+                self.output
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import numpy as np
+
+import testcommon
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+from Backtesting.portfolio_handler.attribution import StrategyAttribution, UNATTRIBUTED
+from Backtesting.portfolio_handler.portfolio_handler import PortfolioHandler
+from Backtesting.position_sizer.naive import NaivePositionSizer
+from Backtesting.risk_manager.example import ExampleRiskManager
+from Backtesting.backtest import Backtest
+from Backtesting.strategy.base import AbstractStrategy, Strategies
+from Backtesting.event import FillEvent, SignalEvent, EventType
+
+
+class Closes(object):
+    def __init__(self):
+        self.close = {}
+
+    def get_last_close(self, symbol):
+        return self.close[symbol]
+
+
+def fill(action, quantity, price, strategy_id, symbol="AAPL"):
+    return FillEvent(
+        None, symbol, action, quantity, price, 5.0, "CN", strategy_id=strategy_id
+    )
+
+
+class TestStrategyAttribution(unittest.TestCase):
+    def test_pnl_curves(self):
+        closes = Closes()
+        attribution = StrategyAttribution(closes)
+        closes.close["X"] = 10.0
+        attribution.on_fill(fill("BUY", 100, 10.0, "s1", "X"))
+        attribution.on_fill(fill("BUY", 50, 10.0, "s2", "X"))
+        attribution.mark(datetime.date(2020, 1, 2))
+        attribution.mark(datetime.date(2020, 1, 2))
+
+        closes.close["X"] = 12.0
+        attribution.on_fill(fill("SELL", 50, 12.0, "s2", "X"))
+        attribution.on_fill(fill("BUY", 10, 12.0, None, "X"))
+        attribution.mark(datetime.date(2020, 1, 3))
+
+        self.assertEqual(attribution.positions, {"s1": {"X": 100}, "s2": {}, UNATTRIBUTED: {"X": 10}})
+        self.assertEqual(attribution.commission["s2"], 10.0)
+        results = attribution.get_results()
+        self.assertEqual(list(results.columns), ["s1", "s2", UNATTRIBUTED])
+        self.assertEqual(len(results), 2)
+        np.testing.assert_allclose(results["s1"].values, [-5.0, 195.0])
+        np.testing.assert_allclose(results["s2"].values, [-5.0, 90.0])
+        # Flat until the strategy is first seen
+        np.testing.assert_allclose(results[UNATTRIBUTED].values, [0.0, -5.0])
+
+    def test_sums_to_portfolio_pnl(self):
+        events_queue = queue.Queue()
+        data_handler = HistoricCSVDataHandler(
+            events_queue, './data/', ["AAPL", "SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1)
+        )
+        handler = PortfolioHandler(
+            100000.0, events_queue, data_handler,
+            NaivePositionSizer(), ExampleRiskManager(), tempfile.mkdtemp()
+        )
+        prices = []
+        for day in range(3):
+            # Both symbols of the day
+            data_handler.stream_next()
+            data_handler.stream_next()
+            prices.append(data_handler.get_last_close("AAPL"))
+        # Two strategies trading the same symbol at different prices
+        handler.on_fill(fill("BUY", 300, prices[0], "s1"))
+        handler.on_fill(fill("BUY", 200, prices[0] + 1.0, "s2"))
+        handler.update_portfolio_position()
+        handler.on_fill(fill("SELL", 100, prices[2], "s1"))
+        handler.on_fill(fill("SELL", 200, prices[2] - 1.0, "s2"))
+        handler.update_portfolio_value()
+        handler.record_holdings(data_handler.cur_day)
+
+        # The market values of the portfolio are rounded to cents
+        attribution = handler.attribution
+        pnl = attribution.get_pnl("s1") + attribution.get_pnl("s2")
+        self.assertAlmostEqual(pnl, handler.equity - 100000.0, places=2)
+        results = attribution.get_results()
+        self.assertAlmostEqual(results.iloc[-1].sum(), handler.equity - 100000.0, places=2)
+        self.assertEqual(attribution.positions["s2"], {})
+        self.assertAlmostEqual(
+            attribution.get_pnl("s2"), 200 * (prices[2] - 1.0 - prices[0] - 1.0) - 10.0
+        )
+
+
+class BuyOnce(AbstractStrategy):
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.sent = False
+
+    def calculate_signals(self, event):
+        if event.type != EventType.BAR or self.sent:
+            return
+        self.sent = True
+        self.events_queue.put(SignalEvent(
+            "SPY", event.timestamp, "BUY", 100, strategy_id=self.strategy_id
+        ))
+
+
+class TestBacktestAttribution(unittest.TestCase):
+    def test_matches_equity_curve(self):
+        events_queue = queue.Queue()
+        strategy = BuyOnce(events_queue)
+        backtest = Backtest(
+            Strategies(strategy), ["SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 3, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Attribution"]
+        )
+        results = backtest.start_trading(testing=True)
+        pnl = results["strategy_pnl"][strategy.strategy_id]
+        # One mark per day, valued at the closes of that day. The
+        # equity of the first day is taken before its fill
+        equity = results["equity"]
+        self.assertTrue(pnl.index.equals(equity.index))
+        trade = results["trades"].iloc[0]
+        close = backtest.data_handler.get_close_series("SPY")[equity.index[0]]
+        self.assertAlmostEqual(
+            pnl.iloc[0], 100 * (close - trade["price"]) - trade["commission"], places=6
+        )
+        np.testing.assert_allclose(
+            pnl.values[1:], equity.values[1:] - 100000.0, atol=0.01
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.strategy.base import AbstractStrategy
+from Backtesting.statistics.benchmark import BenchmarkSeries
+
+
+class Idle(AbstractStrategy):
+    def calculate_signals(self, event):
+        pass
+
+
+class TestBenchmarkSeries(unittest.TestCase):
+    def setUp(self):
+        index = pd.to_datetime(["2018-01-02", "2018-01-03", "2018-01-05"])
+        self.closes = pd.Series([10.0, 11.0, 12.0], index=index)
+        self.benchmark = BenchmarkSeries(self.closes)
+
+    def test_align(self):
+        index = pd.to_datetime([
+            "2018-01-01 00:00", "2018-01-02 10:00", "2018-01-03 00:00",
+            "2018-01-04 00:00", "2018-01-08 00:00"
+        ])
+        aligned = self.benchmark.align(index)
+        self.assertEqual(list(aligned.values), [10.0, 10.0, 11.0, 11.0, 12.0])
+        self.assertTrue(aligned.index.equals(index))
+
+    def test_asof_matches_align(self):
+        index = pd.date_range("2017-12-30", "2018-01-07", freq="6h")
+        expected = self.benchmark.align(index)
+        self.assertEqual([self.benchmark.asof(t) for t in index], list(expected.values))
+        # Going back in time resets the cursor
+        self.assertEqual(self.benchmark.asof(pd.Timestamp("2018-01-02")), 10.0)
+
+
+class TestBacktestBenchmark(unittest.TestCase):
+    def test_not_streamed(self):
+        events_queue = queue.Queue()
+        backtest = Backtest(
+            Idle(), ["AAPL"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 6, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Benchmark"], benchmark="SPY"
+        )
+        # The statistics share the series loaded by the backtest
+        self.assertIs(backtest.statistics.benchmark_series, backtest.benchmark_series)
+        results = backtest.start_trading(testing=True)
+        self.assertNotIn("SPY", backtest.data_handler.symbol_data)
+        spy = backtest.data_handler.get_close_series("SPY")
+        equity_b = results["equity_b"]
+        self.assertTrue(equity_b.index.equals(results["equity"].index))
+        np.testing.assert_array_equal(
+            equity_b.values, spy.reindex(equity_b.index, method="ffill").values
+        )
+        self.assertTrue(np.isfinite(results["sharpe_b"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
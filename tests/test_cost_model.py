@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import datetime
+
+import numpy as np
+
+import testcommon
+from Backtesting.execution_handler.cost_model import (
+    FeeRule, ScheduledCostModel, china_a_share_rules, symbol_exchange,
+    FixedSlippage, PercentSlippage, VolumeShareSlippage
+)
+
+
+class TestScheduledCostModel(unittest.TestCase):
+    def test_default_rules(self):
+        model = ScheduledCostModel()
+        self.assertEqual(model.calculate(100, 10.0, "BUY"), 5.0)
+        self.assertEqual(model.calculate(10000, 10.0, "BUY"), 80.0)
+        self.assertEqual(model.calculate(10000, 10.0, "SELL"), 180.0)
+
+    def test_array_matches_scalar(self):
+        model = ScheduledCostModel(china_a_share_rules())
+        quantity = np.array([100, 2000, 50000, 0])
+        price = np.array([10.0, 25.5, 3.2, 8.0])
+        action = np.array(["BUY", "SELL", "SELL", "BUY"])
+        symbols = ["600000SH", "000001SZ", "600000SH", "000001SZ"]
+        timestamps = [
+            datetime.datetime(2014, 1, 2), datetime.datetime(2014, 1, 2),
+            datetime.datetime(2023, 9, 1), datetime.datetime(2023, 9, 1)
+        ]
+        batch = model.calculate(quantity, price, action, symbols, timestamps)
+        single = [
+            model.calculate(q, p, a, s, t)
+            for q, p, a, s, t in zip(quantity, price, action, symbols, timestamps)
+        ]
+        np.testing.assert_allclose(batch, single)
+        self.assertEqual(batch[3], 0.0)
+
+    def test_schedule(self):
+        model = ScheduledCostModel(china_a_share_rules())
+        fees = model.breakdown(
+            [10000, 10000], [10.0, 10.0], "SELL", ["600000SH", "000001SZ"],
+            [datetime.datetime(2014, 1, 2), datetime.datetime(2023, 9, 1)]
+        )
+        np.testing.assert_allclose(fees["commission"], [30.0, 30.0])
+        np.testing.assert_allclose(fees["stamp_tax"], [100.0, 50.0])
+        # Per share on Shanghai before 2015-08-01, by value since
+        np.testing.assert_allclose(fees["transfer_fee"], [10.0, 1.0])
+        # Buys paid stamp tax before 2008-09-19
+        self.assertEqual(model.calculate(
+            10000, 10.0, "BUY", "000001SZ", datetime.datetime(2008, 1, 2)
+        ), 330.0)
+
+    def test_tiered_minimum(self):
+        model = ScheduledCostModel([
+            FeeRule("commission", rate=0.0003, minimum=5.0, max_value=100000),
+            FeeRule("commission", rate=0.0002, minimum=0.0, min_value=100000),
+        ])
+        np.testing.assert_allclose(
+            model.calculate([100, 100000], [10.0, 10.0], "BUY"), [5.0, 200.0]
+        )
+
+    def test_needs_timestamp(self):
+        model = ScheduledCostModel(china_a_share_rules())
+        with self.assertRaises(ValueError):
+            model.calculate(100, 10.0, "BUY", "000001SZ")
+
+    def test_symbol_exchange(self):
+        self.assertEqual(symbol_exchange("000001SZ_D"), "SZ")
+        self.assertEqual(symbol_exchange("600000"), "SH")
+        self.assertEqual(symbol_exchange("430047.BJ"), "BJ")
+        self.assertIsNone(symbol_exchange("AAPL"))
+
+
+class TestSlippage(unittest.TestCase):
+    def test_fixed(self):
+        np.testing.assert_allclose(
+            FixedSlippage(0.01).apply([10.0, 10.0], ["BUY", "SELL"]), [10.01, 9.99]
+        )
+        self.assertAlmostEqual(FixedSlippage(0.01).apply(10.0, "SELL"), 9.99)
+
+    def test_percent(self):
+        self.assertAlmostEqual(PercentSlippage(0.01).apply(10.0, "BUY"), 10.1)
+
+    def test_volume_share(self):
+        model = VolumeShareSlippage(price_impact=0.1)
+        self.assertAlmostEqual(model.apply(10.0, "BUY", 500, 1000), 10.25)
+        self.assertAlmostEqual(model.apply(10.0, "SELL", 500, 0), 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
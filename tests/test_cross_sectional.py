@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import numpy as np
+
+import testcommon
+from testcommon import write_universe
+from Backtesting.backtest import Backtest
+from Backtesting.position_sizer.rebalance import LiquidateRebalancePositionSizer
+from Backtesting.strategy.cross_sectional import (
+    CrossSectionalStrategy, rank, top_n_weights, zscore
+)
+
+
+class Momentum(CrossSectionalStrategy):
+    def __init__(self, universe, lookback, rebalance_every, n):
+        super().__init__(
+            universe, fields=("close",), lookback=lookback,
+            rebalance_every=rebalance_every
+        )
+        self.n = n
+        self.decisions = []
+
+    def compute_weights(self, fields, timestamps):
+        close = fields["close"]
+        self.decisions.append((timestamps.copy(), close.copy()))
+        momentum = close[-1] / close[0] - 1.0
+        return top_n_weights(momentum, self.n, 0.9)
+
+
+class TestRanking(unittest.TestCase):
+    def test_helpers(self):
+        x = np.array([3.0, np.nan, 1.0, 2.0])
+        np.testing.assert_array_equal(rank(x), [2.0, np.nan, 0.0, 1.0])
+        np.testing.assert_array_equal(top_n_weights(x, 2), [0.5, 0.0, 0.0, 0.5])
+        np.testing.assert_allclose(np.nansum(zscore(x)), 0.0, atol=1e-12)
+
+
+class TestCrossSectionalStrategy(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        drifts = {"AAA": 0.004, "BBB": -0.002, "CCC": 0.0, "DDD": 0.006, "EEE": -0.004}
+        # CCC is suspended on the 30th day
+        self.closes = write_universe(self.data_dir, drifts, missing={"CCC": [30]})
+        self.universe = sorted(drifts)
+
+    def run_backtest(self, strategy):
+        events_queue = queue.Queue()
+        backtest = Backtest(
+            strategy, self.universe, 100000.0,
+            datetime.datetime(2019, 1, 1), datetime.datetime(2019, 6, 1),
+            events_queue, self.data_dir, tempfile.mkdtemp(), title=["Momentum"],
+            position_sizer=LiquidateRebalancePositionSizer()
+        )
+        backtest.start_trading(testing=True)
+        return backtest
+
+    def test_rebalances_to_top_names(self):
+        strategy = Momentum(self.universe, lookback=20, rebalance_every=20, n=2)
+        backtest = self.run_backtest(strategy)
+        # Decisions on the 20th, 40th, 60th and 80th timestamps
+        self.assertEqual(len(strategy.decisions), 4)
+        timestamps, close = strategy.decisions[1]
+        expected = self.closes.iloc[20:40]
+        self.assertEqual(list(timestamps), list(expected.index))
+        np.testing.assert_allclose(close, expected[self.universe].values, rtol=1e-12)
+        # The suspension of CCC is a NaN in its row
+        self.assertTrue(np.isnan(close[10, self.universe.index("CCC")]))
+        positions = backtest.portfolio_handler.portfolio.positions
+        self.assertEqual(sorted(positions), ["AAA", "DDD"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import testcommon
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+from Backtesting.portfolio_handler.portfolio_handler import PortfolioHandler
+from Backtesting.position_sizer.naive import NaivePositionSizer
+from Backtesting.risk_manager.example import ExampleRiskManager
+from Backtesting.execution_handler.ashare_simulated import AShareSimulatedExecutionHandler
+from Backtesting.execution_handler.fill_model import VolumeParticipationFillModel
+from Backtesting.backtest import Backtest
+from Backtesting.strategy.base import AbstractStrategy
+from Backtesting.event import OrderEvent, FillEvent, SignalEvent, EventType
+
+
+class TestBatchExecution(unittest.TestCase):
+    def setUp(self):
+        self.events_queue = queue.Queue()
+        self.output_dir = tempfile.mkdtemp()
+        self.data_handler = HistoricCSVDataHandler(
+            self.events_queue, './data/', ["AAPL", "SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1)
+        )
+        self.portfolio_handler = PortfolioHandler(
+            10000.0, self.events_queue, self.data_handler,
+            NaivePositionSizer(), ExampleRiskManager(), self.output_dir
+        )
+        self.execution_handler = AShareSimulatedExecutionHandler(
+            self.events_queue, self.data_handler,
+            self.portfolio_handler, self.output_dir, record=False
+        )
+        self.data_handler.stream_next()
+        self.data_handler.stream_next()
+        self.events_queue.queue.clear()
+        # Hold 100 AAPL, available after the day rolls
+        self.portfolio_handler.on_fill(FillEvent(
+            None, "AAPL", "BUY", 100, 20.0, 5.0, "CN"
+        ))
+        self.portfolio_handler.update_portfolio_position()
+
+    def _fills(self):
+        fills = []
+        while not self.events_queue.empty():
+            fills.append(self.events_queue.get(False))
+        return fills
+
+    def test_same_fill_as_single_order(self):
+        order = OrderEvent("SPY", "MKT", 10, "BUY")
+        self.execution_handler.execute_order(order)
+        single = self._fills()
+        self.execution_handler.execute_orders([order])
+        batch = self._fills()
+        self.assertEqual(len(single), 1)
+        self.assertEqual(len(batch), 1)
+        for attr in ("symbol", "action", "quantity", "price", "commission"):
+            self.assertEqual(getattr(single[0], attr), getattr(batch[0], attr))
+
+    def test_sells_settle_before_buys(self):
+        spy = self.data_handler.get_last_close("SPY")
+        aapl = self.data_handler.get_last_close("AAPL")
+        # Needs the proceeds of the AAPL sale on top of the cash
+        buy_quantity = int((10000.0 + 50 * aapl) // (spy + 0.01)) - 1
+        self.assertGreater(buy_quantity * spy, 10000.0)
+        self.execution_handler.execute_orders([
+            OrderEvent("SPY", "MKT", buy_quantity, "BUY"),
+            OrderEvent("AAPL", "MKT", 60, "SELL"),
+            OrderEvent("AAPL", "MKT", 60, "SELL"),
+        ])
+        fills = self._fills()
+        self.assertEqual(
+            [(f.symbol, f.action, f.quantity) for f in fills],
+            [("AAPL", "SELL", 60), ("AAPL", "SELL", 40), ("SPY", "BUY", buy_quantity)]
+        )
+
+    def test_batch_matches_single_orders(self):
+        spy = self.data_handler.get_last_close("SPY")
+        aapl = self.data_handler.get_last_close("AAPL")
+        total = self.portfolio_handler.portfolio.cur_cash + 100 * aapl
+        orders = [
+            OrderEvent("AAPL", "MKT", 60, "SELL"),
+            OrderEvent("AAPL", "MKT", 60, "SELL"),
+            # Needs the proceeds of the sells
+            OrderEvent("SPY", "MKT", int(0.8 * total / spy), "BUY"),
+            # Out of cash
+            OrderEvent("SPY", "MKT", int(0.5 * total / spy), "BUY"),
+            OrderEvent("SPY", "MKT", 10, "BUY"),
+        ]
+        for order in orders:
+            self.execution_handler.execute_order(order)
+        single = self._fills()
+        # Applying the fills releases what the handler held for them
+        for fill_event in single:
+            self.portfolio_handler.on_fill(fill_event)
+        self.assertEqual(self.execution_handler._unapplied, {})
+        # The same orders as a batch, from the same portfolio
+        self.setUp()
+        self.execution_handler.execute_orders(orders)
+        batch = self._fills()
+        self.assertEqual(
+            [(f.symbol, f.action, f.quantity) for f in batch],
+            [("AAPL", "SELL", 60), ("AAPL", "SELL", 40),
+             ("SPY", "BUY", int(0.8 * total / spy)), ("SPY", "BUY", 10)]
+        )
+        self.assertEqual(len(single), len(batch))
+        for s, b in zip(single, batch):
+            for attr in ("symbol", "action", "quantity", "price", "commission"):
+                self.assertEqual(getattr(s, attr), getattr(b, attr))
+
+    def test_portfolio_fill_releases_held_amounts(self):
+        portfolio = self.portfolio_handler.portfolio
+        cash = portfolio.cur_cash
+        self.execution_handler.execute_orders([OrderEvent("AAPL", "MKT", 100, "SELL")])
+        fill_event = self._fills()[0]
+        proceeds = fill_event.quantity * fill_event.price - fill_event.commission
+        # Held while the fill is on the queue
+        self.assertAlmostEqual(self.execution_handler._cash(portfolio), cash + proceeds)
+        self.assertEqual(self.execution_handler._available(portfolio, "AAPL"), 0)
+        # Applied straight to the portfolio handler, without a backtest
+        self.portfolio_handler.on_fill(fill_event)
+        self.assertEqual(self.execution_handler._unapplied, {})
+        self.assertAlmostEqual(self.execution_handler._cash(portfolio), cash + proceeds)
+        self.assertNotIn("AAPL", portfolio.positions)
+
+
+class BuyOnce(AbstractStrategy):
+    """
+    Buys 300 AAPL on the first bar, once 'DAY' and then 'GTC'.
+    """
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.sent = False
+
+    def calculate_signals(self, event):
+        if event.type != EventType.BAR or event.symbol != "AAPL" or self.sent:
+            return
+        self.sent = True
+        for strategy_id, time_in_force in (("day", "DAY"), ("gtc", "GTC")):
+            self.events_queue.put(SignalEvent(
+                "AAPL", event.timestamp, "BUY", 300, strategy_id=strategy_id,
+                time_in_force=time_in_force
+            ))
+
+
+class TestPartialFills(unittest.TestCase):
+    def setUp(self):
+        events_queue = queue.Queue()
+        output_dir = tempfile.mkdtemp()
+        data_handler = HistoricCSVDataHandler(
+            events_queue, './data/', ["AAPL", "SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1)
+        )
+        self.portfolio_handler = PortfolioHandler(
+            100000.0, events_queue, data_handler,
+            NaivePositionSizer(), ExampleRiskManager(), output_dir
+        )
+        # About 120 to 150 shares a day on the AAPL volumes of
+        # January 2010, so one lot of 100 a day
+        self.fill_model = VolumeParticipationFillModel(participation=1e-6)
+        execution_handler = AShareSimulatedExecutionHandler(
+            events_queue, data_handler, self.portfolio_handler, output_dir,
+            record=False, fill_model=self.fill_model
+        )
+        self.backtest = Backtest(
+            BuyOnce(events_queue), ["AAPL", "SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1),
+            events_queue, './data/', output_dir, title=["Partial"],
+            data_handler=data_handler, portfolio_handler=self.portfolio_handler,
+            execution_handler=execution_handler
+        )
+        self.backtest.start_trading(testing=True)
+
+    def test_remainders_fill_on_later_bars(self):
+        trades = self.portfolio_handler.trades.to_frame()
+        # The 'DAY' order takes the first lot and its remainder
+        # expires at the end of the day
+        day = trades[trades["strategy_id"] == "day"]
+        self.assertEqual(list(day["quantity"]), [100])
+        # The 'GTC' order is filled over the three following days
+        gtc = trades[trades["strategy_id"] == "gtc"]
+        self.assertEqual(list(gtc["quantity"]), [100, 100, 100])
+        timestamps = sorted(set(gtc["timestamp"]))
+        self.assertEqual(len(timestamps), 3)
+        self.assertGreater(timestamps[0], day["timestamp"].iloc[0])
+        self.assertEqual(len(self.fill_model), 0)
+
+        portfolio = self.portfolio_handler.portfolio
+        self.assertEqual(portfolio.positions["AAPL"].quantity, 400)
+        cost = (trades["quantity"] * trades["price"] + trades["commission"]).sum()
+        self.assertAlmostEqual(portfolio.cur_cash, 100000.0 - cost, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import datetime
+
+import testcommon
+from Backtesting.execution_handler.fill_model import VolumeParticipationFillModel
+from Backtesting.event import OrderEvent, BarEvent
+
+
+def bar(symbol, day, volume):
+    return BarEvent(
+        symbol, datetime.datetime(2020, 1, day), True,
+        10.0, 10.0, 10.0, 10.0, volume
+    )
+
+
+class TestVolumeParticipationFillModel(unittest.TestCase):
+    def setUp(self):
+        self.model = VolumeParticipationFillModel(participation=0.1, lot_size=100)
+
+    def test_fits_in_bar(self):
+        order = OrderEvent("A", "MKT", 500, "BUY")
+        filled = self.model.allocate(order, datetime.datetime(2020, 1, 1), 10000)
+        self.assertEqual(filled, 500)
+        self.assertEqual(len(self.model), 0)
+
+    def test_remainder_carried_fifo(self):
+        first = OrderEvent("A", "MKT", 2500, "BUY")
+        second = OrderEvent("A", "MKT", 300, "SELL")
+        t = datetime.datetime(2020, 1, 1)
+        self.assertEqual(self.model.allocate(first, t, 10050), 1000)
+        # The capacity of the bar is used up by the first order
+        self.assertEqual(self.model.allocate(second, t, 10050), 0)
+        self.assertEqual(len(self.model), 2)
+
+        fills = self.model.on_bar(bar("A", 2, 12000))
+        self.assertEqual([(o.order_id, q) for o, q in fills], [(first.order_id, 1200)])
+        fills = self.model.on_bar(bar("A", 3, 20000))
+        self.assertEqual(
+            [(o.order_id, q) for o, q in fills],
+            [(first.order_id, 300), (second.order_id, 300)]
+        )
+        self.assertEqual(len(self.model), 0)
+
+    def test_other_symbol_untouched(self):
+        order = OrderEvent("A", "MKT", 2000, "BUY")
+        self.model.allocate(order, datetime.datetime(2020, 1, 1), 1000)
+        self.assertEqual(self.model.on_bar(bar("B", 2, 100000)), [])
+        self.assertEqual(len(self.model), 1)
+
+    def test_cancel(self):
+        order = OrderEvent("A", "MKT", 2000, "BUY", strategy_id="s1")
+        self.model.allocate(order, datetime.datetime(2020, 1, 1), 1000)
+        self.assertEqual(self.model.cancel(strategy_id="s2"), [])
+        self.assertEqual(self.model.cancel(strategy_id="s1"), [order])
+        self.assertEqual(self.model.on_bar(bar("A", 2, 100000)), [])
+
+    def test_expiry(self):
+        t = datetime.datetime(2020, 1, 1)
+        day = OrderEvent("A", "MKT", 2000, "BUY", time_in_force="DAY")
+        gtc = OrderEvent("A", "MKT", 2000, "BUY")
+        dated = OrderEvent("A", "MKT", 2000, "BUY", expiry=datetime.datetime(2020, 1, 2, 12))
+        for order in (day, gtc, dated):
+            self.model.allocate(order, t, 0)
+        self.assertEqual(len(self.model), 3)
+        # The 'DAY' remainder is dropped by the next day's bar
+        self.assertEqual(self.model.expire("A", datetime.datetime(2020, 1, 1, 15)), [])
+        fills = self.model.on_bar(bar("A", 2, 10000))
+        self.assertEqual([(o.order_id, q) for o, q in fills], [(gtc.order_id, 1000)])
+        self.assertEqual(len(self.model), 2)
+        # 'GTC' remainders are carried until filled
+        self.assertEqual(self.model.on_bar(bar("A", 3, 0)), [])
+        self.assertEqual(len(self.model), 1)
+        fills = self.model.on_bar(bar("A", 6, 100000))
+        self.assertEqual([(o.order_id, q) for o, q in fills], [(gtc.order_id, 1000)])
+        self.assertEqual(len(self.model), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
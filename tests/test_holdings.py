@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import datetime
+
+import numpy as np
+
+import testcommon
+from Backtesting.portfolio_handler.holdings import HoldingsRecorder
+
+
+class Holding(object):
+    def __init__(self, quantity, market_value):
+        self.quantity = quantity
+        self.market_value = market_value
+
+
+class Snapshot(object):
+    def __init__(self, cash, equity, positions):
+        self.cur_cash = cash
+        self.equity = equity
+        self.positions = positions
+
+
+class TestHoldingsRecorder(unittest.TestCase):
+    def setUp(self):
+        # Day 1: A 10 @ 30, B 20 @ 10
+        # Day 2: A 10 @ 33, B closed, C 5 @ 54, D short 10 @ 10
+        # Day 3: everything closed
+        self.holdings = HoldingsRecorder(capacity=2)
+        self.dates = [datetime.date(2020, 1, d) for d in (2, 3, 6)]
+        self.holdings.record(self.dates[0], Snapshot(500.0, 1000.0, {
+            "A": Holding(10, 300.0), "B": Holding(20, 200.0)
+        }))
+        self.holdings.record(self.dates[1], Snapshot(500.0, 1000.0, {
+            "A": Holding(10, 330.0), "C": Holding(5, 270.0), "D": Holding(-10, -100.0)
+        }))
+        # A second snapshot of the same day is ignored
+        self.holdings.record(self.dates[1], Snapshot(0.0, 0.0, {}))
+        self.holdings.record(self.dates[2], Snapshot(1000.0, 1000.0, {}))
+
+    def test_to_matrix(self):
+        self.assertEqual(self.holdings.symbols, ["A", "B", "C", "D"])
+        np.testing.assert_array_equal(self.holdings.to_matrix(), [
+            [300.0, 200.0, 0.0, 0.0],
+            [330.0, 0.0, 270.0, -100.0],
+            [0.0, 0.0, 0.0, 0.0],
+        ])
+        np.testing.assert_array_equal(self.holdings.to_matrix("quantity"), [
+            [10, 20, 0, 0], [10, 0, 5, -10], [0, 0, 0, 0],
+        ])
+        np.testing.assert_allclose(self.holdings.to_matrix("weight")[1], [0.33, 0.0, 0.27, -0.1])
+        with self.assertRaises(ValueError):
+            self.holdings.to_matrix("price")
+
+    def test_sparse_frame(self):
+        dense = self.holdings.to_frame("market_value")
+        sparse = self.holdings.to_frame("market_value", sparse=True)
+        self.assertEqual(list(dense.index.date), self.dates)
+        self.assertEqual(list(sparse.index), list(dense.index))
+        self.assertEqual(list(sparse.columns), ["A", "B", "C", "D"])
+        np.testing.assert_array_equal(sparse.sparse.to_dense().values, dense.values)
+
+    def test_exposure(self):
+        np.testing.assert_allclose(self.holdings.gross_exposure().values, [0.5, 0.7, 0.0])
+        np.testing.assert_allclose(self.holdings.net_exposure().values, [0.5, 0.5, 0.0])
+        np.testing.assert_array_equal(self.holdings.cash().values, [500.0, 500.0, 1000.0])
+
+    def test_concentration(self):
+        np.testing.assert_allclose(
+            self.holdings.concentration().values,
+            [0.3 ** 2 + 0.2 ** 2, 0.33 ** 2 + 0.27 ** 2 + 0.1 ** 2, 0.0]
+        )
+
+    def test_turnover(self):
+        # Day 1: 300 + 200 bought from an empty portfolio
+        # Day 2: B sold at its last price (200), C (270) and D (100)
+        # Day 3: A (330), C (270) and D (100) closed
+        np.testing.assert_allclose(
+            self.holdings.turnover().values,
+            [0.5 * 500 / 1000, 0.5 * 570 / 1000, 0.5 * 700 / 1000]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.event import BarEvent
+from Backtesting.strategy.base import AbstractStrategy, Strategies
+from Backtesting.indicator.registry import IndicatorRegistry
+from Backtesting.indicator.moving_average import SMA, EMA, BollingerBands
+from Backtesting.indicator.momentum import RSI
+from Backtesting.indicator.volatility import ATR
+from Backtesting.indicator.rolling import RollingMax, RollingMin
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+
+
+def make_bars(n=300, seed=3):
+    rng = np.random.RandomState(seed)
+    index = pd.date_range("2018-01-02", periods=n, freq="B")
+    close = 10.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    frame = pd.DataFrame({"high": high, "low": low, "close": close}, index=index)
+    bars = [
+        BarEvent("TEST", t, True, c, h, l, c, 1000)
+        for t, h, l, c in zip(index, high, low, close)
+    ]
+    return frame, bars
+
+
+def run(indicator, bars, attr="value"):
+    values = []
+    for bar in bars:
+        indicator.update(bar)
+        values.append(getattr(indicator, attr))
+    return np.array(values)
+
+
+def wilder(x, n):
+    """
+    Wilder's smoothing seeded with the mean of the first n values.
+    """
+    out = np.full(len(x), np.nan)
+    out[n - 1] = np.mean(x[:n])
+    for i in range(n, len(x)):
+        out[i] = (out[i - 1] * (n - 1) + x[i]) / n
+    return out
+
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        self.frame, self.bars = make_bars()
+
+    def assert_series(self, result, expected):
+        np.testing.assert_allclose(result, np.asarray(expected), rtol=1e-9, equal_nan=True)
+
+    def test_sma_ema(self):
+        close = self.frame["close"]
+        self.assert_series(run(SMA(20), self.bars), close.rolling(20).mean())
+        expected = close.ewm(span=10, adjust=False).mean()
+        expected.iloc[:9] = np.nan
+        self.assert_series(run(EMA(10), self.bars), expected)
+
+    def test_bollinger(self):
+        close = self.frame["close"]
+        bands = BollingerBands(20, 2.0)
+        upper = run(bands, self.bars, "upper")
+        std = close.rolling(20).std(ddof=0)
+        self.assert_series(upper, close.rolling(20).mean() + 2.0 * std)
+        self.assertAlmostEqual(bands.lower, bands.middle - 2.0 * std.iloc[-1])
+
+    def test_rsi(self):
+        change = self.frame["close"].diff().values[1:]
+        gain = wilder(np.clip(change, 0, None), 14)
+        loss = wilder(np.clip(-change, 0, None), 14)
+        expected = np.r_[np.nan, 100.0 - 100.0 / (1.0 + gain / loss)]
+        self.assert_series(run(RSI(14), self.bars), expected)
+
+    def test_atr(self):
+        high, low, close = (self.frame[c].values for c in ("high", "low", "close"))
+        prev = np.r_[np.nan, close[:-1]]
+        true_range = np.nanmax(
+            [high - low, np.abs(high - prev), np.abs(low - prev)], axis=0
+        )
+        self.assert_series(run(ATR(14), self.bars), wilder(true_range, 14))
+
+    def test_rolling_extremes(self):
+        self.assert_series(
+            run(RollingMax(15), self.bars), self.frame["high"].rolling(15).max()
+        )
+        self.assert_series(
+            run(RollingMin(15, field="close"), self.bars),
+            self.frame["close"].rolling(15).min()
+        )
+
+    def test_update_once_per_bar(self):
+        sma = SMA(3)
+        for bar in self.bars[:3]:
+            sma.update(bar)
+            sma.update(bar)
+        self.assertEqual(sma.count, 3)
+        self.assertAlmostEqual(sma.value, self.frame["close"].iloc[:3].mean())
+
+
+class TestIndicatorRegistry(unittest.TestCase):
+    def test_dedup(self):
+        registry = IndicatorRegistry()
+        a = registry.get(SMA, "TEST", 20)
+        self.assertIs(registry.get(SMA, "TEST", window=20, field="close"), a)
+        self.assertIsNot(registry.get(SMA, "TEST", 10), a)
+        self.assertIsNot(registry.get(SMA, "OTHER", 20), a)
+        self.assertIsNot(registry.get(EMA, "TEST", 20), a)
+        self.assertEqual(len(registry), 4)
+
+    def test_late_indicator_gets_current_bar(self):
+        registry = IndicatorRegistry()
+        _, bars = make_bars(5)
+        registry.on_bar(bars[0])
+        sma = registry.get(SMA, "TEST", 1)
+        self.assertEqual(sma.value, bars[0].close_price)
+
+    def test_shared_by_strategies(self):
+        class Cross(AbstractStrategy):
+            def __init__(self):
+                self.values = []
+
+            def calculate_signals(self, event):
+                self.values.append(self.indicator(SMA, event.symbol, 10).value)
+
+        first, second = Cross(), Cross()
+        events_queue = queue.Queue()
+        backtest = Backtest(
+            Strategies(first, second), ["SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 6, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Indicators"]
+        )
+        backtest.start_trading(testing=True)
+        self.assertEqual(len(backtest.indicators), 1)
+        sma = backtest.indicators.get(SMA, "SPY", 10)
+        self.assertEqual(sma.count, len(first.values))
+        np.testing.assert_array_equal(first.values, second.values)
+        closes = backtest.data_handler.get_close_series("SPY").loc["2010-01-01":"2010-06-01"]
+        self.assertAlmostEqual(first.values[-1], closes.iloc[-10:].mean())
+
+
+class TestIndicatorColumns(unittest.TestCase):
+    def test_compute_matches_update(self):
+        frame, bars = make_bars()
+        frame = frame.rename(columns={"high": "High", "low": "Low", "close": "Close"})
+        frame["Open"] = frame["Close"]
+        frame["Volume"] = 1000
+        for indicator in (
+            SMA(20), EMA(10), BollingerBands(20), RSI(14), ATR(14),
+            RollingMax(15), RollingMin(15, field="close")
+        ):
+            expected = run(indicator, bars)
+            np.testing.assert_allclose(
+                indicator.compute(frame).values, expected, rtol=1e-9, equal_nan=True
+            )
+
+    def test_columns_on_bars(self):
+        class Columns(AbstractStrategy):
+            def __init__(self):
+                self.bars = []
+
+            def get_indicator_columns(self):
+                return {
+                    "sma_10": SMA(10),
+                    "range": lambda frame: frame["High"] - frame["Low"],
+                }
+
+            def calculate_signals(self, event):
+                self.bars.append(event)
+
+        strategy = Columns()
+        events_queue = queue.Queue()
+        backtest = Backtest(
+            strategy, ["SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 6, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Columns"]
+        )
+        backtest.start_trading(testing=True)
+        sma = SMA(10)
+        for bar in strategy.bars:
+            self.assertAlmostEqual(bar.columns["range"], bar.high_price - bar.low_price)
+        # The history before the start date warms the column up
+        warm = backtest.data_handler.symbol_data["SPY"].loc[:"2010-01-04"]
+        for _, row in warm.iloc[-10:].iterrows():
+            sma.update(BarEvent("SPY", row.name, True, 0, 0, 0, row["Close"], 0))
+        self.assertAlmostEqual(strategy.bars[0].columns["sma_10"], sma.value)
+
+    def test_future_values_rejected(self):
+        class Peek(AbstractStrategy):
+            def get_indicator_columns(self):
+                return {"next_close": lambda frame: frame["Close"].shift(-1)}
+
+            def calculate_signals(self, event):
+                pass
+
+        with self.assertRaises(ValueError):
+            Backtest(
+                Peek(), ["SPY"], 100000.0,
+                datetime.datetime(2010, 1, 1), datetime.datetime(2010, 6, 1),
+                queue.Queue(), './data/', tempfile.mkdtemp(), title=["Peek"]
+            )
+
+    def test_conflicting_columns_rejected(self):
+        class Declares(AbstractStrategy):
+            def __init__(self, columns):
+                self.columns = columns
+
+            def get_indicator_columns(self):
+                return self.columns
+
+            def calculate_signals(self, event):
+                pass
+
+        spread = lambda frame: frame["High"] - frame["Low"]
+        same = Strategies(
+            Declares({"sma": SMA(10), "spread": spread}),
+            Declares({"sma": SMA(window=10), "spread": spread, "ema": EMA(5)})
+        )
+        self.assertEqual(sorted(same.get_indicator_columns()), ["ema", "sma", "spread"])
+        for other in (SMA(20), EMA(10), lambda frame: frame["Close"]):
+            with self.assertRaises(ValueError):
+                Strategies(
+                    Declares({"sma": SMA(10)}), Declares({"sma": other})
+                ).get_indicator_columns()
+
+        data_handler = HistoricCSVDataHandler(
+            queue.Queue(), './data/', ["SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 6, 1)
+        )
+        data_handler.add_columns({"sma": SMA(10)})
+        data_handler.add_columns({"sma": SMA(10)})
+        with self.assertRaises(ValueError):
+            data_handler.add_columns({"sma": SMA(20)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+from Backtesting.statistics.online import OnlineEquityStatistics
+import Backtesting.statistics.performance as perf
+
+
+class TestOnlineEquityStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        self.index = pd.date_range("2015-01-01", periods=1500, freq="D")
+        self.equity = 1e5 * np.cumprod(1 + rng.normal(0.0003, 0.01, len(self.index)))
+
+    def _online(self):
+        stats = OnlineEquityStatistics(periods=252, capacity=16)
+        for timestamp, value in zip(self.index, self.equity):
+            stats.update(timestamp, value * 0.5)
+            stats.update(timestamp, value)
+        stats.flush()
+        return stats
+
+    def test_series(self):
+        stats = self._online()
+        series = stats.to_series()
+        np.testing.assert_allclose(series.values, self.equity)
+        self.assertTrue(series.index.equals(self.index))
+
+    def test_sharpe(self):
+        returns = pd.Series(self.equity).pct_change().fillna(0.0)
+        self.assertAlmostEqual(
+            self._online().sharpe, perf.create_sharpe_ratio(returns, 252)
+        )
+
+    def test_drawdown(self):
+        # Reference with the loop of performance.create_drawdowns
+        cum = self.equity / self.equity[0]
+        hwm = np.zeros(len(cum))
+        for t in range(1, len(cum)):
+            hwm[t] = max(hwm[t - 1], cum[t])
+        dd = (hwm - cum) / np.where(hwm == 0, 1, hwm)
+        dd[0] = 0.0
+        duration = longest = 0
+        for d in dd:
+            duration = duration + 1 if d != 0 else 0
+            longest = max(longest, duration)
+
+        stats = self._online()
+        self.assertAlmostEqual(stats.max_drawdown, dd.max())
+        self.assertEqual(stats.max_drawdown_duration, longest)
+        self.assertAlmostEqual(stats.drawdown, dd[-1])
+
+    def test_drawdown_matches_performance(self):
+        dd, max_dd, start, end, duration = perf.create_drawdowns(
+            pd.Series(self.equity / self.equity[0], index=self.index)
+        )
+        stats = self._online()
+        np.testing.assert_allclose(stats.drawdowns_series().values, dd.values, atol=1e-12)
+        self.assertTrue(stats.drawdowns_series().index.equals(self.index))
+        self.assertAlmostEqual(stats.max_drawdown, max_dd)
+        self.assertEqual(stats.max_drawdown_start, start)
+        self.assertEqual(stats.max_drawdown_end, end)
+        self.assertEqual(stats.max_drawdown_duration, duration)
+
+    def test_no_drawdown(self):
+        stats = OnlineEquityStatistics()
+        for timestamp, value in zip(self.index[:3], (1.0, 2.0, 3.0)):
+            stats.update(timestamp, value)
+        stats.flush()
+        self.assertIsNone(stats.max_drawdown_start)
+        self.assertIsNone(stats.max_drawdown_end)
+        self.assertEqual(list(stats.drawdowns_series()), [0.0, 0.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
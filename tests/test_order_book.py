@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import datetime
+
+import testcommon
+from Backtesting.event import BarEvent, OrderEvent
+from Backtesting.execution_handler.order_book import PendingOrderBook
+
+
+def make_bar(timestamp, open_price, high_price, low_price, close_price):
+    return BarEvent(
+        "SPY", timestamp, False, open_price, high_price,
+        low_price, close_price, 1000
+    )
+
+
+class TestPendingOrderBook(unittest.TestCase):
+    def setUp(self):
+        self.book = PendingOrderBook()
+        self.t0 = datetime.datetime(2010, 1, 4, 15, 0)
+        self.t1 = datetime.datetime(2010, 1, 5, 15, 0)
+
+    def _add(self, order_type, action, price, **kwargs):
+        order = OrderEvent("SPY", order_type, 100, action, price=price, **kwargs)
+        self.book.add(order, self.t0)
+        return order
+
+    def test_only_orders_within_range_trigger(self):
+        buy_low = self._add("LMT", "BUY", 95.0)
+        buy_high = self._add("LMT", "BUY", 99.0)
+        sell = self._add("LMT", "SELL", 102.0)
+        stop = self._add("STP", "SELL", 97.0)
+        triggered = self.book.match(make_bar(self.t1, 100.0, 101.0, 98.0, 100.5))
+        self.assertEqual([(o.order_id, p) for o, p in triggered], [(buy_high.order_id, 99.0)])
+        self.assertEqual(len(self.book), 3)
+        # Gap down through the stop and the limit: both fill at the open
+        triggered = dict((o.order_id, p) for o, p in self.book.match(
+            make_bar(self.t1, 94.0, 96.0, 93.0, 95.0)
+        ))
+        self.assertEqual(triggered, {buy_low.order_id: 94.0, stop.order_id: 94.0})
+        self.assertIn(sell.order_id, self.book)
+
+    def test_cancel_and_expiry(self):
+        cancelled = self._add("LMT", "BUY", 99.0)
+        day = self._add("LMT", "BUY", 99.0, time_in_force="DAY")
+        gtc = self._add("LMT", "BUY", 99.0)
+        self.assertIs(self.book.cancel(cancelled.order_id), cancelled)
+        self.assertEqual(self.book.expire(self.t1), [day])
+        triggered = self.book.match(make_bar(self.t1, 100.0, 101.0, 98.0, 100.5))
+        self.assertEqual([o for o, p in triggered], [gtc])
+        self.assertEqual(len(self.book), 0)
+
+    def test_added_back_keeps_one_expiry(self):
+        day = self._add("LMT", "BUY", 99.0, time_in_force="DAY")
+        triggered = self.book.match(make_bar(self.t0, 100.0, 101.0, 98.0, 100.5))
+        self.assertEqual([o for o, p in triggered], [day])
+        # The remainder of a partial fill goes back to the book
+        self.book.add(day, self.t0)
+        self.book.add(self.book.match(make_bar(self.t0, 100.0, 101.0, 98.0, 100.5))[0][0], self.t0)
+        self.assertEqual(len(self.book._expiries), 1)
+        self.assertEqual(self.book.expire(self.t1), [day])
+        self.assertEqual(len(self.book), 0)
+
+    def test_compaction(self):
+        self.book.COMPACT_MIN = 10
+        orders = [self._add("LMT", "BUY", 90.0 + i * 0.01, expiry=self.t1) for i in range(100)]
+        for order in orders[:60]:
+            self.book.cancel(order.order_id)
+        # Rebuilt when the 51st cancel left more dead entries than
+        # live orders
+        heaps = self.book._books["SPY"]
+        self.assertEqual(sum(len(heap) for heap in heaps), 49)
+        self.assertEqual(len(self.book._expiries), 49)
+        self.book.compact()
+        self.assertEqual(sum(len(heap) for heap in heaps), 40)
+        self.assertEqual(len(self.book._expiries), 40)
+        self.assertEqual(len(self.book), 40)
+        triggered = self.book.match(make_bar(self.t1, 95.0, 96.0, 95.0, 95.5))
+        self.assertEqual([o for o, p in triggered], [])
+        triggered = self.book.match(make_bar(self.t1, 100.0, 101.0, 89.0, 100.5))
+        self.assertEqual(
+            sorted(o.order_id for o, p in triggered),
+            sorted(o.order_id for o in orders[60:])
+        )
+        self.assertEqual(self.book._entries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
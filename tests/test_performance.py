@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+import Backtesting.statistics.performance as perf
+
+
+def loop_drawdowns(returns):
+    """
+    The original loop implementation of create_drawdowns.
+    """
+    idx = returns.index
+    hwm = np.zeros(len(idx))
+    for t in range(1, len(idx)):
+        hwm[t] = max(hwm[t - 1], returns.iloc[t])
+    with np.errstate(divide="ignore"):
+        drawdown = pd.Series((hwm - returns.values) / hwm, index=idx)
+    drawdown.iloc[0] = 0.0
+    check = np.where(drawdown == 0, 0, 1)
+    duration = max(sum(1 for i in g if i == 1) for k, g in groupby(check))
+    mdd = np.max(drawdown)
+    if mdd > 0:
+        end = drawdown.idxmax()
+        start = drawdown[:end].sort_index(ascending=False).idxmin()
+    else:
+        start = end = None
+    return drawdown, mdd, start, end, duration
+
+
+def groupby_aggregate_returns(returns, convert_to):
+    """
+    The original groupby implementation of aggregate_returns.
+    """
+    def cumulate_returns(x):
+        return np.exp(np.log(1 + x).cumsum()).iloc[-1] - 1
+
+    keys = {
+        'weekly': [lambda x: x.year, lambda x: x.month, lambda x: x.isocalendar()[1]],
+        'monthly': [lambda x: x.year, lambda x: x.month],
+        'yearly': [lambda x: x.year],
+    }[convert_to]
+    return returns.groupby(keys).apply(cumulate_returns)
+
+
+class TestAggregateReturns(unittest.TestCase):
+    def test_matches_groupby(self):
+        rng = np.random.RandomState(5)
+        # Spans year ends where the ISO week belongs to the next year
+        index = pd.date_range("2014-12-15", periods=1200, freq="B")
+        returns = pd.Series(rng.normal(0.0, 0.01, len(index)), index=index)
+        for convert_to in ('weekly', 'monthly', 'yearly'):
+            expected = groupby_aggregate_returns(returns, convert_to)
+            result = perf.aggregate_returns(returns, convert_to)
+            self.assertTrue(result.index.equals(expected.index))
+            np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
+
+    def test_missing_returns(self):
+        index = pd.date_range("2018-01-01", periods=120, freq="D")
+        returns = pd.Series(np.linspace(-0.01, 0.01, len(index)), index=index)
+        # Missing inside a month, at the end of a month, and a
+        # whole month missing
+        returns.iloc[[3, 10, 58]] = np.nan
+        returns["2018-04"] = np.nan
+        for convert_to in ('weekly', 'monthly', 'yearly'):
+            expected = groupby_aggregate_returns(returns, convert_to)
+            result = perf.aggregate_returns(returns, convert_to)
+            self.assertTrue(result.index.equals(expected.index))
+            np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
+        monthly = perf.aggregate_returns(returns, 'monthly')
+        self.assertEqual(list(np.isnan(monthly.values)), [False, True, False, True])
+
+    def test_invalid_period(self):
+        index = pd.date_range("2018-01-01", periods=3, freq="D")
+        with self.assertRaises(ValueError):
+            perf.aggregate_returns(pd.Series(0.0, index=index), 'daily')
+
+
+class TestCreateDrawdowns(unittest.TestCase):
+    def _check(self, cum_returns):
+        expected = loop_drawdowns(cum_returns)
+        result = perf.create_drawdowns(cum_returns)
+        np.testing.assert_allclose(result[0].values, expected[0].values)
+        self.assertTrue(result[0].index.equals(cum_returns.index))
+        self.assertAlmostEqual(result[1], expected[1])
+        self.assertEqual(result[2:], expected[2:])
+
+    def test_random_walk(self):
+        rng = np.random.RandomState(11)
+        index = pd.date_range("2018-01-02 09:30", periods=5000, freq="min")
+        returns = rng.normal(0.0, 0.002, len(index))
+        returns[0] = 0.0
+        self._check(pd.Series(np.exp(np.cumsum(returns)), index=index))
+
+    def test_flat_and_rising(self):
+        index = pd.date_range("2018-01-01", periods=6, freq="D")
+        self._check(pd.Series([1.0, 1.0, 1.1, 1.2, 1.2, 1.3], index=index))
+        # A recovery to a new high ends an underwater run
+        self._check(pd.Series([1.0, 1.2, 1.0, 0.9, 1.3, 1.1], index=index))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import numpy as np
+
+import testcommon
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+from Backtesting.portfolio_handler.portfolio_handler import PortfolioHandler
+from Backtesting.portfolio_handler.position_view import POSITION_FIELDS, positions_to_array
+from Backtesting.position_sizer.naive import NaivePositionSizer
+from Backtesting.risk_manager.example import ExampleRiskManager
+from Backtesting.event import FillEvent
+
+
+class TestPositionView(unittest.TestCase):
+    def setUp(self):
+        events_queue = queue.Queue()
+        data_handler = HistoricCSVDataHandler(
+            events_queue, './data/', ["AAPL", "SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1)
+        )
+        self.portfolio_handler = PortfolioHandler(
+            100000.0, events_queue, data_handler,
+            NaivePositionSizer(), ExampleRiskManager(), tempfile.mkdtemp()
+        )
+        self.portfolio = self.portfolio_handler.portfolio
+
+    def buy(self, symbol, quantity, price):
+        self.portfolio_handler.on_fill(FillEvent(
+            None, symbol, "BUY", quantity, price, 5.0, "CN"
+        ))
+
+    def test_reads_through_to_position(self):
+        view = self.portfolio.position_view("AAPL")
+        self.assertIs(self.portfolio.position_view("AAPL"), view)
+        self.assertFalse(view.held)
+        for field in POSITION_FIELDS:
+            self.assertEqual(getattr(view, field), 0)
+
+        self.buy("AAPL", 100, 20.0)
+        self.assertTrue(view.held)
+        self.assertEqual(view.quantity, 100)
+        # Bought today, so not available before the next day (T+1)
+        self.assertEqual(view.unavailable_quantity, 100)
+        self.assertEqual(view.available_quantity, 0)
+        self.portfolio_handler.update_portfolio_position()
+        self.assertEqual(view.unavailable_quantity, 0)
+        self.assertEqual(view.available_quantity, 100)
+        position = self.portfolio.positions["AAPL"]
+        self.assertEqual(view.avg_price, position.avg_price)
+        self.assertEqual(view.total_commission, position.total_commission)
+
+    def test_read_only(self):
+        view = self.portfolio.position_view("AAPL")
+        with self.assertRaises(AttributeError):
+            view.quantity = 10
+        with self.assertRaises(AttributeError):
+            view.symbol = "SPY"
+        self.assertEqual(view.symbol, "AAPL")
+
+    def test_positions_to_array(self):
+        self.buy("AAPL", 100, 20.0)
+        self.portfolio_handler.update_portfolio_position()
+        self.buy("AAPL", 200, 21.0)
+        array = positions_to_array(self.portfolio.positions, ["SPY", "AAPL"])
+        self.assertEqual(list(array["symbol"]), ["SPY", "AAPL"])
+        self.assertEqual(array[0]["quantity"], 0)
+        np.testing.assert_array_equal(array["quantity"], [0, 300])
+        np.testing.assert_array_equal(array["available_quantity"], [0, 100])
+        np.testing.assert_array_equal(array["unavailable_quantity"], [0, 200])
+        held = self.portfolio.positions_array()
+        self.assertEqual(list(held["symbol"]), ["AAPL"])
+
+
+if __name__ == "__main__":
+    unittest.main()
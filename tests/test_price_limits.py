@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import datetime
+
+import pandas as pd
+
+import testcommon
+from Backtesting.data_handler.price_limits import limit_flags, trading_days
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+
+
+class TestLimitFlags(unittest.TestCase):
+    def test_main_board(self):
+        index = pd.DatetimeIndex(["2019-01-02", "2019-01-03", "2019-01-04"])
+        flags = limit_flags("600000SH", index, [11.0, 9.9, 10.0], [10.0, 11.0, 9.9])
+        self.assertEqual(flags, {index[0]: 1, index[1]: -1})
+
+    def test_chinext_reform(self):
+        index = pd.DatetimeIndex(["2020-08-21", "2020-08-24"])
+        # 10% before the reform, 20% from 2020-08-24
+        flags = limit_flags("300750SZ", index, [11.0, 11.0], [10.0, 10.0])
+        self.assertEqual(flags, {index[0]: 1})
+        flags = limit_flags("300750SZ", index, [11.0, 13.2], [10.0, 11.0])
+        self.assertEqual(flags, {index[0]: 1, index[1]: 1})
+
+    def test_intraday_uses_previous_day_close(self):
+        index = pd.DatetimeIndex([
+            "2019-01-02 14:59", "2019-01-02 15:00",
+            "2019-01-03 09:30", "2019-01-03 09:31"
+        ])
+        close = [9.9, 10.0, 10.5, 11.0]
+        # Intraday pre_close is the close of the previous bar
+        flags = limit_flags("000001SZ_M", index, close, [float("nan"), 9.9, 10.0, 10.5])
+        self.assertEqual(flags, {index[3]: 1})
+
+    def test_not_a_share(self):
+        index = pd.DatetimeIndex(["2019-01-02", "2019-01-03"])
+        self.assertEqual(limit_flags("AAPL", index, [10.0, 20.0], [5.0, 10.0]), {})
+
+    def test_trading_days(self):
+        index = pd.DatetimeIndex(["2019-01-02", "2019-01-03"])
+        self.assertEqual(trading_days(index, [100, 0]), {datetime.date(2019, 1, 2)})
+
+
+class TestCanTrade(unittest.TestCase):
+    def setUp(self):
+        self.data_handler = HistoricCSVDataHandler(
+            queue.Queue(), './data/', ["000001SZ_D"],
+            datetime.datetime(2002, 6, 24), datetime.datetime(2002, 6, 26)
+        )
+
+    def test_limit_up(self):
+        self.data_handler.stream_next()
+        self.assertEqual(self.data_handler.get_limit_state("000001SZ_D"), 1)
+        self.assertFalse(self.data_handler.can_trade("000001SZ_D", "BUY"))
+        self.assertTrue(self.data_handler.can_trade("000001SZ_D", "SELL"))
+
+    def test_suspended(self):
+        self.data_handler.stream_next()
+        self.data_handler.cur_day = datetime.date(2002, 6, 23)
+        self.assertTrue(self.data_handler.is_suspended("000001SZ_D"))
+        self.assertFalse(self.data_handler.can_trade("000001SZ_D", "SELL"))
+
+
+if __name__ == "__main__":
+    unittest.main()
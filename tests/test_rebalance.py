@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import pandas as pd
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.event import EventType
+from Backtesting.order.suggested import SuggestedOrder
+from Backtesting.position_sizer.rebalance import LiquidateRebalancePositionSizer
+from Backtesting.strategy.base import AbstractStrategy
+
+
+class Holding(object):
+    def __init__(self, quantity, available_quantity):
+        self.quantity = quantity
+        self.available_quantity = available_quantity
+
+
+class Prices(object):
+    def __init__(self, closes):
+        self.closes = closes
+
+    def get_last_close(self, symbol):
+        return self.closes[symbol]
+
+    def get_last_timestamp(self, symbol):
+        return pd.Timestamp("2020-01-02")
+
+
+class Account(object):
+    def __init__(self, cash, positions, closes):
+        self.cur_cash = cash
+        self.positions = positions
+        self.data_handler = Prices(closes)
+        self.equity = cash + sum(
+            position.quantity * closes[symbol] for symbol, position in positions.items()
+        )
+
+
+class TestSizeOrders(unittest.TestCase):
+    def setUp(self):
+        self.sizer = LiquidateRebalancePositionSizer(slippage=0.0)
+        # 600 of the 1000 B were bought today (T+1)
+        self.portfolio = Account(10000.0, {
+            "A": Holding(1000, 1000), "B": Holding(1000, 400)
+        }, {"A": 10.0, "B": 20.0, "C": 50.0})
+
+    def test_sells_before_buys(self):
+        orders = self.sizer.size_orders(self.portfolio, {"C": 0.5, "B": 0.0})
+        # A is not in the targets and is liquidated, B is limited
+        # to its available quantity
+        self.assertEqual(
+            [(o.symbol, o.action, o.quantity) for o in orders],
+            [("B", "SELL", 400), ("A", "SELL", 1000), ("C", "BUY", 400)]
+        )
+
+    def test_buys_scaled_to_cash(self):
+        portfolio = Account(10000.0, {}, {"A": 10.0, "B": 20.0})
+        orders = self.sizer.size_orders(portfolio, {"A": 0.8, "B": 0.8})
+        self.assertEqual(
+            [(o.symbol, o.action, o.quantity) for o in orders],
+            [("A", "BUY", 400), ("B", "BUY", 200)]
+        )
+        cost = sum(
+            o.quantity * portfolio.data_handler.get_last_close(o.symbol) for o in orders
+        )
+        self.assertLessEqual(cost + 2 * 5.0, portfolio.cur_cash)
+
+    def test_size_order_sells_available(self):
+        self.sizer.symbol_weights = {"B": 0.1}
+        order = self.sizer.size_order(
+            self.portfolio, SuggestedOrder("B", "BUY", "MKT")
+        )
+        self.assertEqual((order.action, order.quantity), ("SELL", 400))
+
+
+class SwitchOnDay(AbstractStrategy):
+    """
+    Buys AAPL on the first day, then switches to SPY, which needs
+    the proceeds of the AAPL sale.
+    """
+    def __init__(self):
+        self.days = 0
+
+    def get_symbols(self):
+        return ["AAPL", "SPY"]
+
+    def calculate_signals(self, event):
+        if event.type != EventType.BAR or event.symbol != "SPY":
+            return
+        self.days += 1
+        if self.days == 1:
+            self.portfolio_handler.rebalance({"AAPL": 0.9})
+        elif self.days == 5:
+            self.portfolio_handler.rebalance({"SPY": 0.9})
+
+
+class TestPortfolioRebalance(unittest.TestCase):
+    def run_backtest(self, batch_orders):
+        backtest = Backtest(
+            SwitchOnDay(), ["AAPL", "SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1),
+            queue.Queue(), './data/', tempfile.mkdtemp(), title=["Rebalance"],
+            position_sizer=LiquidateRebalancePositionSizer(),
+            batch_orders=batch_orders
+        )
+        backtest.start_trading(testing=True)
+        return backtest
+
+    def test_rebalance_spends_sell_proceeds(self):
+        trades = {}
+        for batch_orders in (False, True):
+            backtest = self.run_backtest(batch_orders)
+            trades[batch_orders] = backtest.portfolio_handler.trades.to_frame()
+            portfolio = backtest.portfolio_handler.portfolio
+            self.assertEqual(list(portfolio.positions), ["SPY"])
+            position = portfolio.positions["SPY"]
+            self.assertEqual(position.quantity % 100, 0)
+            self.assertGreater(position.market_value, 0.8 * portfolio.equity)
+            self.assertGreaterEqual(portfolio.cur_cash, 0.0)
+            fills = trades[batch_orders]
+            self.assertEqual(
+                list(zip(fills["symbol"], fills["action"])),
+                [("AAPL", "BUY"), ("AAPL", "SELL"), ("SPY", "BUY")]
+            )
+        # Batched execution gives the same fills
+        pd.testing.assert_frame_equal(trades[False], trades[True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import os
+import subprocess
+import sys
+import unittest
+import queue
+import tempfile
+import datetime
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.event import EventType, SignalEvent
+from Backtesting.strategy.base import AbstractStrategy
+from Backtesting.statistics.report import (
+    ReportRenderer, load_results, render_report, report_filename, save_results
+)
+
+
+class BuyOnce(AbstractStrategy):
+    def __init__(self, symbol, events_queue):
+        self.symbol = symbol
+        self.events_queue = events_queue
+        self.invested = False
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR and not self.invested:
+            self.events_queue.put(SignalEvent(
+                self.symbol, event.timestamp, "BUY", suggested_quantity=100
+            ))
+            self.invested = True
+
+
+class TestDeferredReport(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        events_queue = queue.Queue()
+        self.backtest = Backtest(
+            BuyOnce("SPY", events_queue), ["SPY"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2012, 1, 1),
+            events_queue, './data/', self.output_dir,
+            title=["Deferred report"], deferred_report=True
+        )
+        self.results = self.backtest.start_trading()
+
+    def test_saves_results_only(self):
+        results_file = self.backtest.results_file
+        self.assertTrue(os.path.exists(results_file))
+        self.assertFalse(os.path.exists(report_filename(results_file)))
+        meta, results = load_results(results_file)
+        self.assertEqual(meta["title"], "Deferred report")
+        self.assertTrue(results["equity"].equals(self.results["equity"]))
+        # The same results are saved once, under the same name
+        self.assertEqual(save_results(self.backtest.statistics, self.output_dir), results_file)
+
+    def test_render_in_worker_and_cache(self):
+        results_file = self.backtest.results_file
+        with ReportRenderer() as renderer:
+            filename = renderer.render(results_file, timeout=120)
+        self.assertEqual(filename, report_filename(results_file))
+        self.assertGreater(os.path.getsize(filename), 0)
+        mtime = os.path.getmtime(filename)
+        self.assertEqual(render_report(results_file), filename)
+        self.assertEqual(ReportRenderer().submit(results_file).result(), filename)
+        self.assertEqual(os.path.getmtime(filename), mtime)
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_backtest_import_is_headless(self):
+        # A run which doesn't plot doesn't load the plotting libraries
+        code = (
+            "import sys; import Backtesting.backtest; "
+            "print(' '.join(m for m in ('matplotlib', 'seaborn', 'scipy') "
+            "if m in sys.modules))"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        loaded = subprocess.run(
+            [sys.executable, "-c", code], cwd=root, check=True,
+            capture_output=True, text=True
+        ).stdout.split()
+        self.assertEqual(loaded, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import os
+import unittest
+import tempfile
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+from Backtesting.event import FillEvent
+from Backtesting.portfolio_handler.trades import TradeLedger
+from Backtesting.statistics.store import ResultsStore
+
+
+def make_results(seed, n=300):
+    rng = np.random.RandomState(seed)
+    index = pd.date_range("2015-01-02", periods=n, freq="B")
+    returns = pd.Series(rng.normal(0.0005, 0.01, n), index=index)
+    returns.iloc[0] = 0.0
+    cum_returns = np.exp(np.log(1 + returns).cumsum())
+    ledger = TradeLedger(capacity=2)
+    for i in range(3):
+        ledger.on_fill(FillEvent(
+            index[i * 10].to_pydatetime(), "SPY", "BUY" if i < 2 else "SELL",
+            100, 200.0 + i, 5.0, "CN", strategy_id=None if i else "trend"
+        ))
+    return {
+        "sharpe": float(np.sqrt(252) * returns.mean() / returns.std()),
+        "max_drawdown": 0.1 * seed,
+        "max_drawdown_start": index[5],
+        "equity": cum_returns * 100000.0,
+        "returns": returns,
+        "cum_returns": cum_returns,
+        "drawdowns": pd.Series(0.0, index=index),
+        "trades": ledger.to_frame(),
+    }
+
+
+class TestTradeLedger(unittest.TestCase):
+    def test_columns(self):
+        trades = make_results(1)["trades"]
+        self.assertEqual(len(trades), 3)
+        self.assertEqual(list(trades["action"]), ["BUY", "BUY", "SELL"])
+        self.assertEqual(list(trades["strategy_id"]), ["trend", "", ""])
+        self.assertEqual(trades["price"].iloc[2], 202.0)
+        self.assertEqual(trades["timestamp"].iloc[1], pd.Timestamp("2015-01-16"))
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ResultsStore(os.path.join(tempfile.mkdtemp(), "runs"))
+
+    def test_round_trip(self):
+        results = make_results(1)
+        run_id = self.store.save(results, params={"window": 20})
+        self.assertEqual(self.store.runs(), [run_id])
+        equity = self.store.load_series(run_id)
+        self.assertIsInstance(self.store.load_column(run_id, "equity"), np.memmap)
+        np.testing.assert_array_equal(equity.values, results["equity"].values)
+        self.assertTrue(equity.index.equals(results["equity"].index))
+        trades = self.store.load_trades(run_id)
+        for field in results["trades"].columns:
+            self.assertEqual(list(trades[field]), list(results["trades"][field]))
+        meta = self.store.meta(run_id)
+        self.assertEqual(meta["params"], {"window": 20})
+        self.assertEqual(meta["statistics"]["max_drawdown_start"], "2015-01-09T00:00:00")
+        # The same run is stored once
+        self.assertEqual(self.store.save(results, params={"window": 20}), run_id)
+        self.assertEqual(len(self.store.runs()), 1)
+
+    def test_summary_and_frame(self):
+        run_ids = [
+            self.store.save(make_results(seed, n=200 + seed), params={"seed": seed})
+            for seed in range(1, 5)
+        ]
+        summary = self.store.summary()
+        self.assertEqual(sorted(summary.index), sorted(run_ids))
+        ranked = summary.sort_values("max_drawdown")
+        self.assertEqual(list(ranked["seed"]), [1, 2, 3, 4])
+        frame = self.store.load_frame("equity")
+        self.assertEqual(frame.shape, (204, 4))
+        self.assertEqual(frame[run_ids[0]].count(), 201)
+
+
+if __name__ == "__main__":
+    unittest.main()
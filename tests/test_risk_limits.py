@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import testcommon
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+from Backtesting.portfolio_handler.portfolio_handler import PortfolioHandler
+from Backtesting.position_sizer.naive import NaivePositionSizer
+from Backtesting.risk_manager.limits import PortfolioLimitRiskManager
+from Backtesting.execution_handler.ashare_simulated import AShareSimulatedExecutionHandler
+from Backtesting.order.suggested import SuggestedOrder
+from Backtesting.event import FillEvent
+
+
+class TestPortfolioLimitRiskManager(unittest.TestCase):
+    def setUp(self):
+        self.events_queue = queue.Queue()
+        self.data_handler = HistoricCSVDataHandler(
+            self.events_queue, './data/', ["AAPL", "SPY"],
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 2, 1)
+        )
+        self.data_handler.stream_next()
+        self.data_handler.stream_next()
+        self.aapl = self.data_handler.get_last_close("AAPL")
+        self.spy = self.data_handler.get_last_close("SPY")
+
+    def _handler(self, **limits):
+        risk_manager = PortfolioLimitRiskManager(**limits)
+        portfolio_handler = PortfolioHandler(
+            100000.0, self.events_queue, self.data_handler,
+            NaivePositionSizer(), risk_manager, tempfile.mkdtemp()
+        )
+        return portfolio_handler, risk_manager
+
+    def test_max_weight_clips_buys(self):
+        handler, risk_manager = self._handler(max_weight=0.1)
+        orders = risk_manager.refine_batch(handler.portfolio, [
+            SuggestedOrder("AAPL", "BUY", "MKT", quantity=40),
+            SuggestedOrder("AAPL", "BUY", "MKT", quantity=100),
+        ])
+        self.assertEqual([o.quantity for o in orders], [40])
+        self.assertLessEqual(40 * self.aapl, 10000.0)
+
+    def test_cash_reserve_and_lots(self):
+        handler, risk_manager = self._handler(min_cash_reserve=0.5)
+        orders = risk_manager.refine_orders(
+            handler.portfolio, SuggestedOrder("SPY", "BUY", "MKT", quantity=1000)
+        )
+        self.assertEqual(len(orders), 1)
+        self.assertEqual(orders[0].quantity % 100, 0)
+        self.assertLessEqual(orders[0].quantity * self.spy, 50000.0)
+        # The approved order holds its cash until it fills
+        self.assertEqual(risk_manager.refine_orders(
+            handler.portfolio, SuggestedOrder("SPY", "BUY", "MKT", quantity=1000)
+        ), [])
+
+    def test_sector_limit(self):
+        handler, risk_manager = self._handler(
+            sector_map={"AAPL": "tech", "SPY": "tech"}, max_sector_weight=0.3
+        )
+        orders = risk_manager.refine_batch(handler.portfolio, [
+            SuggestedOrder("SPY", "BUY", "MKT", quantity=200),
+            SuggestedOrder("AAPL", "BUY", "MKT", quantity=200),
+        ])
+        value = sum(
+            o.quantity * (self.spy if o.symbol == "SPY" else self.aapl) for o in orders
+        )
+        self.assertLessEqual(value, 30000.0)
+
+    def test_fill_releases_reservation(self):
+        handler, risk_manager = self._handler(max_daily_turnover=0.5)
+        order = risk_manager.refine_orders(
+            handler.portfolio, SuggestedOrder("SPY", "BUY", "MKT", quantity=100)
+        )[0]
+        handler.on_fill(FillEvent(
+            None, "SPY", "BUY", 100, self.spy, 5.0, "CN", order_id=order.order_id
+        ))
+        state = risk_manager._state(handler.portfolio)
+        self.assertEqual(state.reserved_quantity["SPY"], 0)
+        self.assertEqual(state.reservations, {})
+        self.assertAlmostEqual(state.traded, 100 * self.spy)
+        # Sells pass, but use up the turnover left to buys
+        orders = risk_manager.refine_batch(handler.portfolio, [
+            SuggestedOrder("SPY", "SELL", "MKT", quantity=100),
+            SuggestedOrder("AAPL", "BUY", "MKT", quantity=1000),
+        ])
+        self.assertEqual(orders[0].quantity, 100)
+        self.assertLessEqual(
+            orders[1].quantity * self.aapl, 50000.0 - 200 * self.spy
+        )
+
+    def test_cancel_releases_reservation(self):
+        handler, risk_manager = self._handler(min_cash_reserve=0.5)
+        execution_handler = AShareSimulatedExecutionHandler(
+            self.events_queue, self.data_handler, handler,
+            tempfile.mkdtemp(), record=False
+        )
+        order = risk_manager.refine_orders(handler.portfolio, SuggestedOrder(
+            "SPY", "BUY", "LMT", quantity=400, price=0.9 * self.spy
+        ))[0]
+        execution_handler.execute_order(order)
+        self.assertIn(order.order_id, execution_handler.order_book)
+        # Part of the order fills, then the rest is cancelled
+        handler.on_fill(FillEvent(
+            None, "SPY", "BUY", 100, self.spy, 5.0, "CN", order_id=order.order_id
+        ))
+        self.assertIs(execution_handler.cancel_order(order.order_id), order)
+        state = risk_manager._state(handler.portfolio)
+        self.assertEqual(state.reservations, {})
+        self.assertEqual(state.reserved_quantity["SPY"], 0)
+        self.assertAlmostEqual(state.reserved_cash, 0.0)
+        self.assertAlmostEqual(state.gross, 100 * self.spy)
+        self.assertAlmostEqual(state.traded, 100 * self.spy)
+
+    def test_rejected_order_releases_reservation(self):
+        handler, risk_manager = self._handler(max_weight=0.2)
+        execution_handler = AShareSimulatedExecutionHandler(
+            self.events_queue, self.data_handler, handler,
+            tempfile.mkdtemp(), record=False
+        )
+        order = risk_manager.refine_orders(
+            handler.portfolio, SuggestedOrder("AAPL", "SELL", "MKT", quantity=100)
+        )[0]
+        # Nothing to sell
+        self.events_queue.queue.clear()
+        execution_handler.execute_orders([order])
+        self.assertTrue(self.events_queue.empty())
+        state = risk_manager._state(handler.portfolio)
+        self.assertEqual(state.reservations, {})
+        self.assertEqual(state.reserved_quantity["AAPL"], 0)
+        self.assertAlmostEqual(state.gross, 0.0)
+        self.assertAlmostEqual(state.traded, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+
+import numpy as np
+
+import testcommon
+from Backtesting.statistics.risk_metrics import OnlineRiskMetrics, P2Quantile
+from Backtesting.buffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_evicts_oldest(self):
+        ring = RingBuffer(3)
+        self.assertEqual([ring.append(x) for x in range(5)], [None, None, None, 0, 1])
+        np.testing.assert_array_equal(ring.values, [2, 3, 4])
+
+
+class TestOnlineRiskMetrics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.benchmark_returns = rng.normal(0.0005, 0.01, 2000)
+        self.returns = 0.0002 + 1.5 * self.benchmark_returns + rng.normal(0, 0.005, 2000)
+        self.equity = 1e6 * np.cumprod(np.r_[1.0, 1 + self.returns])
+        self.benchmark = 100 * np.cumprod(np.r_[1.0, 1 + self.benchmark_returns])
+
+    def test_against_numpy(self):
+        metrics = OnlineRiskMetrics(window=250, var_level=0.95)
+        for i in range(len(self.equity)):
+            # Two bars per timestamp, only the last one counts
+            metrics.update(i, 0.0, None)
+            metrics.update(i, self.equity[i], self.benchmark[i])
+        metrics.flush()
+
+        returns = self.equity[1:] / self.equity[:-1] - 1
+        benchmark = self.benchmark[1:] / self.benchmark[:-1] - 1
+        self.assertEqual(metrics.count, len(returns))
+        self.assertAlmostEqual(metrics.mean, returns.mean())
+        self.assertAlmostEqual(metrics.std, returns.std(ddof=1))
+        self.assertAlmostEqual(metrics.volatility, returns[-250:].std(ddof=1))
+        window_r, window_b = returns[-250:], benchmark[-250:]
+        beta = np.cov(window_r, window_b)[0, 1] / window_b.var(ddof=1)
+        self.assertAlmostEqual(metrics.beta, beta)
+        var = -np.percentile(returns, 5)
+        self.assertAlmostEqual(metrics.var, var, delta=0.1 * var)
+
+    def test_quantile_small_sample(self):
+        quantile = P2Quantile(0.5)
+        for x in [3.0, 1.0, 2.0]:
+            quantile.add(x)
+        self.assertEqual(quantile.value, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
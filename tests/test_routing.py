@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import testcommon
+from Backtesting.backtest import Backtest
+from Backtesting.event import BarEvent, EventType, SignalEvent
+from Backtesting.strategy.base import AbstractStrategy, Strategies
+
+
+class Recorder(AbstractStrategy):
+    def __init__(self, symbols=None):
+        self.symbols = symbols
+        self.seen = []
+
+    def get_symbols(self):
+        return self.symbols
+
+    def calculate_signals(self, event):
+        self.seen.append(event.symbol)
+
+
+def bar(symbol, day=4):
+    return BarEvent(symbol, datetime.datetime(2010, 1, day), True, 1, 1, 1, 1, 100)
+
+
+class TestRouting(unittest.TestCase):
+    def test_routes_bars_by_symbol(self):
+        spy, aapl, both, every = (
+            Recorder(["SPY"]), Recorder(["AAPL"]), Recorder(["SPY", "AAPL"]), Recorder()
+        )
+        strategies = Strategies(spy, aapl, both, every)
+        for symbol in ("SPY", "AAPL", "IBM", "SPY"):
+            strategies.calculate_signals(bar(symbol))
+        self.assertEqual(spy.seen, ["SPY", "SPY"])
+        self.assertEqual(aapl.seen, ["AAPL"])
+        self.assertEqual(both.seen, ["SPY", "AAPL", "SPY"])
+        self.assertEqual(every.seen, ["SPY", "AAPL", "IBM", "SPY"])
+        self.assertIsNone(strategies.get_symbols())
+        self.assertEqual(Strategies(spy, both).get_symbols(), {"SPY", "AAPL"})
+
+
+class TradeOther(AbstractStrategy):
+    """
+    Listens to SPY only and buys AAPL on its first bar.
+    """
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.bars = []
+
+    def get_symbols(self):
+        return ["SPY"]
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR:
+            if not self.bars:
+                self.events_queue.put(SignalEvent(
+                    "AAPL", event.timestamp, "BUY", suggested_quantity=100
+                ))
+            self.bars.append(event)
+
+
+class TestStreamSymbols(unittest.TestCase):
+    def test_unlistened_symbols_not_streamed(self):
+        events_queue = queue.Queue()
+        strategy = TradeOther(events_queue)
+        backtest = Backtest(
+            strategy, ["SPY", "AAPL", "000001SZ_D"], 100000.0,
+            datetime.datetime(2010, 1, 1), datetime.datetime(2010, 3, 1),
+            events_queue, './data/', tempfile.mkdtemp(), title=["Routing"]
+        )
+        data_handler = backtest.data_handler
+        self.assertEqual(data_handler.stream_symbols, {"SPY"})
+        streamed = []
+        stream_next = data_handler.stream_next
+
+        def record():
+            stream_next()
+            if data_handler._last_streamed is not None:
+                streamed.append(data_handler._last_streamed)
+        data_handler.stream_next = record
+
+        backtest.start_trading(testing=True)
+        symbols = [symbol for _, symbol in dict.fromkeys(streamed)]
+        self.assertNotIn("000001SZ_D", symbols)
+        # AAPL is streamed from the bar after it was first traded
+        self.assertEqual(symbols[0], "SPY")
+        self.assertIn("AAPL", symbols)
+        self.assertTrue(all(bar.symbol == "SPY" for bar in strategy.bars))
+        aapl = data_handler.symbol_data["AAPL"]
+        self.assertEqual(
+            data_handler.get_last_close("AAPL"), aapl.loc[:"2010-03-01", "Close"].iloc[-1]
+        )
+        position = backtest.portfolio_handler.portfolio.positions["AAPL"]
+        self.assertEqual(position.quantity, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
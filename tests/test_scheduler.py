@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import queue
+import tempfile
+import datetime
+
+import pandas as pd
+
+import testcommon
+from testcommon import write_universe
+from Backtesting.backtest import Backtest
+from Backtesting.position_sizer.rebalance import LiquidateRebalancePositionSizer
+from Backtesting.scheduler import Scheduler, trigger_times
+from Backtesting.data_handler.historic_csv_data_handler import HistoricCSVDataHandler
+from Backtesting.strategy.base import AbstractStrategy
+from Backtesting.event import EventType, SignalEvent
+
+
+class TestTriggerTimes(unittest.TestCase):
+    def setUp(self):
+        # Two A share sessions of 30 minute bars, with the lunch break
+        days = []
+        for day in ("2019-01-31", "2019-02-01"):
+            days.append(pd.date_range(day + " 10:00", day + " 11:30", freq="30min"))
+            days.append(pd.date_range(day + " 13:30", day + " 15:00", freq="30min"))
+        self.calendar = days[0].append(days[1:])
+
+    def test_day_and_month(self):
+        self.assertEqual(
+            list(trigger_times(self.calendar, "day_open")),
+            [pd.Timestamp("2019-01-31 10:00"), pd.Timestamp("2019-02-01 10:00")]
+        )
+        self.assertEqual(
+            list(trigger_times(self.calendar, "day_close")),
+            [pd.Timestamp("2019-01-31 15:00"), pd.Timestamp("2019-02-01 15:00")]
+        )
+        self.assertEqual(
+            list(trigger_times(self.calendar, "month_end")),
+            [pd.Timestamp("2019-01-31 15:00"), pd.Timestamp("2019-02-01 15:00")]
+        )
+        self.assertEqual(
+            list(trigger_times(self.calendar, "week_start")),
+            [pd.Timestamp("2019-01-31 10:00")]
+        )
+
+    def test_every_minutes(self):
+        times = trigger_times(self.calendar, "every_minutes", 60)
+        day = times[times.normalize() == pd.Timestamp("2019-01-31")]
+        self.assertEqual(
+            [t.strftime("%H:%M") for t in day],
+            ["10:00", "11:00", "13:30", "14:00", "15:00"]
+        )
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            trigger_times(self.calendar, "quarter_end")
+        with self.assertRaises(ValueError):
+            trigger_times(self.calendar, "every_minutes")
+
+
+class MonthlyEqualWeight(AbstractStrategy):
+    def __init__(self, universe):
+        self.universe = universe
+        self.bars = 0
+        self.calls = []
+
+    def get_symbols(self):
+        return self.universe
+
+    def register_callbacks(self, scheduler):
+        scheduler.schedule("month_end", self.rebalance)
+
+    def calculate_signals(self, event):
+        self.bars += 1
+
+    def rebalance(self, timestamp):
+        data_handler = self.portfolio_handler.data_handler
+        self.calls.append((timestamp, self.bars, [
+            data_handler.get_last_timestamp(symbol) for symbol in self.universe
+        ]))
+        weight = 0.9 / len(self.universe)
+        self.portfolio_handler.rebalance({symbol: weight for symbol in self.universe})
+
+
+class TestScheduledBacktest(unittest.TestCase):
+    def test_month_end_rebalance(self):
+        data_dir = tempfile.mkdtemp()
+        universe = ["AAA", "BBB", "CCC"]
+        closes = write_universe(data_dir, {"AAA": 0.001, "BBB": 0.0, "CCC": -0.001})
+        strategy = MonthlyEqualWeight(universe)
+        backtest = Backtest(
+            strategy, universe, 100000.0,
+            datetime.datetime(2019, 1, 1), datetime.datetime(2019, 6, 1),
+            queue.Queue(), data_dir, tempfile.mkdtemp(), title=["Monthly"],
+            position_sizer=LiquidateRebalancePositionSizer()
+        )
+        backtest.start_trading(testing=True)
+
+        month_ends = closes.groupby(closes.index.to_period("M")).tail(1).index
+        self.assertEqual([call[0] for call in strategy.calls], list(month_ends))
+        for timestamp, bars, latest in strategy.calls:
+            # Called after every bar of the timestamp
+            self.assertEqual(bars, len(universe) * (closes.index.get_loc(timestamp) + 1))
+            self.assertEqual(latest, [timestamp] * len(universe))
+        positions = backtest.portfolio_handler.portfolio.positions
+        self.assertEqual(sorted(positions), universe)
+
+    def test_callback_orders_join_the_batch(self):
+        class BuyOnBarsAndMonthEnd(AbstractStrategy):
+            def __init__(self, events_queue):
+                self.events_queue = events_queue
+                self.calls = []
+
+            def register_callbacks(self, scheduler):
+                scheduler.schedule("month_end", self.month_end)
+
+            def calculate_signals(self, event):
+                if event.type == EventType.BAR and event.symbol == "AAA":
+                    self.events_queue.put(SignalEvent("AAA", event.timestamp, "BUY", 100))
+
+            def month_end(self, timestamp):
+                self.calls.append(timestamp)
+                self.events_queue.put(SignalEvent("BBB", timestamp, "BUY", 100))
+
+        data_dir = tempfile.mkdtemp()
+        universe = ["AAA", "BBB"]
+        write_universe(data_dir, {"AAA": 0.001, "BBB": 0.0})
+        events_queue = queue.Queue()
+        strategy = BuyOnBarsAndMonthEnd(events_queue)
+        backtest = Backtest(
+            strategy, universe, 100000.0,
+            datetime.datetime(2019, 1, 1), datetime.datetime(2019, 3, 1),
+            events_queue, data_dir, tempfile.mkdtemp(), title=["Batch"]
+        )
+        batches = {}
+        execute_orders = backtest.execution_handler.execute_orders
+
+        def record(orders):
+            self.assertNotIn(backtest.cur_time, batches)
+            batches[backtest.cur_time] = sorted(order.symbol for order in orders)
+            execute_orders(orders)
+
+        backtest.execution_handler.execute_orders = record
+        backtest.start_trading(testing=True)
+        # One batch per timestamp, the month ends holding the orders
+        # of the bar and of the callback
+        self.assertEqual(len(strategy.calls), 2)
+        self.assertTrue(set(strategy.calls) <= set(batches))
+        for timestamp, symbols in batches.items():
+            if timestamp in strategy.calls:
+                self.assertEqual(symbols, ["AAA", "BBB"])
+            else:
+                self.assertEqual(symbols, ["AAA"])
+
+
+class TestSchedulerPeriod(unittest.TestCase):
+    def test_mid_month_period(self):
+        data_dir = tempfile.mkdtemp()
+        write_universe(data_dir, {"AAA": 0.0})
+        data_handler = HistoricCSVDataHandler(
+            queue.Queue(), data_dir, ["AAA"],
+            datetime.datetime(2019, 1, 15), datetime.datetime(2019, 3, 15)
+        )
+        scheduler = Scheduler(data_handler)
+        calls = []
+        # The first and last days of the period are not boundaries
+        self.assertEqual(
+            list(scheduler.schedule("month_start", calls.append)),
+            [pd.Timestamp("2019-02-01"), pd.Timestamp("2019-03-01")]
+        )
+        self.assertEqual(
+            list(scheduler.schedule("month_end", calls.append)),
+            [pd.Timestamp("2019-01-31"), pd.Timestamp("2019-02-28")]
+        )
+        # 2019-01-15 and 2019-03-15 are a Tuesday and a Friday
+        weeks = scheduler.schedule("week_start", calls.append)
+        self.assertEqual(weeks[0], pd.Timestamp("2019-01-21"))
+        weeks = scheduler.schedule("week_end", calls.append)
+        self.assertEqual(weeks[-1], pd.Timestamp("2019-03-15"))
+        self.assertEqual(scheduler.calendar[0], pd.Timestamp("2019-01-15"))
+        self.assertEqual(scheduler.calendar[-1], pd.Timestamp("2019-03-15"))
+
+
+if __name__ == "__main__":
+    unittest.main()
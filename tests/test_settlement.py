@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+import unittest
+import tempfile
+
+import testcommon
+from Backtesting.portfolio_handler.settlement import SettlementLedger
+from Backtesting.portfolio_handler.portfolio import Portfolio
+
+
+class PriceHandler(object):
+    def get_last_close(self, symbol):
+        return 10.0
+
+
+class TestSettlementLedger(unittest.TestCase):
+    def test_t_plus_n(self):
+        ledger = SettlementLedger(1, {"BOND": 0, "HK": 2})
+        self.assertTrue(ledger.add("A", 100))
+        self.assertFalse(ledger.add("BOND", 100))
+        self.assertTrue(ledger.add("HK", 300))
+        self.assertEqual(ledger.unsettled("HK"), 300)
+        self.assertEqual(ledger.roll(), {"A": 100})
+        self.assertEqual(ledger.roll(), {"HK": 300})
+        self.assertEqual(ledger.roll(), {})
+        self.assertEqual(len(ledger), 0)
+
+
+class TestPortfolioSettlement(unittest.TestCase):
+    def setUp(self):
+        self.portfolio = Portfolio(PriceHandler(), 100000.0, tempfile.mkdtemp())
+
+    def test_t_plus_one(self):
+        portfolio = self.portfolio
+        portfolio.transact_position(None, "BUY", "A", 200, 10.0, 5.0)
+        position = portfolio.positions["A"]
+        self.assertEqual((position.available_quantity, position.unavailable_quantity), (0, 200))
+        portfolio._update_position()
+        self.assertEqual((position.available_quantity, position.unavailable_quantity), (200, 0))
+
+        portfolio.transact_position(None, "BUY", "A", 100, 10.0, 5.0)
+        portfolio.transact_position(None, "SELL", "A", 50, 10.0, 5.0)
+        self.assertEqual(
+            (position.quantity, position.available_quantity, position.unavailable_quantity),
+            (250, 150, 100)
+        )
+        portfolio._update_position()
+        self.assertEqual((position.available_quantity, position.unavailable_quantity), (250, 0))
+
+    def test_t_plus_zero(self):
+        portfolio = Portfolio(
+            PriceHandler(), 100000.0, tempfile.mkdtemp(),
+            settlement=SettlementLedger(0)
+        )
+        portfolio.transact_position(None, "BUY", "A", 200, 10.0, 5.0)
+        self.assertEqual(portfolio.positions["A"].available_quantity, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,5 +4,29 @@
 import sys
 import os
 
+import numpy as np
+import pandas as pd
+
 # append module root directory to sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_universe(data_dir, drifts, days=80, missing=None):
+    """
+    Write one CSV per symbol of a random walk with the given daily
+    drift, and return the closes as a DataFrame.
+    """
+    rng = np.random.RandomState(7)
+    index = pd.bdate_range("2019-01-02", periods=days)
+    closes = {}
+    for symbol, drift in drifts.items():
+        close = 10.0 * np.exp(np.cumsum(drift + rng.normal(0.0, 0.002, days)))
+        frame = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 1000000, "Adj Close": close
+        }, index=pd.Index(index, name="Date"))
+        if missing and symbol in missing:
+            frame = frame.drop(index[missing[symbol]])
+        frame.to_csv(os.path.join(data_dir, "%s.csv" % symbol))
+        closes[symbol] = frame["Close"]
+    return pd.DataFrame(closes)